@@ -26,7 +26,7 @@ setuptools.setup(
     packages=setuptools.find_packages("src"),
     package_dir={"": "src"},
     include_package_data=True,
-    install_requires=['pytest>=3.5.0', 'rich', 'typing_extensions'],
+    install_requires=['pytest>=7.0', 'rich', 'typing_extensions'],
     classifiers=[
         'Development Status :: 4 - Beta',
         'Framework :: Pytest',
@@ -48,5 +48,8 @@ setuptools.setup(
         'pytest11': [
             'splunk-soar-connectors = pytest_splunk_soar_connectors',
         ],
+        'console_scripts': [
+            'soar-corpus = pytest_splunk_soar_connectors.corpus:main',
+        ],
     },
 )
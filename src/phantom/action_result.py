@@ -1,5 +1,169 @@
+import json
 import logging
+import pickle
 import pprint
+import tempfile
+from array import array
+from collections.abc import Sequence
+from typing import IO, Any, Iterable, Iterator, Optional
+
+from phantom.instrumentation import platform_api
+
+
+class LazyPrettyFormat:
+    """Defers pretty printing of an object until a log record is actually formatted."""
+
+    __slots__ = ("obj", "pretty_printer")
+
+    def __init__(self, obj, pretty_printer: pprint.PrettyPrinter):
+        self.obj = obj
+        self.pretty_printer = pretty_printer
+
+    def __str__(self) -> str:
+        return self.pretty_printer.pformat(self.obj)
+
+
+class StreamingData(Sequence):
+    """Append-only sequence of data rows. Once more than spill_threshold rows are held in memory, they are moved
+    to a temporary file and read back lazily on access. Rows are pickled, so spilled rows compare equal to the rows
+    that were added, tuples and datetimes included."""
+
+    def __init__(self, spill_threshold: Optional[int] = None):
+        self.spill_threshold = spill_threshold
+        self._rows: list = []
+        self._spill_file: Optional[IO[bytes]] = None
+        self._offsets = array("q")
+
+    def append(self, row):
+        self._rows.append(row)
+        if self.spill_threshold is not None and len(self._rows) > self.spill_threshold:
+            self._spill()
+
+    def extend(self, rows: Iterable):
+        for row in rows:
+            self.append(row)
+
+    def _spill(self):
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile("w+b")
+        spill_file = self._spill_file
+        spill_file.seek(0, 2)
+        offset = spill_file.tell()
+        for row in self._rows:
+            record = pickle.dumps(row, pickle.HIGHEST_PROTOCOL)
+            spill_file.write(record)
+            self._offsets.append(offset)
+            offset += len(record)
+        self._rows = []
+
+    def _read_spilled(self, index: int):
+        assert self._spill_file is not None
+        self._spill_file.seek(self._offsets[index])
+        return pickle.load(self._spill_file)
+
+    def spilled_count(self) -> int:
+        return len(self._offsets)
+
+    def __len__(self) -> int:
+        return len(self._offsets) + len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("StreamingData index out of range")
+        if index < len(self._offsets):
+            return self._read_spilled(index)
+        return self._rows[index - len(self._offsets)]
+
+    def __iter__(self) -> Iterator:
+        if self._offsets:
+            spill_file = self._spill_file
+            assert spill_file is not None
+            spill_file.flush()
+            position = 0
+            for _ in range(len(self._offsets)):
+                spill_file.seek(position)
+                row = pickle.load(spill_file)
+                position = spill_file.tell()
+                yield row
+        yield from list(self._rows)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (list, tuple, StreamingData)):
+            return len(self) == len(other) and all(row == other_row for row, other_row in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+    def close(self):
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+        self._offsets = array("q")
+        self._rows = []
+
+
+def json_default(obj: Any):
+    """json.dumps default hook that serializes StreamingData as a list."""
+    if isinstance(obj, StreamingData):
+        return list(obj)
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+def _iter_action_result_pieces(action_results: Iterable["ActionResult"], encoder: json.JSONEncoder) -> Iterator[str]:
+    yield "["
+    for result_index, action_result in enumerate(action_results):
+        if result_index:
+            yield ", "
+        yield "{"
+        for key_index, (key, value) in enumerate(action_result._get_dict().items()):  # pylint: disable=protected-access
+            if key_index:
+                yield ", "
+            yield encoder.encode(key)
+            yield ": "
+            if isinstance(value, (list, StreamingData)):
+                # Encode list items one by one so large data lists are never materialized as a single string
+                yield "["
+                for item_index, item in enumerate(value):
+                    if item_index:
+                        yield ", "
+                    yield encoder.encode(item)
+                yield "]"
+            else:
+                yield encoder.encode(value)
+        yield "}"
+    yield "]"
+
+
+def iter_action_results_json(action_results: Iterable["ActionResult"], chunk_size: int = 64 * 1024) -> Iterator[str]:
+    """Serializes action results incrementally. Joining the chunks gives the same string as json.dumps of the list
+    of result dictionaries.
+
+    Args:
+        action_results (Iterable[ActionResult]): action results to serialize
+        chunk_size (int, optional): approximate size of the yielded chunks. Defaults to 64 KiB.
+
+    Yields:
+        str: chunks of the JSON document
+    """
+    encoder = json.JSONEncoder(default=json_default)
+    buffer = []
+    buffered = 0
+    for piece in _iter_action_result_pieces(action_results, encoder):
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= chunk_size:
+            yield "".join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield "".join(buffer)
 
 
 class ActionResult:
@@ -32,12 +196,41 @@ class ActionResult:
         )
         return status
 
+    def enable_streaming(self, spill_threshold: Optional[int] = None):
+        """Switches the result to append-only streaming data mode. add_data only logs the added item and rows are
+        spilled to a temporary file once more than spill_threshold rows are held in memory.
+
+        Args:
+            spill_threshold (Optional[int], optional): rows to keep in memory before spilling. Defaults to None (never spill).
+        """
+        if not isinstance(self.data, StreamingData):
+            streaming_data = StreamingData(spill_threshold)
+            streaming_data.extend(self.data)
+            self.data = streaming_data
+        else:
+            self.data.spill_threshold = spill_threshold
+
+    def is_streaming(self) -> bool:
+        return isinstance(self.data, StreamingData)
+
+    @platform_api("add_data", method=False)
     def add_data(self, data):
         self.data.append(data)
-        self.logger.info(
-            "ActionResult.add_data() - Data (next line):\n%s", self.pretty_printer.pformat(self.data))
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        if self.is_streaming():
+            self.logger.info(
+                "ActionResult.add_data() - Data item %d (next line):\n%s",
+                len(self.data),
+                LazyPrettyFormat(data, self.pretty_printer),
+            )
+        else:
+            self.logger.info(
+                "ActionResult.add_data() - Data (next line):\n%s", LazyPrettyFormat(self.data, self.pretty_printer)
+            )
         return
 
+    @platform_api("update_data", batch_arg="data", method=False)
     def update_data(self, data):
         self.data.extend(data)
         return
@@ -76,7 +269,7 @@ class ActionResult:
     def update_summary(self, summary):
         self.summary = summary
         self.logger.info(
-            "ActionResult.update_summary() - Summary (next line):\n%s", self.pretty_printer.pformat(summary)
+            "ActionResult.update_summary() - Summary (next line):\n%s", LazyPrettyFormat(summary, self.pretty_printer)
         )
         return self.summary
 
@@ -103,6 +296,13 @@ class ActionResult:
         self.param = param
 
     def get_dict(self) -> dict:
+        """Returns the result as a JSON serializable dictionary, streaming data is read back into a list."""
+        result_dict = self._get_dict()
+        if isinstance(self.data, StreamingData):
+            result_dict["data"] = list(self.data)
+        return result_dict
+
+    def _get_dict(self) -> dict:
         return {
             "context": {},
             "data": self.data,
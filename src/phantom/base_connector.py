@@ -1,22 +1,97 @@
+import asyncio
+import contextvars
 import glob
 import inspect
 import json
 import logging
 import os
 import pprint
+import re
+import shutil
+import threading
 import uuid
 from abc import ABC, abstractmethod
-from tempfile import NamedTemporaryFile, TemporaryDirectory
-from typing import List, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Dict, List, Optional, Tuple, Union, overload
 import pathlib
 
-from rich.logging import RichHandler
-
+from phantom.instrumentation import ACTION, HANDLE_ACTION, connector_active, platform_api, track
+from phantom.tempspace import get_temp_space
+from pytest_splunk_soar_connectors.log import configure_logging
 from pytest_splunk_soar_connectors.models import Artifact
-from phantom.action_result import ActionResult
+from pytest_splunk_soar_connectors.shared_cache import get_shared_cache
+from pytest_splunk_soar_connectors.stores import ArtifactStore, ContainerStore, artifact_container_of
+from phantom.action_result import ActionResult, LazyPrettyFormat, iter_action_results_json
 
 from . import app as phantom
 
+# Process-wide cache of discovered app JSON files. Keyed by (connector class, connector directory), each entry
+# holds the path of the matched app JSON, its (mtime_ns, size, inode) signature and the parsed app JSON.
+_APP_JSON_CACHE: Dict[Tuple[type, str], Tuple[str, Tuple[int, int, int], dict]] = {}
+
+# Index of the parameter the current thread or task is working on, used to keep action results in parameter order
+_PARAM_INDEX: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("soar_param_index", default=None)
+
+# Number of characters of the serialized action results included in the run summary log line
+_RESULT_LOG_PREVIEW_LENGTH = 1024
+
+_MAIN_MODULE_PATTERN = re.compile(rb'"main_module"\s*:\s*"([^"]*)"')
+_MAIN_MODULE_SCAN_CHUNK_SIZE = 64 * 1024
+_MAIN_MODULE_SCAN_OVERLAP = 512
+
+
+def _file_signature(file_path: str) -> Tuple[int, int, int]:
+    stat_result = os.stat(file_path)
+    return stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino
+
+
+def _scan_main_module(json_file_path: str) -> Optional[str]:
+    """Streams through a JSON file looking for its "main_module" value without parsing the document.
+
+    Args:
+        json_file_path (str): path of the JSON file to scan
+
+    Returns:
+        Optional[str]: the raw "main_module" value or None if the file does not contain one
+    """
+    tail = b""
+    with open(json_file_path, "rb") as json_file:
+        while chunk := json_file.read(_MAIN_MODULE_SCAN_CHUNK_SIZE):
+            window = tail + chunk
+            match = _MAIN_MODULE_PATTERN.search(window)
+            if match:
+                return match.group(1).decode("utf-8", errors="replace")
+            tail = window[-_MAIN_MODULE_SCAN_OVERLAP:]
+    return None
+
+
+def _json_files_signature(dirpath: str) -> List[list]:
+    """Paths and signatures of the JSON files in dirpath, changes when one of them is added, removed or modified."""
+    signatures = []
+    for file_path in sorted(glob.glob(f"{dirpath}/*.json")):
+        try:
+            signatures.append([file_path, *_file_signature(file_path)])
+        except OSError:
+            continue
+    return signatures
+
+
+def _is_fresh_app_json(discovered: Optional[list]) -> bool:
+    if not discovered:
+        return False
+    path, signature, app_json = discovered
+    try:
+        if app_json is None:
+            return _json_files_signature(path) == signature
+        return _file_signature(path) == tuple(signature)
+    except OSError:
+        return False
+
+
+def clear_app_json_cache():
+    """Drops all cached app JSON discovery results."""
+    _APP_JSON_CACHE.clear()
+
 
 class BaseConnector(ABC):
     __message: str = ""
@@ -43,21 +118,16 @@ class BaseConnector(ABC):
         self.container_id = 123
         self.container_artifact_id = 1234
 
-        # state
-        self.state_file_location = NamedTemporaryFile().name
-        self.state_dir = TemporaryDirectory()
-
-        # the following is an example
-        self.container_info = {
-            "1": {"container_info_would_go_here": True},
-            "2": {"container_info_would_go_here": True},
-            "123": {"container_info_would_go_here": True},
-        }
-        # used when saving containers
-        self.starting_container_id = 2
-
-        # artifact settings
-        self.starting_artifact_id = 1
+        # state, allocated from the session temp space
+        temp_space = get_temp_space()
+        self.state_file_location = temp_space.state_file()
+        self.state_dir = temp_space.state_dir()
+        # remove state_dir when the action ends, disable to keep files in it for the next connector run
+        self.cleanup_state_dir = True
+        # buffer save_state() in memory and write the state file once when the action ends
+        self.state_write_back = True
+        # append every save_state() delta to a JSONL journal next to the state file
+        self.state_journal = False
 
         # product information settings
         self.product_install_id = "1234"
@@ -66,16 +136,33 @@ class BaseConnector(ABC):
         # polling settings
         self.poll_now = False
 
+        # parameter execution settings, a value above 1 runs handle_action for the parameters on a thread pool
+        self.parameter_workers = 1
+
         # baseurl
         self.base_url = "https://127.0.0.1"
 
         # internal trackers
+        self.__lock = threading.RLock()
+        self.__pretty_printer = pprint.PrettyPrinter(indent=4)
+
+        self.__init_run_state()
+
+        return
+
+    def __init_run_state(self):
+        """Sets the per-run state that a connector run reads and writes, the platform keeps it for one run only."""
         self.__message = ""
         self.__progress_message = ""
         self._state = None
+        self.__state_dirty = False
+        self.__state_writes = 0
+        self.__state_journal_writes = 0
         self.__status = False
         self.__action_results = []
-        self.__pretty_printer = pprint.PrettyPrinter(indent=4)
+        self.__action_result_order: Dict[int, int] = {}
+        # handle_action return values by parameter index while parameters are processed concurrently
+        self.__parameter_statuses: Dict[int, bool] = {}
         self.action_identifier = ""
 
         # pylint: disable=unused-private-member
@@ -87,23 +174,51 @@ class BaseConnector(ABC):
 
         # Mock test helpers - those are not part of the BaseConnector API but have been added here
         self.__progress = []
-        self.__artifacts = []
+        # stores are replaced rather than cleared, they can be shared with other connectors
+        self.artifact_store = ArtifactStore()
+        # saved containers, seeded with the current container
+        self.container_store = ContainerStore()
+        self.container_store.add(
+            self.container_id, {"name": "Default container", "label": "events", "source_data_identifier": None}
+        )
+        # used when saving containers
+        self.starting_container_id = 2
 
-        return
+        # artifact settings
+        self.starting_artifact_id = 1
 
-    def _setup_logger(self):
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(message)s",
-            datefmt="[%X]",
-            filename=(self.log_path or "debug_log.log"),
-            filemode="a",
-        )
-        self.logger = logging.getLogger(__name__)
+    def reset(self):
+        """Restores the pristine per-run state so the connector can be reused for another run, as if it was just created.
+
+        Status, message, action results, progress, summary, the cancellation flag, saved artifacts and containers are reset,
+        the state file and its journal are removed and the state directory is emptied. Temporary paths, the logger and the
+        loaded app JSON are kept, which makes this much cheaper than creating a new connector. Asset configuration and
+        settings like poll_now are left as they are. Connectors that keep their own per-run attributes should override
+        this and call super().reset().
+        """
+        with self.__lock:
+            self.__init_run_state()
+        for location in (self.state_file_location, self._state_journal_location()):
+            if os.path.exists(location):
+                os.unlink(location)
+        # the directory is removed when an action ends, it is recreated at the same path
+        state_dir = self.state_dir.name
+        if os.path.isdir(state_dir):
+            with os.scandir(state_dir) as entries:
+                if next(entries, None) is not None:
+                    shutil.rmtree(state_dir)
+        os.makedirs(state_dir, exist_ok=True)
+
+    @property
+    def __artifacts(self) -> ArtifactStore:
+        # the store can be replaced, e.g. by a store shared between connector runs
+        return self.artifact_store
 
-        # Add console output if configured
-        if self.log_to_console:
-            self.logger.addHandler(RichHandler())
+    def _setup_logger(self):
+        # Handlers are installed once per process and shared by all connectors
+        self.logger = configure_logging(log_path=(self.log_path or "debug_log.log"), log_to_console=self.log_to_console)
+        if self.logger.level == logging.NOTSET:
+            self.logger.setLevel(logging.INFO)
 
     def _config_parser_to_dict(self, config_parser):
         return {s: dict(config_parser.items(s)) for s in config_parser.sections()}
@@ -127,6 +242,7 @@ class BaseConnector(ABC):
         """
         return self.container_id
 
+    @platform_api("get_container_info")
     def get_container_info(self, container_id: Optional[int] = None) -> Tuple[bool, dict, str]:
         """Returns info about the container. If container_id is not passed, returns info about the current container.
 
@@ -139,7 +255,10 @@ class BaseConnector(ABC):
 
         if not container_id:
             container_id = self.container_id
-        return True, self.container_info[str(container_id)], "200"
+        container_info = self.container_store.get(container_id)
+        if container_info is None:
+            return phantom.APP_ERROR, {}, "404"
+        return phantom.APP_SUCCESS, container_info, "200"
 
     def get_product_installation_id(self) -> str:
         """Returns the unique ID of the Splunk SOAR (Cloud) product installation.
@@ -157,16 +276,23 @@ class BaseConnector(ABC):
         """
         return self.product_version
 
+    @platform_api("load_state")
     def load_state(self) -> Union[None, dict]:
         """Loads the current state file into the state dictionary. If a state file does not exist, it creates one with the app_version field. This returns the state dictionary. If an error occurs, this returns None.
 
         Returns:
             Union[None, dict]: state dict or none
         """
+        with self.__lock:
+            if self.__state_dirty:
+                # the buffered state is newer than the state file
+                return self._state
         try:
             with open(self.state_file_location, "r+", encoding="utf-8") as state_file:
-                self._state = json.loads(state_file.read() or "{}")
-            self.logger.info("load_state() - State: %s", self.__pretty_printer.pformat(self._state))
+                state = json.loads(state_file.read() or "{}")
+            with self.__lock:
+                self._state = self._replay_state_journal(state)
+            self.logger.info("load_state() - State: %s", LazyPrettyFormat(self._state, self.__pretty_printer))
             return self._state
         # pylint:disable=broad-except
         # TODO: This may be problematic if the state exists, but loading it actually fails
@@ -184,24 +310,88 @@ class BaseConnector(ABC):
         """
         return self._state
 
+    @platform_api("save_state")
     def save_state(self, state: dict):
         """Writes a given dictionary to a state file that can be loaded during future app runs. This is especially crucial with ingestion apps. The saved state is unique per asset. An app_version field will be added to the dictionary before saving.
 
+        With state_write_back enabled (the default) the state is buffered in memory and written once by flush_state()
+        when the action ends, also when it raises.
+
         Args:
             state (dict): The dictionary to write to the state file.
         """
 
-        if self._state:
-            self._state = {**self._state, **state}
-        else:
-            self._state = state
-        with open(self.state_file_location, "w+", encoding="utf-8") as state_file:
-            state_file.write(json.dumps(self._state))
-        self.logger.info("save_state() - State: %s", self.__pretty_printer.pformat(self._state))
+        with self.__lock:
+            if self._state:
+                self._state = {**self._state, **state}
+            else:
+                self._state = dict(state)
+            if self.state_journal:
+                self._append_state_journal(state)
+            if self.state_write_back:
+                self.__state_dirty = True
+            else:
+                self._write_state_file()
+        self.logger.info("save_state() - Updated keys: %s", LazyPrettyFormat(list(state), self.__pretty_printer))
         return
 
+    def flush_state(self) -> bool:
+        """Writes buffered state to the state file. The file is replaced atomically, so readers never see a partially
+        written state.
+
+        Returns:
+            bool: whether the state file was written
+        """
+        with self.__lock:
+            if not self.__state_dirty:
+                return False
+            self._write_state_file()
+            return True
+
+    def get_state_write_counts(self) -> Dict[str, int]:
+        """Returns how many physical writes of the state file and of the state journal happened.
+
+        Returns:
+            Dict[str, int]: number of state file writes and state journal appends
+        """
+        return {"state_file": self.__state_writes, "journal": self.__state_journal_writes}
+
+    def _state_journal_location(self) -> str:
+        return f"{self.state_file_location}.journal"
+
+    def _write_state_file(self):
+        tmp_location = f"{self.state_file_location}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_location, "w", encoding="utf-8") as state_file:
+            state_file.write(json.dumps(self._state, separators=(",", ":")))
+        os.replace(tmp_location, self.state_file_location)
+        self.__state_writes += 1
+        self.__state_dirty = False
+
+        # the state file now contains every journaled delta
+        journal_location = self._state_journal_location()
+        if os.path.exists(journal_location):
+            os.unlink(journal_location)
+
+    def _append_state_journal(self, delta: dict):
+        with open(self._state_journal_location(), "a", encoding="utf-8") as journal_file:
+            journal_file.write(json.dumps(delta, separators=(",", ":")) + "\n")
+        self.__state_journal_writes += 1
+
+    def _replay_state_journal(self, state: dict) -> dict:
+        """Applies deltas that were journaled but not flushed, e.g. because a previous run did not finish."""
+        journal_location = self._state_journal_location()
+        if not os.path.exists(journal_location):
+            return state
+        with open(journal_location, encoding="utf-8") as journal_file:
+            for line in journal_file:
+                if line.strip():
+                    state = {**state, **json.loads(line)}
+        return state
+
+    @platform_api("save_artifact")
     def save_artifact(self, artifact: Artifact) -> Tuple[bool, str, int]:
-        """Saves an artifact to Splunk SOAR (Cloud).
+        """Saves an artifact to Splunk SOAR (Cloud). Like the platform, an artifact with the source_data_identifier of
+        an artifact already in the container is not saved again.
 
         Args:
             artifact (dict): Dictionary containing information about an artifact.
@@ -209,11 +399,17 @@ class BaseConnector(ABC):
         Returns:
             Tuple[bool, str, int]: status, status message, saved artifact ID if successful
         """
-        artifact_id = self.starting_artifact_id
-        self.starting_artifact_id += 1
-        self.__artifacts.append(artifact)
+        with self.__lock:
+            container = artifact_container_of(artifact, self.container_id)
+            existing_id = self.__artifacts.find_duplicate(artifact, container)
+            if existing_id is not None:
+                return (phantom.APP_SUCCESS, "Artifact already exists", existing_id)
+            artifact_id = self.starting_artifact_id
+            self.starting_artifact_id += 1
+            self.__artifacts.add(artifact_id, artifact, container)
         return (phantom.APP_SUCCESS, "Artifact saved", artifact_id)
 
+    @platform_api("save_artifacts", batch_arg="artifacts")
     def save_artifacts(self, artifacts: List[Artifact]) -> Tuple[bool, str, List[int]]:
         """Saves a list of artifacts to Splunk SOAR (Cloud).
 
@@ -223,16 +419,35 @@ class BaseConnector(ABC):
         Returns:
             Tuple[bool, str, List[int]]: status, status message, list of saved artifact IDs if successful, none otherwise
         """
-        return_val = []
-        for artifact in artifacts:
-            self.__artifacts.append(artifact)
-            return_val.append(self.starting_artifact_id)
-            self.starting_artifact_id += 1
+        with self.__lock:
+            results, self.starting_artifact_id = self.__artifacts.add_many(
+                artifacts, self.container_id, self.starting_artifact_id
+            )
+
+        return phantom.APP_SUCCESS, "Artifact saved", [artifact_id for artifact_id, _ in results]
+
+    def _save_container(self, container: dict) -> Tuple[bool, str, int]:
+        existing_id = self.container_store.find_duplicate(container)
+        if existing_id is not None:
+            container_id = existing_id
+            message = "Duplicate container found"
+        else:
+            container_id = self.container_store.next_free_id(self.starting_container_id)
+            self.starting_container_id = container_id + 1
+            self.container_store.add(container_id, container)
+            message = "Container saved"
 
-        return phantom.APP_SUCCESS, "Artifact saved", return_val
+        artifacts = container.get("artifacts")
+        if artifacts:
+            _, self.starting_artifact_id = self.__artifacts.add_many(artifacts, container_id, self.starting_artifact_id)
 
+        return phantom.APP_SUCCESS, message, container_id
+
+    @platform_api("save_container")
     def save_container(self, container: dict) -> Tuple[bool, str, int]:
-        """Saves a container and artifacts to Splunk SOAR (Cloud).
+        """Saves a container and artifacts to Splunk SOAR (Cloud). Like the platform, a container with the
+        source_data_identifier of an existing container is not saved again and its artifacts are added to the
+        existing container.
 
         Args:
             container (dict): Dictionary containing info about a container
@@ -240,12 +455,10 @@ class BaseConnector(ABC):
         Returns:
             Tuple[bool, str, int]: status, status message, container id
         """
-        container_id = self.container_artifact_id
-        self.starting_container_id += 1
-        # Not actually adding a container currently
-
-        return (phantom.APP_SUCCESS, "Container saved", container_id)
+        with self.__lock:
+            return self._save_container(container)
 
+    @platform_api("save_containers", batch_arg="containers")
     def save_containers(self, containers: List[dict]) -> Tuple[bool, str, List[Tuple[bool, str, int]]]:
         """Saves a list of containers to the phantom platform.
 
@@ -253,12 +466,11 @@ class BaseConnector(ABC):
             containers (List[dict]): A list of dictionaries that each contain information about a container. Each dictionary follows the same rules as the input to save_container.
 
         Returns:
-            Tuple[bool, str, List[Tuple[bool, str, int]]]: _description_
+            Tuple[bool, str, List[Tuple[bool, str, int]]]: status, status message, list of the save_container results
+                of each container
         """
-        return_val = []
-        for _ in containers:
-            return_val.append([phantom.APP_SUCCESS, "Container saved", self.starting_container_id])
-            self.starting_container_id += 1
+        with self.__lock:
+            return_val = [list(self._save_container(container)) for container in containers]
 
         return phantom.APP_SUCCESS, "Containers saved", return_val
 
@@ -269,10 +481,10 @@ class BaseConnector(ABC):
             tag (str): The string that is prefixed before the dump_object is dumped.
             dump_obj (object, optional): The dump_object to dump. If the object is a list, dictionary and so on it is automatically pretty printed. Defaults to False.
         """
-        out = ""
+        out: Union[str, LazyPrettyFormat] = ""
 
         if dump_obj:
-            out = self.__pretty_printer.pformat(dump_obj)
+            out = LazyPrettyFormat(dump_obj, self.__pretty_printer)
 
         self.logger.debug("BaseConnector.debug_print - Message: %s; Object (next line):\n%s", tag, out)
         return
@@ -284,10 +496,10 @@ class BaseConnector(ABC):
             tag (str): The string that is prefixed before the dump_object is dumped.
             dump_obj (object, optional): The dump_object to dump. If the object is a list, dictionary and so on it is automatically pretty printed. Defaults to False.
         """
-        out = ""
+        out: Union[str, LazyPrettyFormat] = ""
 
         if dump_obj:
-            out = self.__pretty_printer.pformat(dump_obj)
+            out = LazyPrettyFormat(dump_obj, self.__pretty_printer)
 
         self.logger.error("BaseConnector.error_print - Message: %s; Object (next line):%s", tag, out)
         return
@@ -303,9 +515,10 @@ class BaseConnector(ABC):
         Returns:
             bool: status
         """
-        self.__status = status
-        if message:
-            self.__message = message
+        with self.__lock:
+            self.__status = status
+            if message:
+                self.__message = message
         self.logger.info("BaseConnector.set_status - State: %s; Message: %s; Error: %s", status, message, error)
         return status
 
@@ -315,7 +528,8 @@ class BaseConnector(ABC):
         Args:
             message (str): The string that is to be appended to the existing message
         """
-        self.__message += message
+        with self.__lock:
+            self.__message += message
         self.logger.info("BaseConnector.append_to_message - Message: %s", message)
         return
 
@@ -330,10 +544,11 @@ class BaseConnector(ABC):
             bool: status that was set
         """
 
-        self.__status = status
-        self.__progress_message = message
+        with self.__lock:
+            self.__status = status
+            self.__progress_message = message
         self.logger.info("BaseConnector.set_status_save_progress - Status: %s, Message: %s", status, message)
-        return self.__status
+        return status
 
     def send_progress(self, message: str):
         """Sends a progress message to the Splunk SOAR core. It is written to persistent storage, but is overwritten by the message that comes in through the next send_progress call
@@ -352,8 +567,9 @@ class BaseConnector(ABC):
             message (str): The progress message to send to the Splunk Phantom core. Typically, this is a short description of the current task.
             more (str, optional): The various parameters that need to be formatted into the progress_str_config string. Defaults to none.
         """
-        self.__progress_message = message
-        self.__progress.append(message)
+        with self.__lock:
+            self.__progress_message = message
+            self.__progress.append(message)
         self.logger.info("BaseConnector.save_progress - Progress: %s; More: %s", message, more)
         return
 
@@ -367,7 +583,11 @@ class BaseConnector(ABC):
             ActionResult: The ActionResult added to the connector run
         """
         action_result.set_logger(self.logger)
-        self.__action_results.append(action_result)
+        with self.__lock:
+            self.__action_results.append(action_result)
+            param_index = _PARAM_INDEX.get()
+            if param_index is not None:
+                self.__action_result_order[id(action_result)] = param_index
         return action_result
 
     def remove_action_result(self, action_result: ActionResult) -> ActionResult:
@@ -381,9 +601,10 @@ class BaseConnector(ABC):
             ActionResult: The ActionResult that was removed
         """
 
-        for i, action_result in enumerate(self.__action_results):
-            if action_result == action_result:
-                return self.__action_results.pop(i)
+        with self.__lock:
+            for i, action_result in enumerate(self.__action_results):
+                if action_result == action_result:
+                    return self.__action_results.pop(i)
         raise Exception("Could not find action Result")
 
     def get_action_results(self) -> List[ActionResult]:
@@ -501,6 +722,16 @@ class BaseConnector(ABC):
     def _is_app_json(self, json_file_path, connector_py):
 
         self.debug_print(f"Connector class File: {connector_py}")
+
+        # Cheap prefilter: skip files whose main_module does not point at the connector without parsing them
+        try:
+            connector_file = _scan_main_module(json_file_path)
+        except OSError as exc:
+            self.debug_print(f"Failed to read JSON: {json_file_path}, reason: {exc}")
+            return False
+        if not connector_file or connector_file[: connector_file.find(".")] != connector_py:
+            return False
+
         # Load the file
         with open(json_file_path, encoding="utf-8") as app_json_file:
             try:
@@ -520,48 +751,82 @@ class BaseConnector(ABC):
         return False
 
     def _load_app_json(self):
-        dirpath = os.path.dirname(inspect.getfile(self.__class__))
-        # get the directory of the derived class
-        dirpath = os.path.dirname(inspect.getfile(self.__class__))
+        # Get the connector file and the directory of the derived class
+        connector_py_file = inspect.getfile(self.__class__)
+        dirpath = os.path.dirname(connector_py_file)
         self.debug_print(f"Derived class dir: '{dirpath}'")
         if not dirpath:
             dirpath = os.curdir
 
+        # Reuse a previous discovery as long as the app JSON file is unchanged
+        cache_key = (self.__class__, dirpath)
+        cached = _APP_JSON_CACHE.get(cache_key)
+        if cached:
+            cached_file, cached_signature, cached_app_json = cached
+            try:
+                is_fresh = _file_signature(cached_file) == cached_signature
+            except OSError:
+                is_fresh = False
+            if is_fresh:
+                self.__app_json = cached_app_json
+                self.app_id = cached_app_json["appid"]
+                return phantom.APP_SUCCESS
+            del _APP_JSON_CACHE[cache_key]
+
+        shared_cache = get_shared_cache()
+        if shared_cache is None:
+            discovered = self._discover_app_json(dirpath, connector_py_file)
+        else:
+            # discovered once, shared with the other pytest-xdist workers and later runs while the app JSON is unchanged
+            discovered = shared_cache.get_or_compute(
+                f"app_json:{dirpath}:{connector_py_file}",
+                lambda: self._discover_app_json(dirpath, connector_py_file),
+                is_fresh=_is_fresh_app_json,
+            )
+
+        json_file, json_file_signature, self.__app_json = discovered
+        if self.__app_json is None:
+            return self.set_status(phantom.APP_ERROR, "Could not load Connector")
+
+        if not self.__app_json:
+            return self.set_status(phantom.APP_ERROR, "Could not find App ID in JSON")
+
+        self.app_id = self.__app_json["appid"]
+        _APP_JSON_CACHE[cache_key] = (json_file, tuple(json_file_signature), self.__app_json)
+
+        return phantom.APP_SUCCESS
+
+    def _discover_app_json(self, dirpath: str, connector_py_file: str) -> list:
+        """Finds the app JSON of the connector among the JSON files in dirpath.
+
+        Returns:
+            list: path, (mtime_ns, size, inode) signature and content of the app JSON. If there is none, dirpath, the
+            signatures of its JSON files and None.
+        """
         # Create the glob to the json file
         json_file_glob = f"{dirpath}/*.json"
 
         # Check if it exists
         files_matched = glob.glob(json_file_glob)
 
-        # Get the connector file
-        connector_py_file = inspect.getfile(self.__class__)
         self.debug_print(f"connector_py_file: {connector_py_file}")
-        # Split into head and tail
-        connector_py = os.path.split(connector_py_file)
-
-        # get the tail, which will be the file name
-        connector_py = connector_py[1]
+        # Split into head and tail, the tail is the file name
+        connector_py = os.path.split(connector_py_file)[1]
 
         self.debug_print(f"connector_py: {connector_py}")
 
         # The extension of the file could be pyc or py
         connector_py = connector_py[: connector_py.find(".")]
 
-        json_file = None
         for file_path in files_matched:
+            try:
+                signature = _file_signature(file_path)
+            except OSError:
+                continue
             if self._is_app_json(file_path, connector_py):
-                json_file = file_path
-                break
+                return [file_path, list(signature), self.__app_json]
 
-        if json_file is None:
-            return self.set_status(phantom.APP_ERROR, "Could not load Connector")
-
-        if not self.__app_json:
-            return self.set_status(phantom.APP_ERROR, "Could not find App ID in JSON")
-
-        self.app_id = self.__app_json["appid"]
-
-        return phantom.APP_SUCCESS
+        return [dirpath, _json_files_signature(dirpath), None]
 
     def get_state_file_path(self) -> str:
         """Get the full current state file path.
@@ -614,31 +879,156 @@ class BaseConnector(ABC):
     def validate_parameters(self, parameters):
         raise NotImplementedError
 
-    def _handle_action(self, in_json, handle) -> str:
+    def _set_parameter_status(self, ret_val: bool):
+        param_index = _PARAM_INDEX.get()
+        with self.__lock:
+            if param_index is None:
+                self.__status = ret_val
+            else:
+                self.__parameter_statuses[param_index] = ret_val
+
+    def _apply_parameter_statuses(self):
+        """Sets the status returned for the last parameter, like a serial run does, whatever order the concurrently
+        processed parameters finished in."""
+        with self.__lock:
+            statuses = self.__parameter_statuses
+            if statuses:
+                self.__status = statuses[max(statuses)]
+            self.__parameter_statuses = {}
+
+    def _handle_parameter_error(self, error: Union[KeyboardInterrupt, Exception]):
+        if isinstance(error, KeyboardInterrupt):
+            self.__was_cancelled = True
+            self.handle_cancel()
+        else:
+            self.logger.exception(error)
+            self.handle_exception(error)
+
+    def _sort_action_results(self):
+        """Restores parameter order of the action results after parameters were processed concurrently."""
+        with self.__lock:
+            order = self.__action_result_order
+            self.__action_results.sort(key=lambda result: order.get(id(result), -1))
+            self.__action_result_order = {}
+
+    def _run_parameter(self, param: dict, initialize: bool = True):
+        # pylint:disable=broad-except
+        try:
+            if initialize:
+                self.initialize()
+            with track(HANDLE_ACTION, self):
+                ret_val = self.handle_action(param)
+            self._set_parameter_status(ret_val)
+        except (KeyboardInterrupt, Exception) as error:
+            self._handle_parameter_error(error)
+
+    def _run_parameters_parallel(self, parameters: List[dict]):
+        """Runs handle_action for every parameter on a bounded thread pool. initialize() is called once per worker
+        thread and action results are reordered to follow the parameter order once all parameters are processed."""
+        worker_state = threading.local()
+
+        def run(param_index: int, param: dict):
+            token = _PARAM_INDEX.set(param_index)
+            initialize = not getattr(worker_state, "initialized", False)
+            worker_state.initialized = True
+            try:
+                with connector_active(self):
+                    self._run_parameter(param, initialize=initialize)
+            finally:
+                _PARAM_INDEX.reset(token)
+
+        workers = min(self.parameter_workers, len(parameters))
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="soar-param") as executor:
+                futures = [executor.submit(run, i, param) for i, param in enumerate(parameters)]
+                for future in futures:
+                    future.result()
+        finally:
+            self._apply_parameter_statuses()
+            self._sort_action_results()
+
+    def _execute_parameters(self, parameters: List[dict]):
+        if self.parameter_workers > 1 and len(parameters) > 1:
+            self._run_parameters_parallel(parameters)
+        else:
+            for param in parameters:
+                self._run_parameter(param)
 
+    def _begin_action(self, in_json) -> List[dict]:
         self.__action_json = json.loads(in_json)
 
         _ = self._load_app_json()
 
-        # pylint:disable=broad-except
-        for param in self.__action_json["parameters"]:
-            current_param = param
+        self.action_identifier = self.__action_json["identifier"]
+        return self.__action_json["parameters"]
+
+    def _log_action_results_summary(self, preview: str, length: int):
+        if length > len(preview):
+            preview = f"{preview}... ({length - len(preview)} more characters)"
+        self.logger.info(
+            "BaseConnector._handle_action - %d action result(s), %d characters: %s",
+            len(self.__action_results),
+            length,
+            preview,
+        )
+
+    @overload
+    def _end_action(self) -> str:
+        ...
+
+    @overload
+    def _end_action(self, out: IO[str]) -> None:
+        ...
+
+    def _end_action(self, out: Optional[IO[str]] = None) -> Optional[str]:
+        """Serializes the action results once. They are returned as a string, or written to out chunk by chunk if given."""
+        preview = ""
+        length = 0
+        chunks = []
+        for chunk in iter_action_results_json(self.__action_results):
+            if len(preview) < _RESULT_LOG_PREVIEW_LENGTH:
+                preview += chunk[: _RESULT_LOG_PREVIEW_LENGTH - len(preview)]
+            length += len(chunk)
+            if out is None:
+                chunks.append(chunk)
+            else:
+                out.write(chunk)
+
+        self._log_action_results_summary(preview, length)
+        if self.cleanup_state_dir:
+            self.state_dir.cleanup()
+        if out is None:
+            return "".join(chunks)
+        return None
+
+    def _handle_action(self, in_json, handle) -> str:
+
+        with connector_active(self), track(ACTION, self):
             try:
-                self.action_identifier = self.__action_json["identifier"]
-                self.initialize()
-                ret_val = self.handle_action(current_param)
-                self.__status = ret_val
-            except KeyboardInterrupt:
-                self.__was_cancelled = True
-                self.handle_cancel()
-            except Exception as error:
-                logging.exception(error)
-                self.handle_exception(error)
-
-        self.logger.info(json.dumps(list(r.get_dict() for r in self.__action_results)))
-        self.finalize()
-        self.state_dir.cleanup()
-        return json.dumps(list(r.get_dict() for r in self.__action_results))
+                parameters = self._begin_action(in_json)
+                self._execute_parameters(parameters)
+                self.finalize()
+            finally:
+                self.flush_state()
+            return self._end_action()
+
+    def _handle_action_to_file(self, in_json, handle, out):
+        """Variant of _handle_action that streams the serialized action results into a text file-like object
+        instead of returning them as one string.
+
+        Args:
+            in_json (str): connector run input JSON
+            handle: connector run handle
+            out: file-like object with a write(str) method
+        """
+        with connector_active(self), track(ACTION, self):
+            try:
+                parameters = self._begin_action(in_json)
+                self._execute_parameters(parameters)
+                self.finalize()
+            finally:
+                self.flush_state()
+            self._end_action(out)
 
     def handle_exception(self, exception: Exception):
         raise exception
@@ -666,3 +1056,84 @@ class BaseConnector(ABC):
             bool: whether or not the connector run result is success
         """
         return not phantom.is_success(self.__status)
+
+
+class AsyncBaseConnector(BaseConnector):
+    """BaseConnector variant for connectors built on asyncio clients. initialize() and handle_action() are coroutines
+    and all parameters of a connector run are driven on a single event loop, at most concurrency_limit at a time."""
+
+    def __init__(self):
+        super().__init__()
+
+        # event loop to run on, a fresh loop is created for every run when None
+        self.event_loop: Optional[asyncio.AbstractEventLoop] = None
+        # maximum number of parameters handled concurrently
+        self.concurrency_limit = 10
+
+    @abstractmethod
+    async def initialize(self):
+        """Optional coroutine that can be implemented by the AppConnector. It is awaited once before the parameters
+        are handled."""
+
+    @abstractmethod
+    async def handle_action(self, param: dict) -> bool:  # type: ignore[override]
+        """Every AppConnector is required to implement this coroutine. It is awaited for every parameter dictionary in
+        the parameter list.
+
+        Args:
+            param (dict): current param dictionary
+
+        Returns:
+            bool: return value (phantom.APP_ERROR or phantom.APP_SUCCESS)
+        """
+
+    async def _run_parameter_async(self, param_index: int, param: dict, semaphore: asyncio.Semaphore):
+        # pylint:disable=broad-except
+        async with semaphore:
+            _PARAM_INDEX.set(param_index)
+            try:
+                with track(HANDLE_ACTION, self):
+                    ret_val = await self.handle_action(param)
+                self._set_parameter_status(ret_val)
+            except (KeyboardInterrupt, Exception) as error:
+                self._handle_parameter_error(error)
+
+    async def _run_parameters_async(self, parameters: List[dict]):
+        # pylint:disable=broad-except
+        try:
+            await self.initialize()
+        except (KeyboardInterrupt, Exception) as error:
+            self._handle_parameter_error(error)
+            return
+
+        semaphore = asyncio.Semaphore(max(1, self.concurrency_limit))
+        try:
+            await asyncio.gather(*(self._run_parameter_async(i, param, semaphore) for i, param in enumerate(parameters)))
+        finally:
+            self._apply_parameter_statuses()
+            self._sort_action_results()
+
+    async def _handle_action_async(self, in_json) -> str:
+        """Coroutine version of _handle_action to be awaited from an already running event loop.
+
+        Args:
+            in_json (str): connector run input JSON
+
+        Returns:
+            str: action results as a JSON string
+        """
+        with connector_active(self), track(ACTION, self):
+            try:
+                parameters = self._begin_action(in_json)
+                await self._run_parameters_async(parameters)
+                finalized = self.finalize()
+                if inspect.isawaitable(finalized):
+                    await finalized
+            finally:
+                self.flush_state()
+            return self._end_action()
+
+    def _handle_action(self, in_json, handle) -> str:
+        if self.event_loop is not None:
+            return self.event_loop.run_until_complete(self._handle_action_async(in_json))
+        return asyncio.run(self._handle_action_async(in_json))
@@ -0,0 +1,140 @@
+import contextlib
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Callable, Iterator, List, Optional
+
+# Hooks notified around instrumented calls. The list is replaced, never mutated, so it can be read without a lock.
+_hooks: List["PlatformHook"] = []
+_hooks_lock = threading.Lock()
+
+# Connector whose action is currently running, for platform APIs that are not connector methods (e.g. the vault)
+_current_connector: contextvars.ContextVar[Any] = contextvars.ContextVar("soar_current_connector", default=None)
+
+_NOT_TRACKED = contextlib.nullcontext()
+
+# Calls tracked around connector code rather than platform APIs: a whole connector run and handle_action per parameter
+ACTION = "action"
+HANDLE_ACTION = "handle_action"
+CONNECTOR_CALLS = (ACTION, HANDLE_ACTION)
+
+
+class PlatformCall:
+    """A single instrumented call: a connector run, the handle_action call for one parameter or a platform API call."""
+
+    __slots__ = ("api", "connector", "size", "started", "elapsed")
+
+    def __init__(self, api: str, connector: Any, size: int):
+        self.api = api
+        self.connector = connector
+        self.size = size
+        self.started = 0.0
+        self.elapsed = 0.0
+
+    def __repr__(self) -> str:
+        return f"PlatformCall(api={self.api}, size={self.size}, elapsed={self.elapsed})"
+
+
+class PlatformHook:
+    """Base class of hooks that are notified around instrumented calls while they are installed."""
+
+    def enter(self, call: PlatformCall):
+        """Called before the instrumented call runs."""
+
+    def exit(self, call: PlatformCall):
+        """Called after the instrumented call returned or raised, with call.elapsed set."""
+
+
+def install_hook(hook: PlatformHook):
+    global _hooks  # pylint: disable=global-statement
+    with _hooks_lock:
+        _hooks = [*_hooks, hook]
+
+
+def uninstall_hook(hook: PlatformHook):
+    global _hooks  # pylint: disable=global-statement
+    with _hooks_lock:
+        _hooks = [installed for installed in _hooks if installed is not hook]
+
+
+@contextlib.contextmanager
+def hook_installed(hook: PlatformHook) -> Iterator[PlatformHook]:
+    install_hook(hook)
+    try:
+        yield hook
+    finally:
+        uninstall_hook(hook)
+
+
+def get_current_connector() -> Any:
+    return _current_connector.get()
+
+
+@contextlib.contextmanager
+def connector_active(connector: Any) -> Iterator[None]:
+    """Marks connector as the connector whose action is running in the current thread or task."""
+    token = _current_connector.set(connector)
+    try:
+        yield
+    finally:
+        _current_connector.reset(token)
+
+
+@contextlib.contextmanager
+def _tracked(hooks: List[PlatformHook], call: PlatformCall) -> Iterator[PlatformCall]:
+    for hook in hooks:
+        hook.enter(call)
+    call.started = time.perf_counter()
+    try:
+        yield call
+    finally:
+        call.elapsed = time.perf_counter() - call.started
+        for hook in reversed(hooks):
+            hook.exit(call)
+
+
+def track(api: str, connector: Any = None, size: int = 1):
+    """Context manager around an instrumented call. It costs a single list check while no hooks are installed.
+
+    Args:
+        api (str): name of the call, e.g. ACTION, HANDLE_ACTION or "save_artifacts"
+        connector (Any, optional): connector making the call. Defaults to the currently active connector.
+        size (int, optional): number of items the call handles. Defaults to 1.
+    """
+    hooks = _hooks
+    if not hooks:
+        return _NOT_TRACKED
+    return _tracked(hooks, PlatformCall(api, connector if connector is not None else _current_connector.get(), size))
+
+
+def platform_api(api: str, batch_arg: Optional[str] = None, method: bool = True) -> Callable:
+    """Decorator instrumenting a platform API function or connector method.
+
+    Args:
+        api (str): name reported to the hooks
+        batch_arg (Optional[str], optional): argument holding the list of items of a batch call, used as call size
+        method (bool, optional): whether the first argument is the connector making the call. Defaults to True.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            hooks = _hooks
+            if not hooks:
+                return func(*args, **kwargs)
+
+            size = 1
+            if batch_arg is not None:
+                items = signature.bind_partial(*args, **kwargs).arguments.get(batch_arg)
+                size = len(items) if items is not None and hasattr(items, "__len__") else 1
+            connector = args[0] if method and args else _current_connector.get()
+            with _tracked(hooks, PlatformCall(api, connector, size)):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,143 @@
+import atexit
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+from typing import Optional
+
+# tmpfs mount used when the temp space is placed in memory
+TMPFS_DIR = "/dev/shm"
+
+# Allocation kinds, every kind gets its own directory below the temp space root
+STATE_FILES = "state"
+STATE_DIRS = "state_dirs"
+VAULT_ROOTS = "vault"
+
+_temp_space: Optional["TempSpace"] = None
+_temp_space_lock = threading.Lock()
+
+
+class TempDirectory:
+    """Directory allocated from a TempSpace, with the name and cleanup() of a tempfile.TemporaryDirectory."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"<TempDirectory {self.name!r}>"
+
+    def __enter__(self) -> str:
+        return self.name
+
+    def __exit__(self, *exc_info):
+        self.cleanup()
+
+    def cleanup(self):
+        shutil.rmtree(self.name, ignore_errors=True)
+
+
+class TempSpace:
+    """Single temporary root that state files, state directories and vault roots are allocated from.
+
+    Paths are allocated below <root>/<kind>/ with a counter instead of asking the OS for a new temporary file or
+    directory each time, and everything is removed at once by cleanup(). The root is created on first use. Forked
+    processes allocate below their own <root>/pid-<pid>/ directory, so they are cleaned up with the parent's root.
+    """
+
+    def __init__(self, base_dir: Optional[str] = None, prefix: str = "soar-"):
+        self.base_dir = base_dir
+        self.prefix = prefix
+        self._root: Optional[str] = None
+        self._pid = os.getpid()
+        self._kinds: set = set()
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"<TempSpace {self._root or self.base_dir or tempfile.gettempdir()!r}>"
+
+    @property
+    def root(self) -> str:
+        with self._lock:
+            if self._root is None:
+                self._root = tempfile.mkdtemp(prefix=self.prefix, dir=self.base_dir)
+                self._pid = os.getpid()
+            elif self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._root = os.path.join(self._root, f"pid-{self._pid}")
+                self._kinds.clear()
+                os.makedirs(self._root, exist_ok=True)
+            return self._root
+
+    def _kind_dir(self, kind: str) -> str:
+        kind_dir = os.path.join(self.root, kind)
+        with self._lock:
+            if kind not in self._kinds:
+                os.makedirs(kind_dir, exist_ok=True)
+                self._kinds.add(kind)
+        return kind_dir
+
+    def path(self, kind: str, suffix: str = "") -> str:
+        """Allocates a unique path below the directory of kind, the path is not created.
+
+        Args:
+            kind (str): allocation kind, e.g. STATE_FILES
+            suffix (str): suffix of the file name
+
+        Returns:
+            str: unique path
+        """
+        return os.path.join(self._kind_dir(kind), f"{next(self._counter)}{suffix}")
+
+    def directory(self, kind: str) -> TempDirectory:
+        """Allocates and creates a unique directory below the directory of kind."""
+        name = self.path(kind)
+        os.mkdir(name)
+        return TempDirectory(name)
+
+    def state_file(self) -> str:
+        return self.path(STATE_FILES, ".json")
+
+    def state_dir(self) -> TempDirectory:
+        return self.directory(STATE_DIRS)
+
+    def vault_root(self) -> TempDirectory:
+        return self.directory(VAULT_ROOTS)
+
+    def cleanup(self):
+        """Removes the root with everything allocated from it, a later allocation creates a new root."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # the root belongs to the parent process
+                return
+            root, self._root = self._root, None
+            self._kinds.clear()
+        if root is not None:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def tmpfs_dir() -> Optional[str]:
+    """Returns the tmpfs mount to place temp spaces on, or None when it is not available."""
+    if os.path.isdir(TMPFS_DIR) and os.access(TMPFS_DIR, os.W_OK | os.X_OK):
+        return TMPFS_DIR
+    return None
+
+
+def get_temp_space() -> TempSpace:
+    """Returns the temp space connectors and vaults allocate from. Unless one was set, a process wide temp space is
+    created that is removed when the process exits."""
+    global _temp_space  # pylint: disable=global-statement
+    with _temp_space_lock:
+        if _temp_space is None:
+            _temp_space = TempSpace()
+            atexit.register(_temp_space.cleanup)
+        return _temp_space
+
+
+def set_temp_space(temp_space: Optional[TempSpace]) -> Optional[TempSpace]:
+    """Replaces the temp space connectors and vaults allocate from and returns the previous one."""
+    global _temp_space  # pylint: disable=global-statement
+    with _temp_space_lock:
+        previous, _temp_space = _temp_space, temp_space
+    return previous
@@ -1,19 +1,263 @@
 # pylint: disable=protected-access
 
 from pathlib import Path
+import mmap
+import os
 import pathlib
-import tempfile
-from typing import Dict, Union
 import shutil
+import tempfile
+import threading
+import traceback
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import hashlib
 
+from phantom.instrumentation import platform_api
+from phantom.tempspace import TempDirectory, get_temp_space
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore
+
+# Buffer size used when hashing and copying files into the vault
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# ioctl request number of FICLONE on Linux, used to create reflinks (copy-on-write clones)
+_FICLONE = 0x40049409
+
+# "auto" reflinks when the filesystem supports it and copies otherwise. "hardlink" shares the inode with the source,
+# so a source modified in place changes the vault object too; only use it for sources that are never modified.
+LINK_MODES = ("auto", "reflink", "hardlink", "copy")
+
+# Cache of file digests across vaults, set by the pytest plugin. Any object with get_or_compute(key, compute).
+_digest_cache = None
+
+
+def set_digest_cache(digest_cache) -> object:
+    """Sets the cache that SHA-256, MD5 and size of files added to a vault are looked up in and stored to, keyed by
+    path, size, mtime and inode of the file. Files in temporary directories are not cached. Returns the previous
+    cache."""
+    global _digest_cache  # pylint: disable=global-statement
+    previous, _digest_cache = _digest_cache, digest_cache
+    return previous
+
+
+def _digest_cache_key(file_location: str) -> str:
+    stat_result = os.stat(file_location)
+    return (
+        f"file_digests:{os.path.abspath(file_location)}:"
+        f"{stat_result.st_size}:{stat_result.st_mtime_ns}:{stat_result.st_ino}"
+    )
+
+
+def _is_cacheable_path(file_location: str) -> bool:
+    """Tells whether the digests of a file are cached. Files in temporary directories, e.g. written by the test or by
+    the connector itself, are usually added once and would only fill the cache, while seed files and fixtures kept
+    with the project are added again by every run."""
+    path = os.path.realpath(file_location)
+    temp_dirs = [tempfile.gettempdir()]
+    base_dir = get_temp_space().base_dir
+    if base_dir:
+        temp_dirs.append(base_dir)
+    for temp_dir in temp_dirs:
+        temp_dir = os.path.realpath(temp_dir)
+        if os.path.commonpath([path, temp_dir]) == temp_dir:
+            return False
+    return True
 
-class VirtualVault:
-    """VirtualVault is the internal representation backing the Vault and the Rules API"""
+
+# Bytes-like chunk of vault file contents, hashed and written without copying it first
+BytesChunk = Union[bytes, bytearray, memoryview]
+
+# Contents accepted by Vault.create_attachment
+AttachmentContents = Union[str, bytes, bytearray, memoryview, IO, Iterable[Union[str, bytes]]]
+
+
+def _try_reflink(source: str, target: str) -> bool:
+    if fcntl is None:
+        return False
+    try:
+        with open(source, "rb") as source_file, open(target, "wb") as target_file:
+            fcntl.ioctl(target_file.fileno(), _FICLONE, source_file.fileno())
+        return True
+    except OSError:
+        if os.path.exists(target):
+            os.unlink(target)
+        return False
+
+
+def _try_hardlink(source: str, target: str) -> bool:
+    try:
+        os.link(source, target)
+        return True
+    except OSError:
+        return False
+
+
+class VaultFileView:
+    """Read-only, memory-mapped view of a vault file.
+
+    Indexing and slicing return memoryviews of the mapping, so parsers can work on large files without copying them
+    into memory. Close the view (or use it as a context manager) once done; views left open are reported as leaks
+    by the soar_vault fixture. Slices must be released before the view is closed.
+    """
+
+    def __init__(self, vault_id: str, path: Union[str, pathlib.Path], open_files: "OpenVaultFiles"):
+        self.vault_id = vault_id
+        self.path = path
+        self.opened_at = _caller()
+        self._file = open(path, "rb")  # pylint: disable=consider-using-with
+        try:
+            self.size = os.fstat(self._file.fileno()).st_size
+            # empty files can't be mapped
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        except OSError:
+            self._file.close()
+            raise
+        self.view = memoryview(self._mmap) if self._mmap is not None else memoryview(b"")
+        self._open_files = open_files
+        self._open_files.register(self)
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, key):
+        return self.view[key]
+
+    def iter_chunks(self, chunk_size: int = COPY_BUFFER_SIZE) -> Iterator[memoryview]:
+        """Yields the file as memoryview chunks. A chunk is released when the next one is requested."""
+        for offset in range(0, self.size, chunk_size):
+            chunk = self.view[offset : offset + chunk_size]
+            try:
+                yield chunk
+            finally:
+                chunk.release()
+
+    def close(self):
+        """Closes the view. Raises BufferError, leaving the view open and usable, while slices are still in use."""
+        if self.closed:
+            return
+        try:
+            # slices export the mapping itself, not the view, so only closing the mapping notices them
+            self.view.release()
+            if self._mmap is not None:
+                self._mmap.close()
+        except BufferError as error:
+            if self._mmap is not None:
+                self.view = memoryview(self._mmap)
+            raise BufferError(f"Slices of vault file {self.vault_id} are still in use") from error
+        self._file.close()
+        self._open_files.unregister(self)
+
+    def __enter__(self) -> "VaultFileView":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"VaultFileView(vault_id={self.vault_id}, size={self.size}, closed={self.closed})"
+
+
+class OpenVaultFiles:
+    """Tracks the VaultFileViews handed out by a vault that have not been closed yet."""
 
     def __init__(self) -> None:
-        self.root = tempfile.TemporaryDirectory()
+        self._lock = threading.Lock()
+        self._views: Dict[int, VaultFileView] = {}
+
+    def register(self, view: VaultFileView):
+        with self._lock:
+            self._views[id(view)] = view
+
+    def unregister(self, view: VaultFileView):
+        with self._lock:
+            self._views.pop(id(view), None)
+
+    def __len__(self) -> int:
+        return len(self._views)
+
+    def report(self) -> List[str]:
+        with self._lock:
+            views = list(self._views.values())
+        return [f"vault file {view.vault_id} opened at {view.opened_at} was not closed" for view in views]
+
+    def close_all(self) -> List[str]:
+        """Closes all open views and returns the leak report. Views whose slices are still in use stay open."""
+        leaks = self.report()
+        with self._lock:
+            views = list(self._views.values())
+        for view in views:
+            try:
+                view.close()
+            except BufferError:
+                pass
+        return leaks
+
+
+def _caller() -> str:
+    """Returns the location of the first stack frame outside of this module."""
+    for frame in reversed(traceback.extract_stack(limit=16)[:-1]):
+        if frame.filename != __file__:
+            return f"{frame.filename}:{frame.lineno}"
+    return "unknown location"
+
+
+def _open_view(vault, vault_id: str) -> VaultFileView:
+    entries = vault.find(vault_id=vault_id)
+    if not entries:
+        raise FileNotFoundError(f"No vault file with vault ID {vault_id}")
+    return VaultFileView(vault_id, entries[-1]["path"], vault.open_files)
+
+
+def _iter_view(vault, vault_id: str, chunk_size: int) -> Iterator[memoryview]:
+    with _open_view(vault, vault_id) as view:
+        yield from view.iter_chunks(chunk_size)
+
+
+class VirtualVault:
+    """VirtualVault is the internal representation backing the Vault and the Rules API.
+
+    File contents are stored once per SHA-256 under objects/, so identical files added to several containers share
+    the same storage, and an object is removed once the last entry referencing it is deleted. By default ("auto")
+    files are reflinked into the vault when source and vault share a filesystem that supports copy-on-write clones,
+    and copied otherwise. link_mode="hardlink" hardlinks files instead, which is only safe for sources that are never
+    modified: writing to a hardlinked source changes the vault object behind its vault ID.
+
+    The storage directory is allocated from the temp space on first use, so the module level Vault created at import
+    follows the temp space the pytest plugin sets up.
+    """
+
+    def __init__(self, link_mode: str = "auto") -> None:
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"link_mode must be one of {LINK_MODES}")
+        self._root: Optional[TempDirectory] = None
+        # most recently added file entry per vault ID
         self.files: Dict[str, Dict] = {}
+        self.link_mode = link_mode
+
+        # all file entries by entry ID and secondary indexes mapping a key to the IDs of the matching entries
+        self.entries: Dict[int, Dict] = {}
+        self._next_entry_id = 1
+        self._by_vault_id: Dict[str, Dict[int, None]] = {}
+        self._by_container: Dict[str, Dict[int, None]] = {}
+        self._by_file_name: Dict[str, Dict[int, None]] = {}
+        self._by_hash: Dict[str, Dict[int, None]] = {}
+        # number of entries referencing each object, by SHA-256
+        self._object_refs: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self.open_files = OpenVaultFiles()
+
+    @property
+    def root(self) -> TempDirectory:
+        with self._lock:
+            if self._root is None:
+                self._root = get_temp_space().vault_root()
+            return self._root
 
     def isempty(self):
         return len(self.files) == 0
@@ -25,63 +269,471 @@ class VirtualVault:
         file_name: str,
         metadata: dict,
         trace: bool = False,
+        digests: Optional[Tuple[str, str, int]] = None,
     ):
-        print(f"trace: {trace}")
+        file_name = file_name or Path(file_location).name
+        digest_cache = _digest_cache
+        stored = None
+        if digests is None and digest_cache is not None and _is_cacheable_path(file_location):
+
+            def store_and_hash():
+                # a miss hashes the file while it is stored, so it is read only once
+                nonlocal stored
+                stored = self._store_file(file_location)
+                return list(stored[:3])
+
+            # hashed once, other processes and later runs reuse the digests as long as the file is unchanged
+            sha256, md5, size = digest_cache.get_or_compute(_digest_cache_key(file_location), store_and_hash)
+            digests = (sha256, md5, size)
+        if stored is None:
+            stored = self._store_file(file_location, digests)
+        vault_id, md5, size, target_location = stored
+        self._add_entry(container, file_name, metadata, vault_id, md5, size, target_location)
+        return True, "Success", vault_id
 
-        container_dir = self.root.name / Path(str(container))
-        container_dir.mkdir(parents=True, exist_ok=True)
+    def add_contents(
+        self,
+        container: Union[dict, int],
+        contents: AttachmentContents,
+        file_name: Optional[str],
+        metadata: dict,
+    ) -> Tuple[bool, str, str]:
+        """Stores contents (text, bytes, a file-like object or an iterable of chunks) as a new vault file. The
+        contents are streamed straight into the vault storage and hashed on the way.
+
+        Returns:
+            Tuple[bool, str, str]: success, message and vault ID
+        """
+        vault_id, md5, size, target_location = self._store_chunks(_iter_chunks(contents))
+        file_name = file_name or os.path.basename(getattr(contents, "name", "") or "") or vault_id
+        self._add_entry(container, file_name, metadata, vault_id, md5, size, target_location)
+        return True, "Success", vault_id
 
-        file_name = Path(file_location).name
-        target_location = container_dir / Path(file_name)
+    def _add_entry(
+        self,
+        container: Union[dict, int],
+        file_name: str,
+        metadata: dict,
+        vault_id: str,
+        md5: str,
+        size: int,
+        target_location: pathlib.Path,
+    ) -> dict:
+        with self._lock:
+            entry_id = self._next_entry_id
+            self._next_entry_id += 1
+            entry = {
+                "id": entry_id,
+                "file_name": file_name,
+                "name": file_name,
+                "metadata": {**metadata, "md5": md5, "sha256": vault_id, "size": size},
+                "path": target_location,
+                "hash": vault_id,
+                "vault_id": vault_id,
+                "container": container,
+                "container_id": container,
+                "size": size,
+            }
+            self._index(entry)
+        return entry
+
+    def _index_keys(self, entry: dict):
+        yield self._by_vault_id, entry["vault_id"]
+        yield self._by_container, str(entry["container"])
+        yield self._by_file_name, entry["file_name"]
+        yield self._by_hash, entry["hash"]
+        yield self._by_hash, entry["metadata"]["md5"]
+
+    def _index(self, entry: dict):
+        self.entries[entry["id"]] = entry
+        self.files[entry["vault_id"]] = entry
+        for index, key in self._index_keys(entry):
+            index.setdefault(key, {})[entry["id"]] = None
+
+    def _unindex(self, entry: dict):
+        del self.entries[entry["id"]]
+        for index, key in self._index_keys(entry):
+            entry_ids = index[key]
+            entry_ids.pop(entry["id"], None)
+            if not entry_ids:
+                del index[key]
+
+        remaining = self._by_vault_id.get(entry["vault_id"])
+        if remaining:
+            self.files[entry["vault_id"]] = self.entries[next(reversed(remaining))]
+        else:
+            del self.files[entry["vault_id"]]
+
+    def find(
+        self,
+        vault_id: Optional[str] = None,
+        file_name: Optional[str] = None,
+        container_id: Optional[Union[int, str]] = None,
+        file_hash: Optional[str] = None,
+    ) -> List[dict]:
+        """Returns the file entries matching all given filters, in the order they were added. Uses the smallest
+        matching index, so the cost is proportional to the number of candidates rather than to the vault size."""
+        with self._lock:
+            candidate_sets = []
+            for index, key in (
+                (self._by_vault_id, vault_id),
+                (self._by_file_name, file_name),
+                (self._by_container, None if container_id is None else str(container_id)),
+                (self._by_hash, file_hash),
+            ):
+                if key is not None:
+                    candidate_sets.append(index.get(key, {}))
+            if not candidate_sets:
+                return list(self.entries.values())
+
+            candidate_sets.sort(key=len)
+            smallest, others = candidate_sets[0], candidate_sets[1:]
+            return [self.entries[entry_id] for entry_id in smallest if all(entry_id in other for other in others)]
+
+    def delete_entry(self, entry_id: int) -> dict:
+        with self._lock:
+            entry = self.entries[entry_id]
+            self._unindex(entry)
+            self._release_object(entry["vault_id"], entry["path"])
+        return entry
+
+    def _release_object(self, sha256: str, object_path: pathlib.Path):
+        refs = self._object_refs.pop(sha256) - 1
+        if refs:
+            self._object_refs[sha256] = refs
+        else:
+            object_path.unlink(missing_ok=True)
+
+    def _object_path(self, sha256: str) -> pathlib.Path:
+        return Path(self.root.name) / "objects" / sha256[:2] / sha256
+
+    def _incoming_file(self) -> Tuple[int, pathlib.Path]:
+        """Creates a uniquely named file in the incoming directory and returns its open descriptor and path."""
+        incoming_dir = Path(self.root.name) / "incoming"
+        incoming_dir.mkdir(exist_ok=True)
+        file_descriptor, incoming_path = tempfile.mkstemp(dir=incoming_dir)
+        return file_descriptor, Path(incoming_path)
+
+    def _incoming_path(self) -> pathlib.Path:
+        file_descriptor, incoming_path = self._incoming_file()
+        os.close(file_descriptor)
+        os.unlink(incoming_path)
+        return incoming_path
+
+    def _link(self, source: str, target: str) -> bool:
+        if self.link_mode in ("auto", "reflink"):
+            return _try_reflink(source, target)
+        if self.link_mode == "hardlink":
+            return _try_hardlink(source, target)
+        return False
+
+    def _store_file(
+        self, file_location: str, digests: Optional[Tuple[str, str, int]] = None
+    ) -> Tuple[str, str, int, pathlib.Path]:
+        """Moves a file into content-addressed storage, hashing it in a single pass. When the SHA-256, MD5 and size
+        of the file are already known, the file is not read for hashing and not stored again if the vault has it.
+
+        Returns:
+            Tuple[str, str, int, pathlib.Path]: SHA-256, MD5, size and storage path of the file
+        """
+        if digests is not None:
+            sha256, md5, size = digests
+            object_path = self._reference_object(sha256)
+            if object_path is not None:
+                return sha256, md5, size, object_path
+        incoming_path = self._incoming_path()
+        try:
+            if digests is not None:
+                if not self._link(file_location, str(incoming_path)):
+                    shutil.copyfile(file_location, incoming_path)
+            elif self._link(file_location, str(incoming_path)):
+                sha256, md5, size = _hash_file(incoming_path)
+            else:
+                sha256, md5, size = _copy_and_hash(file_location, incoming_path)
+            return sha256, md5, size, self._commit_object(incoming_path, sha256)
+        finally:
+            if incoming_path.exists():
+                incoming_path.unlink()
+
+    def _store_chunks(self, chunks: Iterable[BytesChunk]) -> Tuple[str, str, int, pathlib.Path]:
+        """Writes chunks into content-addressed storage, hashing them in the same pass.
+
+        Returns:
+            Tuple[str, str, int, pathlib.Path]: SHA-256, MD5, size and storage path of the file
+        """
+        file_descriptor, incoming_path = self._incoming_file()
+        try:
+            with open(file_descriptor, "wb") as incoming_file:
+                sha256, md5, size = _write_and_hash(chunks, incoming_file)
+            return sha256, md5, size, self._commit_object(incoming_path, sha256)
+        finally:
+            if incoming_path.exists():
+                incoming_path.unlink()
+
+    def _reference_object(self, sha256: str) -> Optional[pathlib.Path]:
+        """Takes a reference on a stored object for a new entry, returns None when the vault does not have it."""
+        with self._lock:
+            if sha256 not in self._object_refs:
+                return None
+            self._object_refs[sha256] += 1
+        return self._object_path(sha256)
+
+    def _commit_object(self, incoming_path: pathlib.Path, sha256: str) -> pathlib.Path:
+        """Takes a reference on the object of sha256 for a new entry, moving the incoming file into place when the
+        vault does not have the object yet."""
+        object_path = self._object_path(sha256)
+        with self._lock:
+            if sha256 not in self._object_refs:
+                object_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(incoming_path, object_path)
+            self._object_refs[sha256] = self._object_refs.get(sha256, 0) + 1
+        return object_path
 
-        shutil.copyfile(file_location, target_location)
+    def delete(self, vault_id):
+        with self._lock:
+            file_to_delete = self.files[vault_id]
+            for entry_id in list(self._by_vault_id[vault_id]):
+                self.delete_entry(entry_id)
+        return True, file_to_delete
 
-        with target_location.open("rb") as f_to_read:
-            file_hash = hashlib.md5()
-            while chunk := f_to_read.read(8192):
-                file_hash.update(chunk)
+    def open_file(self, vault_id: str) -> VaultFileView:
+        """Returns a read-only, memory-mapped view of the vault file. Close it once done."""
+        return _open_view(self, vault_id)
 
-        vault_id = file_hash.hexdigest()
+    def iter_chunks(self, vault_id: str, chunk_size: int = COPY_BUFFER_SIZE) -> Iterator[memoryview]:
+        """Yields the vault file as memoryview chunks of a memory mapping, each valid until the next one is requested.
+        The mapping is closed when the iteration ends."""
+        return _iter_view(self, vault_id, chunk_size)
 
-        self.files[vault_id] = {
-            "file_name": file_name,
-            "metadata": metadata,
-            "path": target_location,
-            "hash": vault_id,
-            "vault_id": vault_id,
-            "container": container,
-        }
+    def get_vault_tmp_dir(self) -> pathlib.Path:
+        path = self.root.name / Path("tmpdir")
+        path.mkdir(exist_ok=True)
+        return path
 
-        return True, "Success", vault_id
+
+class VaultOverlay:
+    """Copy-on-write view on top of a base VirtualVault.
+
+    Files of the base vault are visible through the overlay without being copied. Files added to the overlay go
+    into its own VirtualVault, which is only created on the first add, and deleting a base file only hides it from
+    the overlay. Entries of the base vault are returned as copies, so changing their metadata does not leak into the
+    base vault. discard() drops everything the overlay holds and leaves the base vault untouched.
+    """
+
+    def __init__(self, base: VirtualVault) -> None:
+        self.base = base
+        self.link_mode = base.link_mode
+        self._own: Optional[VirtualVault] = None
+        self._hidden: Dict[int, None] = {}
+        self.open_files = OpenVaultFiles()
+
+    @property
+    def own(self) -> VirtualVault:
+        if self._own is None:
+            self._own = VirtualVault(link_mode=self.link_mode)
+            # keep entry IDs unique across base and overlay
+            self._own._next_entry_id = self.base._next_entry_id
+        return self._own
+
+    @property
+    def root(self):
+        return self.own.root
+
+    @property
+    def entries(self) -> Dict[int, Dict]:
+        return {entry["id"]: entry for entry in self.find()}
+
+    @property
+    def files(self) -> Dict[str, Dict]:
+        files: Dict[str, Dict] = {}
+        for entry in self.find():
+            files[entry["vault_id"]] = entry
+        return files
+
+    def isempty(self):
+        if self._own is not None and not self._own.isempty():
+            return False
+        return len(self.base.entries) <= len(self._hidden)
+
+    def _visible_base_entry(self, entry: dict) -> dict:
+        return {**entry, "metadata": dict(entry["metadata"])}
+
+    def add(
+        self,
+        container: Union[dict, int],
+        file_location: str,
+        file_name: str,
+        metadata: dict,
+        trace: bool = False,
+    ):
+        return self.own.add(container, file_location, file_name, metadata, trace=trace)
+
+    def add_contents(
+        self,
+        container: Union[dict, int],
+        contents: AttachmentContents,
+        file_name: Optional[str],
+        metadata: dict,
+    ) -> Tuple[bool, str, str]:
+        return self.own.add_contents(container, contents, file_name, metadata)
+
+    def find(
+        self,
+        vault_id: Optional[str] = None,
+        file_name: Optional[str] = None,
+        container_id: Optional[Union[int, str]] = None,
+        file_hash: Optional[str] = None,
+    ) -> List[dict]:
+        found = [
+            self._visible_base_entry(entry)
+            for entry in self.base.find(vault_id, file_name, container_id, file_hash)
+            if entry["id"] not in self._hidden
+        ]
+        if self._own is not None:
+            found.extend(self._own.find(vault_id, file_name, container_id, file_hash))
+        return found
+
+    def delete_entry(self, entry_id: int) -> dict:
+        if self._own is not None and entry_id in self._own.entries:
+            return self._own.delete_entry(entry_id)
+        if entry_id in self._hidden or entry_id not in self.base.entries:
+            raise KeyError(entry_id)
+        self._hidden[entry_id] = None
+        return self._visible_base_entry(self.base.entries[entry_id])
 
     def delete(self, vault_id):
-        file_to_delete = self.files[vault_id]
-        del self.files[vault_id]
-        return True, file_to_delete
+        entries = self.find(vault_id=vault_id)
+        if not entries:
+            raise KeyError(vault_id)
+        for entry in entries:
+            self.delete_entry(entry["id"])
+        return True, entries[-1]
+
+    def materialize(self, entry_id: int) -> dict:
+        """Replaces a base file with a private copy in the overlay, for tests that need to modify the file itself.
+
+        Returns:
+            dict: the overlay entry replacing the base entry
+        """
+        entry = self.base.entries[entry_id]
+        self.delete_entry(entry_id)
+        metadata = {k: v for k, v in entry["metadata"].items() if k not in ("md5", "sha256", "size")}
+        own = self.own
+        own.link_mode = "copy"
+        try:
+            own.add(entry["container"], str(entry["path"]), entry["file_name"], metadata)
+        finally:
+            own.link_mode = self.link_mode
+        return next(reversed(own.entries.values()))
+
+    def open_file(self, vault_id: str) -> VaultFileView:
+        return _open_view(self, vault_id)
+
+    def iter_chunks(self, vault_id: str, chunk_size: int = COPY_BUFFER_SIZE) -> Iterator[memoryview]:
+        return _iter_view(self, vault_id, chunk_size)
 
     def get_vault_tmp_dir(self) -> pathlib.Path:
-        path = self.root.name / Path("tmpdir")
-        path.mkdir(exist_ok=True)
-        return path
+        return self.own.get_vault_tmp_dir()
+
+    def discard(self):
+        """Drops all files and deletions held by the overlay."""
+        if self._own is not None:
+            self._own.root.cleanup()
+            self._own = None
+        self._hidden = {}
+
+
+def _hash_file(path: Union[str, pathlib.Path]) -> Tuple[str, str, int]:
+    sha256 = hashlib.sha256()
+    md5 = hashlib.md5()
+    size = 0
+    with open(path, "rb") as file_to_read:
+        while chunk := file_to_read.read(COPY_BUFFER_SIZE):
+            sha256.update(chunk)
+            md5.update(chunk)
+            size += len(chunk)
+    return sha256.hexdigest(), md5.hexdigest(), size
+
+
+def _iter_chunks(contents: AttachmentContents) -> Iterator[BytesChunk]:
+    """Yields contents as bytes chunks. Text is encoded as UTF-8."""
+    if isinstance(contents, (bytes, bytearray, memoryview)):
+        yield contents
+    elif isinstance(contents, str):
+        yield contents.encode("utf-8")
+    elif callable(read := getattr(contents, "read", None)):
+        while chunk := read(COPY_BUFFER_SIZE):
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+    else:
+        for chunk in contents:
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+def _write_and_hash(chunks: Iterable[BytesChunk], target_file: IO[bytes]) -> Tuple[str, str, int]:
+    sha256 = hashlib.sha256()
+    md5 = hashlib.md5()
+    size = 0
+    for chunk in chunks:
+        sha256.update(chunk)
+        md5.update(chunk)
+        target_file.write(chunk)
+        size += len(chunk)
+    return sha256.hexdigest(), md5.hexdigest(), size
+
+
+def _copy_and_hash(source: Union[str, pathlib.Path], target: Union[str, pathlib.Path]) -> Tuple[str, str, int]:
+    sha256 = hashlib.sha256()
+    md5 = hashlib.md5()
+    size = 0
+    buffer = bytearray(COPY_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(source, "rb") as source_file, open(target, "wb") as target_file:
+        while read := source_file.readinto(buffer):
+            chunk = view[:read]
+            sha256.update(chunk)
+            md5.update(chunk)
+            target_file.write(chunk)
+            size += read
+    return sha256.hexdigest(), md5.hexdigest(), size
 
 
 def get_vault_tmp_dir():
     return str(Vault._vault.get_vault_tmp_dir())
 
 
+def vault_open(vault_id: str) -> VaultFileView:
+    """Returns a read-only, memory-mapped view of a vault file, for zero-copy access to large files. Not part of the
+    platform API."""
+    return Vault._vault.open_file(vault_id)
+
+
+def vault_iter_chunks(vault_id: str, chunk_size: int = COPY_BUFFER_SIZE) -> Iterator[memoryview]:
+    """Iterates over a vault file in memory-mapped chunks. Not part of the platform API."""
+    return Vault._vault.iter_chunks(vault_id, chunk_size)
+
+
 class VaultAPI:
     """VaultAPI is the class encapsulating the App Vault API"""
 
     def __init__(self) -> None:
         self._vault = VirtualVault()
 
-    def create_attachment(self, file_contents: str, container_id: int, file_name: str, metadata: dict):
-
-        tmp_file = self._vault.get_vault_tmp_dir() / "tmpfile"
-        tmp_file.touch(exist_ok=True)
-        tmp_file.write_text(file_contents)
+    @platform_api("create_attachment", method=False)
+    def create_attachment(
+        self,
+        file_contents: AttachmentContents,
+        container_id: int,
+        file_name: Optional[str] = None,
+        metadata: Optional[dict] = None,
+    ) -> dict:
+        """Creates a vault file from file_contents: text (stored UTF-8 encoded), bytes, a binary or text file-like
+        object or an iterable of chunks. The contents are streamed into the vault, so large payloads are written once.
 
-        self._vault.add(container=container_id, file_location=str(tmp_file), file_name=file_name, metadata=metadata)
+        Returns:
+            dict: succeeded, message and hash (the vault ID) of the new file
+        """
+        _, message, vault_id = self._vault.add_contents(container_id, file_contents, file_name, metadata or {})
+        return {"succeeded": True, "message": message, "hash": vault_id}
 
 
 # Vault API
@@ -90,6 +742,7 @@ Vault: VaultAPI = VaultAPI()
 # Rules API https://docs.splunk.com/Documentation/SOAR/current/PlaybookAPI/VaultAPI
 
 
+@platform_api("vault_add", method=False)
 def vault_add(
     container: Union[dict, int],
     file_location: str,
@@ -118,30 +771,59 @@ def vault_add(
     return Vault._vault.add(container, file_location, file_name, metadata, trace=trace)
 
 
-def vault_delete(vault_id: str, file_name: str, container_id: int, remove_all: bool, trace: bool):
-    print(f"file_name={file_name} container_id={container_id} remove_all={remove_all} trace={trace}")
+@platform_api("vault_delete", method=False)
+def vault_delete(
+    vault_id: Optional[str] = None,
+    file_name: Optional[str] = None,
+    container_id: Optional[int] = None,
+    remove_all: bool = False,
+    trace: bool = False,
+):
+    """
+    Deletes the files matching all given filters. As on the platform, deleting more than one
+    file requires remove_all=True.
+    """
+    if vault_id is None and file_name is None and container_id is None:
+        return {"success": False, "message": "vault_id, file_name or container_id is required", "deleted_files": []}
+
+    matches = Vault._vault.find(vault_id=vault_id, file_name=file_name, container_id=container_id)
 
-    success, deleted_file = Vault._vault.delete(vault_id)
+    if not matches:
+        return {"success": False, "message": "file not found in vault", "deleted_files": []}
+
+    if len(matches) > 1 and not remove_all:
+        return {
+            "success": False,
+            "message": "more than one file matched, set remove_all to delete all of them",
+            "deleted_files": [],
+        }
+
+    deleted_files = [Vault._vault.delete_entry(entry["id"]) for entry in matches]
 
     return {
-        "success": success,
+        "success": True,
         "message": "deleted from vault",
-        "deleted_files": [deleted_file],
+        "deleted_files": deleted_files,
     }
 
 
-def vault_info(vault_id, file_name=None, container_id=None, trace=False):
-    print(f"file_name={file_name} container_id={container_id} trace={trace}")
-
+@platform_api("vault_info", method=False)
+def vault_info(vault_id=None, file_name=None, container_id=None, trace=False):
+    """
+    Returns the files matching all given filters as a list, like the platform does.
+    """
     if Vault._vault.isempty():
         raise Exception("Cannot get file info from uninitialized Vault")
 
-    file = Vault._vault.files.get(vault_id)
+    if vault_id is None and file_name is None and container_id is None:
+        return False, "vault_id, file_name or container_id is required", []
+
+    files = Vault._vault.find(vault_id=vault_id, file_name=file_name, container_id=container_id)
 
-    if not file:
+    if not files:
         return False, "file not found in vault", []
 
     success = True
     message = "successfully retrieved file from vault"
 
-    return success, message, file
+    return success, message, files
@@ -0,0 +1,228 @@
+import functools
+import inspect
+import json
+import math
+import pathlib
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from .models import InputJSON
+
+# Connector methods whose time is reported separately
+PHASES = ("initialize", "handle_action", "finalize")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Returns the pct-th percentile of values using linear interpolation between the closest ranks."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+@dataclass
+class BenchmarkResult:
+    """Timings of the measured rounds of a benchmark. Every round is one _handle_action call."""
+
+    name: str
+    latencies: List[float] = field(default_factory=list)
+    phase_times: Dict[str, List[float]] = field(default_factory=lambda: {phase: [] for phase in PHASES})
+    baseline: Optional[dict] = None
+
+    @property
+    def rounds(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def min(self) -> float:
+        return min(self.latencies)
+
+    @property
+    def mean(self) -> float:
+        return statistics.mean(self.latencies)
+
+    @property
+    def p50(self) -> float:
+        return percentile(self.latencies, 50)
+
+    @property
+    def p99(self) -> float:
+        return percentile(self.latencies, 99)
+
+    @property
+    def actions_per_second(self) -> float:
+        total = sum(self.latencies)
+        return self.rounds / total if total else math.inf
+
+    def phase_mean(self, phase: str) -> float:
+        return statistics.mean(self.phase_times[phase]) if self.phase_times[phase] else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "rounds": self.rounds,
+            "min": self.min,
+            "mean": self.mean,
+            "p50": self.p50,
+            "p99": self.p99,
+            "actions_per_second": self.actions_per_second,
+            "phases": {phase: self.phase_mean(phase) for phase in PHASES},
+        }
+
+    def to_raw(self) -> dict:
+        """Returns the measurements as plain data, e.g. to send them from a pytest-xdist worker to the controller."""
+        return {"name": self.name, "latencies": self.latencies, "phase_times": self.phase_times, "baseline": self.baseline}
+
+    @classmethod
+    def from_raw(cls, raw: dict) -> "BenchmarkResult":
+        return cls(raw["name"], list(raw["latencies"]), dict(raw["phase_times"]), raw["baseline"])
+
+    def regression(self, threshold: float) -> Optional[str]:
+        """Returns a description of the regression against the baseline, if p50 got slower by more than threshold."""
+        if not self.baseline or not self.baseline.get("p50"):
+            return None
+        limit = self.baseline["p50"] * (1 + threshold)
+        if self.p50 <= limit:
+            return None
+        return (
+            f"{self.name}: p50 latency {self.p50 * 1000:.3f} ms exceeds baseline "
+            f"{self.baseline['p50'] * 1000:.3f} ms by more than {threshold:.0%}"
+        )
+
+
+def shorten_name(name: str, width: int = 50) -> str:
+    """Shortens a benchmark name to width characters by cutting out its middle. The test function part of a node ID
+    (after the last "::") is kept whole when it fits."""
+    if len(name) <= width:
+        return name
+    _, separator, test_name = name.rpartition("::")
+    tail = len(separator + test_name)
+    if not separator or tail > width - 4:
+        tail = (width - 3) // 2
+    return f"{name[:width - 3 - tail]}...{name[-tail:]}"
+
+
+def _timed(method: Callable, times: List[float]) -> Callable:
+    if inspect.iscoroutinefunction(method):
+
+        @functools.wraps(method)
+        async def timed_coroutine(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                times.append(time.perf_counter() - started)
+
+        return timed_coroutine
+
+    @functools.wraps(method)
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            times.append(time.perf_counter() - started)
+
+    return timed
+
+
+def run_benchmark(
+    connector_factory: Callable[[], Any],
+    in_json: Union[InputJSON, str],
+    name: str,
+    rounds: int = 20,
+    warmup: int = 3,
+) -> BenchmarkResult:
+    """Runs _handle_action of a fresh connector warmup + rounds times and measures the last rounds.
+
+    Args:
+        connector_factory (Callable[[], Any]): returns a configured connector, e.g. a connector class or the result
+            of configure_connector
+        in_json (Union[InputJSON, str]): input of every run
+        name (str): benchmark name
+        rounds (int, optional): measured rounds. Defaults to 20.
+        warmup (int, optional): rounds run before measuring. Defaults to 3.
+
+    Returns:
+        BenchmarkResult: timings of the measured rounds
+    """
+    if rounds < 1:
+        raise ValueError("rounds must be at least 1")
+    if not isinstance(in_json, str):
+        in_json = json.dumps(in_json)
+
+    result = BenchmarkResult(name)
+    for round_index in range(warmup + rounds):
+        connector = connector_factory()
+        phase_times: Dict[str, List[float]] = {phase: [] for phase in PHASES}
+        for phase in PHASES:
+            setattr(connector, phase, _timed(getattr(connector, phase), phase_times[phase]))
+
+        started = time.perf_counter()
+        connector._handle_action(in_json, None)  # pylint: disable=protected-access
+        elapsed = time.perf_counter() - started
+
+        if round_index >= warmup:
+            result.latencies.append(elapsed)
+            for phase in PHASES:
+                result.phase_times[phase].append(sum(phase_times[phase]))
+    return result
+
+
+class BenchmarkSession:
+    """Collects the benchmark results of a test session and compares them with a baseline file."""
+
+    def __init__(self, baseline_path: pathlib.Path, threshold: float, save: bool):
+        self.baseline_path = baseline_path
+        self.threshold = threshold
+        self.save = save
+        self.results: Dict[str, BenchmarkResult] = {}
+        self._baseline: Optional[Dict[str, dict]] = None
+
+    @property
+    def baseline(self) -> Dict[str, dict]:
+        if self._baseline is None:
+            try:
+                self._baseline = json.loads(self.baseline_path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                self._baseline = {}
+        return self._baseline
+
+    def record(self, result: BenchmarkResult) -> Optional[str]:
+        """Stores the result and returns a regression message if it is slower than the baseline."""
+        result.baseline = self.baseline.get(result.name)
+        self.results[result.name] = result
+        if self.save:
+            return None
+        return result.regression(self.threshold)
+
+    def add_results(self, results: List[BenchmarkResult]):
+        """Adds results measured by another process, e.g. a pytest-xdist worker."""
+        for result in results:
+            self.results[result.name] = result
+
+    def save_baseline(self):
+        """Merges the results into the baseline file. The file is read again first, so baselines written meanwhile
+        are kept."""
+        self._baseline = None
+        baseline = dict(self.baseline)
+        baseline.update({name: result.as_dict() for name, result in self.results.items()})
+        self.baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True), encoding="utf-8")
+
+    def summary_lines(self) -> List[str]:
+        lines = [
+            f"{'benchmark':<50} {'rounds':>6} {'min ms':>9} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'actions/s':>10} "
+            f"{'init ms':>9} {'handle ms':>9} {'final ms':>9}"
+        ]
+        for name, result in self.results.items():
+            lines.append(
+                f"{shorten_name(name):<50} {result.rounds:>6} {result.min * 1000:>9.3f} {result.mean * 1000:>9.3f} "
+                f"{result.p50 * 1000:>9.3f} {result.p99 * 1000:>9.3f} {result.actions_per_second:>10.1f} "
+                f"{result.phase_mean('initialize') * 1000:>9.3f} {result.phase_mean('handle_action') * 1000:>9.3f} "
+                f"{result.phase_mean('finalize') * 1000:>9.3f}"
+            )
+        return lines
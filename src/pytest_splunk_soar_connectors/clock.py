@@ -0,0 +1,95 @@
+import asyncio
+import contextvars
+import threading
+from typing import Dict, Optional, Tuple
+
+# Lanes are keyed by the thread and task objects rather than their ids, which are reused once they finish
+LaneKey = Tuple[threading.Thread, Optional[asyncio.Task]]
+
+
+def _lane_key() -> LaneKey:
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return threading.current_thread(), task
+
+
+# Clock and time of the lane that last moved in the current context. asyncio tasks copy the context when they are
+# created, so a new task lane starts at the time of the task that created it.
+_forked_from: contextvars.ContextVar[Optional[Tuple["VirtualClock", float]]] = contextvars.ContextVar(
+    "soar_clock_forked_from", default=None
+)
+
+
+class VirtualClock:
+    """Simulated clock that only moves when it is advanced.
+
+    Every thread and asyncio task runs on its own timeline (lane), so work done concurrently by parameter worker
+    threads or async tasks overlaps in simulated time. Task lanes start at the time of the task that created them,
+    other lanes at the time of the thread that created the clock (the root lane). Lanes are joined into the root
+    lane, i.e. the root lane moves to the latest lane, whenever the root lane reads or advances the clock.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self._lock = threading.Lock()
+        self.start = start
+        self._root: LaneKey = (threading.current_thread(), None)
+        self._root_time = start
+        self._lanes: Dict[LaneKey, float] = {}
+
+    def _get(self, key: LaneKey) -> float:
+        if key == self._root:
+            if self._lanes:
+                self._root_time = max(self._root_time, *self._lanes.values())
+                self._lanes.clear()
+            return self._root_time
+        if key not in self._lanes:
+            forked_from = _forked_from.get()
+            start = forked_from[1] if forked_from is not None and forked_from[0] is self else self._root_time
+            self._lanes[key] = max(start, self._root_time)
+        return self._lanes[key]
+
+    def _set(self, key: LaneKey, value: float):
+        if key == self._root:
+            self._root_time = value
+        else:
+            self._lanes[key] = value
+        _forked_from.set((self, value))
+
+    def now(self) -> float:
+        """Returns the simulated time of the calling thread or task."""
+        with self._lock:
+            return self._get(_lane_key())
+
+    def advance(self, seconds: float) -> float:
+        """Moves the time of the calling thread or task forward and returns the new time."""
+        if seconds < 0:
+            raise ValueError("The clock can't go backwards")
+        key = _lane_key()
+        with self._lock:
+            now = self._get(key) + seconds
+            self._set(key, now)
+            return now
+
+    def advance_to(self, timestamp: float) -> float:
+        """Moves the time of the calling thread or task forward to timestamp, if it is not already later."""
+        key = _lane_key()
+        with self._lock:
+            now = max(self._get(key), timestamp)
+            self._set(key, now)
+            return now
+
+    def join(self) -> float:
+        """Moves the root lane to the latest lane and returns its time."""
+        with self._lock:
+            return self._get(self._root)
+
+    def latest(self) -> float:
+        """Returns the time of the lane furthest ahead."""
+        with self._lock:
+            return max([self._root_time, *self._lanes.values()])
+
+    def elapsed(self) -> float:
+        """Returns the simulated time passed since the clock was created, over all lanes."""
+        return self.latest() - self.start
@@ -0,0 +1,198 @@
+"""Replays a corpus of recorded InputJSON files through a connector class on a pool of worker processes.
+
+Usage: soar-corpus my_app.my_connector:MyConnector tests/corpus --output results.jsonl
+"""
+import argparse
+import concurrent.futures
+import importlib
+import json
+import os
+import pathlib
+import sys
+import time
+import traceback
+from typing import IO, Any, Iterable, Iterator, List, Optional, Set, Type
+
+from . import log
+from .benchmark import percentile
+
+DEFAULT_PATTERN = "*.json"
+
+# Connector class of the worker process, imported once by the pool initializer
+_worker_connector_class: Optional[Type[Any]] = None
+_worker_include_output = False
+
+
+def load_connector_class(connector_path: str) -> Type[Any]:
+    """Imports a connector class given as "package.module:ClassName"."""
+    module_name, _, class_name = connector_path.partition(":")
+    if not module_name or not class_name:
+        raise ValueError(f"Connector must be given as module:ClassName, got {connector_path!r}")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def discover_inputs(directory: pathlib.Path, pattern: str = DEFAULT_PATTERN) -> Iterator[pathlib.Path]:
+    """Yields the input files below directory matching pattern, in a stable order, while walking the directory."""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for file_name in sorted(files):
+            path = pathlib.Path(root) / file_name
+            if path.match(pattern):
+                yield path
+
+
+def run_input(connector_class: Type[Any], path: pathlib.Path, include_output: bool = False) -> dict:
+    """Runs one input file through a fresh connector and returns its result record.
+
+    Returns:
+        dict: input path, success flag, latency in seconds, action result statuses, the error if the run raised and
+            the action results if include_output is set
+    """
+    record: dict = {"input": str(path)}
+    started = time.perf_counter()
+    try:
+        in_json = path.read_text(encoding="utf-8")
+        connector = connector_class()
+        config = json.loads(in_json).get("config")
+        if config:
+            connector.config = config
+        output = connector._handle_action(in_json, None)  # pylint: disable=protected-access
+        statuses = [bool(action_result.get_status()) for action_result in connector.get_action_results()]
+        record.update(success=all(statuses), statuses=statuses)
+        if include_output:
+            record["output"] = json.loads(output)
+    except Exception as error:  # pylint: disable=broad-except
+        record.update(success=False, error=f"{type(error).__name__}: {error}", traceback=traceback.format_exc())
+    record["latency"] = time.perf_counter() - started
+    return record
+
+
+def _init_worker(connector_path: str, sys_path: List[str], include_output: bool, log_mode: str):
+    global _worker_connector_class, _worker_include_output  # pylint: disable=global-statement
+    sys.path[:0] = [entry for entry in sys_path if entry not in sys.path]
+    log.set_default_log_mode(log_mode)
+    _worker_connector_class = load_connector_class(connector_path)
+    _worker_include_output = include_output
+
+
+def _run_in_worker(path: pathlib.Path) -> dict:
+    if _worker_connector_class is None:
+        raise RuntimeError("corpus worker was not initialized")
+    return run_input(_worker_connector_class, path, _worker_include_output)
+
+
+class CorpusStats:
+    """Running totals of a corpus run. Only latencies are kept, not the results."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.failures = 0
+        self.started = time.perf_counter()
+
+    def record(self, result: dict):
+        self.latencies.append(result["latency"])
+        if not result["success"]:
+            self.failures += 1
+
+    @property
+    def count(self) -> int:
+        return len(self.latencies)
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        return (
+            f"{self.count} inputs, {self.failures} failed in {elapsed:.2f}s "
+            f"({self.count / elapsed if elapsed else 0:.1f} inputs/s), latency p50 "
+            f"{percentile(self.latencies, 50) * 1000:.1f} ms, p99 {percentile(self.latencies, 99) * 1000:.1f} ms"
+        )
+
+
+def run_corpus(
+    connector_path: str,
+    inputs: Iterable[pathlib.Path],
+    out: IO[str],
+    workers: int = 0,
+    max_in_flight: Optional[int] = None,
+    include_output: bool = False,
+    log_mode: str = "capture",
+) -> CorpusStats:
+    """Runs every input through the connector and writes one JSON line per input to out, in completion order.
+
+    Args:
+        connector_path (str): connector class as "package.module:ClassName"
+        inputs (Iterable[pathlib.Path]): input files, consumed lazily
+        out (IO[str]): text stream the JSONL results are written to
+        workers (int, optional): number of worker processes, 0 runs the inputs in the current process. Defaults to 0.
+        max_in_flight (Optional[int], optional): inputs submitted to the pool at a time. Defaults to 4 per worker.
+        include_output (bool, optional): add the action results to the result records. Defaults to False.
+        log_mode (str, optional): log mode of the connectors. Defaults to "capture", which keeps the output quiet.
+
+    Returns:
+        CorpusStats: number of inputs, failures and latencies
+    """
+    stats = CorpusStats()
+
+    def write(result: dict):
+        stats.record(result)
+        out.write(json.dumps(result) + "\n")
+
+    if workers <= 0:
+        connector_class = load_connector_class(connector_path)
+        previous_log_mode = log.get_default_log_mode()
+        log.set_default_log_mode(log_mode)
+        try:
+            for path in inputs:
+                write(run_input(connector_class, path, include_output))
+        finally:
+            log.set_default_log_mode(previous_log_mode)
+        return stats
+
+    max_in_flight = max_in_flight or workers * 4
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(connector_path, list(sys.path), include_output, log_mode),
+    ) as executor:
+        in_flight: Set[concurrent.futures.Future] = set()
+        for path in inputs:
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    write(future.result())
+            in_flight.add(executor.submit(_run_in_worker, path))
+        for future in concurrent.futures.as_completed(in_flight):
+            write(future.result())
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="soar-corpus", description=__doc__.splitlines()[0])
+    parser.add_argument("connector", help="connector class as package.module:ClassName")
+    parser.add_argument("corpus", type=pathlib.Path, help="directory holding the InputJSON files")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file the results are written to. Default: stdout")
+    parser.add_argument("-p", "--pattern", default=DEFAULT_PATTERN, help=f"input file pattern. Default: {DEFAULT_PATTERN}")
+    parser.add_argument(
+        "-w", "--workers", type=int, default=os.cpu_count() or 1, help="worker processes, 0 runs in this process"
+    )
+    parser.add_argument("--max-in-flight", type=int, default=None, help="inputs queued at a time. Default: 4 per worker")
+    parser.add_argument("--include-output", action="store_true", help="add the action results to the result lines")
+    parser.add_argument("--log-mode", choices=log.LOG_MODES, default="capture", help="connector log mode")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.getcwd())
+    inputs = discover_inputs(args.corpus, args.pattern)
+    if args.output == "-":
+        stats = run_corpus(
+            args.connector, inputs, sys.stdout, args.workers, args.max_in_flight, args.include_output, args.log_mode
+        )
+    else:
+        with open(args.output, "w", encoding="utf-8") as out:
+            stats = run_corpus(
+                args.connector, inputs, out, args.workers, args.max_in_flight, args.include_output, args.log_mode
+            )
+    print(stats.summary(), file=sys.stderr)
+    return 1 if stats.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
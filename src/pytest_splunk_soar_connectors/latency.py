@@ -0,0 +1,177 @@
+import math
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from phantom.instrumentation import CONNECTOR_CALLS, PlatformCall, PlatformHook
+
+from .clock import VirtualClock
+
+
+class LatencyModel:
+    """Base class of latency models. latency returns the response time in seconds of a call handling size items."""
+
+    def latency(self, size: int) -> float:
+        raise NotImplementedError
+
+
+class FixedLatency(LatencyModel):
+    """Every call takes the same time, regardless of its size."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def latency(self, size: int) -> float:
+        return self.seconds
+
+
+class PerItemLatency(LatencyModel):
+    """Every call takes a fixed round-trip time plus a time per item it handles."""
+
+    def __init__(self, base: float, per_item: float):
+        self.base = base
+        self.per_item = per_item
+
+    def latency(self, size: int) -> float:
+        return self.base + self.per_item * size
+
+
+class DistributionLatency(LatencyModel):
+    """The round-trip time is drawn from a distribution, plus an optional time per item.
+
+    Args:
+        sample (Callable[[random.Random], float]): draws a round-trip time, e.g. lambda rng: rng.uniform(0.05, 0.1)
+        per_item (float, optional): time added per item. Defaults to 0.
+        seed (Optional[int], optional): seed of the random generator, for reproducible runs. Defaults to None.
+    """
+
+    def __init__(self, sample: Callable[[random.Random], float], per_item: float = 0.0, seed: Optional[int] = None):
+        self.sample = sample
+        self.per_item = per_item
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def lognormal(
+        cls, median: float, sigma: float = 0.5, per_item: float = 0.0, seed: Optional[int] = None
+    ) -> "DistributionLatency":
+        """Log-normal round-trip times, which have the long tail typical of REST APIs."""
+        mu = math.log(median)
+        return cls(lambda rng: rng.lognormvariate(mu, sigma), per_item=per_item, seed=seed)
+
+    def latency(self, size: int) -> float:
+        with self._lock:
+            sampled = self.sample(self._random)
+        return max(sampled, 0.0) + self.per_item * size
+
+
+class RateLimit:
+    """Limits the calls of one or more APIs to calls_per_second, allowing bursts of up to burst calls.
+
+    Share an instance between APIs to limit them together, like a per-user REST rate limit.
+    """
+
+    def __init__(self, calls_per_second: float, burst: int = 1):
+        if calls_per_second <= 0 or burst < 1:
+            raise ValueError("calls_per_second must be positive and burst at least 1")
+        self.interval = 1.0 / calls_per_second
+        self.tolerance = (burst - 1) * self.interval
+        self._next = -math.inf
+        self._lock = threading.Lock()
+
+    def reserve(self, now: float) -> float:
+        """Reserves a call at time now and returns the time at which the call may start."""
+        with self._lock:
+            start = max(now, self._next - self.tolerance)
+            self._next = max(self._next, start) + self.interval
+            return start
+
+
+# Response times in the order of magnitude of a SOAR instance under moderate load
+DEFAULT_LATENCY_MODELS: Dict[str, LatencyModel] = {
+    "save_artifact": FixedLatency(0.05),
+    "save_artifacts": PerItemLatency(0.05, 0.002),
+    "save_container": FixedLatency(0.08),
+    "save_containers": PerItemLatency(0.08, 0.01),
+    "get_container_info": FixedLatency(0.03),
+    "save_state": FixedLatency(0.01),
+    "vault_add": FixedLatency(0.1),
+    "vault_info": FixedLatency(0.03),
+    "vault_delete": FixedLatency(0.05),
+    "create_attachment": FixedLatency(0.1),
+}
+
+
+class PlatformLatency(PlatformHook):
+    """Emulates the response times of platform APIs.
+
+    By default the time is simulated on a VirtualClock and the tests don't slow down. With virtual=False the calls
+    sleep for real, e.g. to observe timeouts.
+
+    Args:
+        models (Optional[Dict[str, LatencyModel]], optional): latency model per API. Defaults to DEFAULT_LATENCY_MODELS.
+        rate_limits (Optional[Dict[str, RateLimit]], optional): rate limit per API. Defaults to no limits.
+        clock (Optional[VirtualClock], optional): clock the time is simulated on. Defaults to a new clock.
+        virtual (bool, optional): whether to simulate the time instead of sleeping. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        models: Optional[Dict[str, LatencyModel]] = None,
+        rate_limits: Optional[Dict[str, RateLimit]] = None,
+        clock: Optional[VirtualClock] = None,
+        virtual: bool = True,
+    ):
+        self.models = dict(DEFAULT_LATENCY_MODELS if models is None else models)
+        self.rate_limits = dict(rate_limits or {})
+        self.clock = clock or VirtualClock()
+        self.virtual = virtual
+        self.api_times: Dict[str, List[float]] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    def enter(self, call: PlatformCall):
+        if call.api not in CONNECTOR_CALLS:
+            self._local.depth = getattr(self._local, "depth", 0) + 1
+
+    def exit(self, call: PlatformCall):
+        if call.api in CONNECTOR_CALLS:
+            return
+        self._local.depth -= 1
+        model = self.models.get(call.api)
+        rate_limit = self.rate_limits.get(call.api)
+        if self._local.depth or (model is None and rate_limit is None):
+            return
+
+        latency = model.latency(call.size) if model is not None else 0.0
+        if self.virtual:
+            now = self.clock.now()
+            start = rate_limit.reserve(now) if rate_limit is not None else now
+            self.clock.advance_to(start + latency)
+            waited = start - now + latency
+        else:
+            now = time.perf_counter()
+            start = rate_limit.reserve(now) if rate_limit is not None else now
+            waited = start - now + latency
+            time.sleep(waited)
+
+        with self._lock:
+            api_time = self.api_times.setdefault(call.api, [0, 0.0])
+            api_time[0] += 1
+            api_time[1] += waited
+
+    @property
+    def wall_time(self) -> float:
+        """Simulated wall time (real time with virtual=False) since the emulation started, over all threads."""
+        if self.virtual:
+            return self.clock.elapsed()
+        return time.perf_counter() - self._started
+
+    def summary_lines(self) -> List[str]:
+        lines = [f"{'calls':>8} {'seconds':>10}  api"]
+        for api, (count, seconds) in sorted(self.api_times.items(), key=lambda item: item[1][1], reverse=True):
+            lines.append(f"{count:>8} {seconds:>10.3f}  {api}")
+        lines.append(f"simulated wall time: {self.wall_time:.3f}s")
+        return lines
@@ -0,0 +1,238 @@
+import atexit
+import contextlib
+import logging
+import os
+import queue
+import threading
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener
+from typing import Deque, List, Optional, Tuple
+
+from rich.logging import RichHandler
+
+# Name of the logger shared by all connectors
+CONNECTOR_LOGGER_NAME = "phantom.base_connector"
+
+# console: file and console handlers run synchronously in the logging thread
+# queue: file and console handlers run on a background listener thread
+# capture: records are only kept in a bounded in-memory ring buffer
+LOG_MODES = ("console", "queue", "capture")
+
+DEFAULT_CAPTURE_CAPACITY = 10000
+
+# Log file connectors append to unless they are given another one
+DEFAULT_LOG_PATH = "debug_log.log"
+
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the most recent log records in a bounded ring buffer. Messages are only formatted when the records are
+    read as dictionaries, so arguments are formatted as they are at that time, not at the logging call."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPTURE_CAPACITY):
+        super().__init__()
+        self.records: Deque[logging.LogRecord] = deque(maxlen=capacity)
+
+    def emit(self, record: logging.LogRecord):
+        self.records.append(record)
+
+    def get_records(self) -> List[dict]:
+        return [
+            {
+                "logger": record.name,
+                "level": record.levelname,
+                "message": record.getMessage(),
+                "created": record.created,
+                "thread": record.threadName,
+            }
+            for record in list(self.records)
+        ]
+
+    def clear(self):
+        self.records.clear()
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that enqueues records as they are. The stock handler formats each record on the logging thread
+    before enqueueing it, here messages, arguments like LazyPrettyFormat and tracebacks are only formatted by the
+    handlers on the listener thread. Arguments are formatted as they are at that time, not at the logging call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+# mode, log path, console output, capture capacity and log file suffix the installed handlers were set up with
+_SetupKey = Tuple[str, Optional[str], bool, int, Optional[str]]
+
+
+class _LoggingSetup:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.default_mode = "console"
+        self.capacity = DEFAULT_CAPTURE_CAPACITY
+        self.key: Optional[_SetupKey] = None
+        # handlers attached to the connector logger and all handlers owned by the current setup
+        self.attached: List[logging.Handler] = []
+        self.owned: List[logging.Handler] = []
+        self.listener: Optional[QueueListener] = None
+        self.ring_buffer: Optional[RingBufferHandler] = None
+        # inserted before the extension of log file names, e.g. the pytest-xdist worker ID
+        self.log_file_suffix: Optional[str] = None
+
+
+_setup = _LoggingSetup()
+
+
+def set_default_log_mode(mode: str, capacity: Optional[int] = None):
+    """Sets the mode used by connectors that don't ask for a specific one.
+
+    Args:
+        mode (str): one of LOG_MODES
+        capacity (Optional[int], optional): ring buffer size of the capture mode
+    """
+    if mode not in LOG_MODES:
+        raise ValueError(f"log mode must be one of {LOG_MODES}")
+    with _setup.lock:
+        _setup.default_mode = mode
+        if capacity is not None:
+            _setup.capacity = capacity
+
+
+def get_default_log_mode() -> str:
+    return _setup.default_mode
+
+
+def set_log_file_suffix(suffix: Optional[str]):
+    """Makes connectors write to the default log file with suffix inserted before the extension, e.g.
+    debug_log.gw0.log, so processes running side by side don't write to the same file. Log paths passed to
+    configure_logging explicitly are used as they are.
+
+    Args:
+        suffix (Optional[str]): suffix, None to use the log file names as they are
+    """
+    with _setup.lock:
+        _setup.log_file_suffix = suffix
+
+
+def _log_file_path(log_path: str) -> str:
+    if not _setup.log_file_suffix or log_path != DEFAULT_LOG_PATH:
+        return log_path
+    root, extension = os.path.splitext(log_path)
+    return f"{root}.{_setup.log_file_suffix}{extension}"
+
+
+def _remove_handlers(logger: logging.Logger):
+    if _setup.listener is not None:
+        _setup.listener.stop()
+        _setup.listener = None
+    for handler in _setup.attached:
+        logger.removeHandler(handler)
+    for handler in _setup.owned:
+        handler.close()
+    _setup.attached = []
+    _setup.owned = []
+    _setup.ring_buffer = None
+    _setup.key = None
+
+
+def configure_logging(
+    log_path: Optional[str] = DEFAULT_LOG_PATH, log_to_console: bool = True, mode: Optional[str] = None
+) -> logging.Logger:
+    """Returns the connector logger, installing its handlers once per process. Calling it again with the same
+    settings does not add handlers, calling it with different settings replaces them.
+
+    Args:
+        log_path (Optional[str], optional): file to append log records to. Defaults to "debug_log.log".
+        log_to_console (bool, optional): whether to render log records to the console. Defaults to True.
+        mode (Optional[str], optional): one of LOG_MODES. Defaults to the mode set with set_default_log_mode.
+
+    Returns:
+        logging.Logger: connector logger
+    """
+    logger = logging.getLogger(CONNECTOR_LOGGER_NAME)
+    with _setup.lock:
+        mode = mode or _setup.default_mode
+        if mode not in LOG_MODES:
+            raise ValueError(f"log mode must be one of {LOG_MODES}")
+        key: _SetupKey
+        if mode == "capture":
+            # nothing is written in capture mode, so the output settings don't matter
+            key = (mode, None, False, _setup.capacity, None)
+        else:
+            key = (mode, log_path, log_to_console, _setup.capacity, _setup.log_file_suffix)
+        if _setup.key == key:
+            return logger
+        _remove_handlers(logger)
+
+        if mode == "capture":
+            _setup.ring_buffer = RingBufferHandler(_setup.capacity)
+            _setup.owned = [_setup.ring_buffer]
+            _setup.attached = [_setup.ring_buffer]
+        else:
+            if log_path:
+                file_handler = logging.FileHandler(_log_file_path(log_path), mode="a", delay=True)
+                file_handler.setFormatter(logging.Formatter("%(message)s", datefmt="[%X]"))
+                _setup.owned.append(file_handler)
+            if log_to_console:
+                _setup.owned.append(RichHandler())
+
+            if mode == "queue":
+                record_queue: "queue.Queue[logging.LogRecord]" = queue.Queue()
+                _setup.listener = QueueListener(record_queue, *_setup.owned)
+                _setup.listener.start()
+                _setup.attached = [DeferredQueueHandler(record_queue)]
+            else:
+                _setup.attached = list(_setup.owned)
+
+        for handler in _setup.attached:
+            logger.addHandler(handler)
+        _setup.key = key
+    return logger
+
+
+def flush_logging():
+    """Waits until the background listener of the queue mode rendered all pending records."""
+    listener = _setup.listener
+    if listener is not None:
+        listener.queue.join()
+
+
+def get_captured_records() -> List[dict]:
+    """Returns the records kept by the capture mode, oldest first."""
+    ring_buffer = _setup.ring_buffer
+    return ring_buffer.get_records() if ring_buffer else []
+
+
+def clear_captured_records():
+    ring_buffer = _setup.ring_buffer
+    if ring_buffer:
+        ring_buffer.clear()
+
+
+@contextlib.contextmanager
+def capture_logs():
+    """Switches to capture mode, also for connectors created meanwhile, yielding a function that lists the captured
+    records. The previous setup is restored afterwards."""
+    previous_key = _setup.key
+    previous_mode = _setup.default_mode
+    set_default_log_mode("capture")
+    configure_logging(mode="capture")
+    clear_captured_records()
+    try:
+        yield get_captured_records
+    finally:
+        set_default_log_mode(previous_mode)
+        if previous_key:
+            mode, log_path, log_to_console, *_ = previous_key
+            configure_logging(log_path=log_path, log_to_console=log_to_console, mode=mode)
+        else:
+            shutdown_logging()
+
+
+def shutdown_logging():
+    """Stops the background listener and removes the installed handlers."""
+    with _setup.lock:
+        _remove_handlers(logging.getLogger(CONNECTOR_LOGGER_NAME))
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,115 @@
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+from phantom.instrumentation import CONNECTOR_CALLS, PlatformCall, PlatformHook
+
+# Single item platform APIs and the batch API that should be used instead when they are called in a loop
+BATCHABLE_APIS = {
+    "save_artifact": "save_artifacts",
+    "save_container": "save_containers",
+}
+
+_BATCH_APIS = frozenset(BATCHABLE_APIS.values())
+
+
+class PlatformCallRecord(NamedTuple):
+    api: str
+    action: str
+    size: int
+
+
+class PlatformCallRecorder(PlatformHook):
+    """Records every platform API call made by connector actions together with its batch size.
+
+    Platform APIs calling other platform APIs are recorded once, as the outermost call.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.calls: List[PlatformCallRecord] = []
+
+    def enter(self, call: PlatformCall):
+        if call.api in CONNECTOR_CALLS:
+            return
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        if depth == 0:
+            record = PlatformCallRecord(call.api, _action_of(call.connector), call.size)
+            with self._lock:
+                self.calls.append(record)
+
+    def exit(self, call: PlatformCall):
+        if call.api not in CONNECTOR_CALLS:
+            self._local.depth -= 1
+
+    def clear(self):
+        with self._lock:
+            self.calls = []
+
+    def records(self, api: Optional[str] = None, action: Optional[str] = None) -> List[PlatformCallRecord]:
+        with self._lock:
+            calls = list(self.calls)
+        return [
+            call for call in calls if (api is None or call.api == api) and (action is None or call.action == action)
+        ]
+
+    def count(self, api: Optional[str] = None, action: Optional[str] = None) -> int:
+        """Returns the number of recorded calls, optionally only of one API and/or one action."""
+        return len(self.records(api, action))
+
+    def batch_sizes(self, api: str, action: Optional[str] = None) -> List[int]:
+        """Returns the number of items handed to each call of api, in call order."""
+        return [call.size for call in self.records(api, action)]
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Returns {action: {api: {"calls": number of calls, "items": number of items}}}."""
+        summary: Dict[str, Dict[str, Dict[str, int]]] = {}
+        for call in self.records():
+            api_summary = summary.setdefault(call.action, {}).setdefault(call.api, {"calls": 0, "items": 0})
+            api_summary["calls"] += 1
+            api_summary["items"] += call.size
+        return summary
+
+    def unbatched_calls(self, action: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        """Returns the number of calls handing a single item to a batchable API as {action: {batch api: count}}.
+
+        Both the single item APIs (save_artifact) and batch APIs called with one item (save_artifacts([artifact]))
+        are counted, under the name of the batch API.
+        """
+        unbatched: Dict[str, Dict[str, int]] = {}
+        for call in self.records(action=action):
+            batch_api = BATCHABLE_APIS.get(call.api)
+            if batch_api is None and call.api in _BATCH_APIS and call.size <= 1:
+                batch_api = call.api
+            if batch_api:
+                action_calls = unbatched.setdefault(call.action, {})
+                action_calls[batch_api] = action_calls.get(batch_api, 0) + 1
+        return unbatched
+
+    def batching_violations(self, max_single_calls: int = 0, action: Optional[str] = None) -> List[str]:
+        """Describes every action making more than max_single_calls single item calls to a batchable API."""
+        violations = []
+        for action_name, action_calls in self.unbatched_calls(action).items():
+            for batch_api, count in action_calls.items():
+                if count > max_single_calls:
+                    violations.append(
+                        f"action '{action_name}' made {count} single item calls that could be batched with "
+                        f"{batch_api} (allowed: {max_single_calls})"
+                    )
+        return violations
+
+    def assert_calls(self, api: str, expected: int, action: Optional[str] = None):
+        count = self.count(api, action)
+        assert count == expected, f"expected {expected} {api} calls, got {count}"
+
+    def assert_batched(self, max_single_calls: int = 0, action: Optional[str] = None):
+        """Fails if an action made more than max_single_calls single item calls that could have been batched."""
+        violations = self.batching_violations(max_single_calls, action)
+        assert not violations, "\n".join(violations)
+
+
+def _action_of(connector) -> str:
+    if connector is None:
+        return ""
+    return getattr(connector, "action_identifier", "") or ""
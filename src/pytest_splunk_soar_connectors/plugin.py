@@ -1,5 +1,381 @@
-import pytest
+import asyncio
+import contextlib
+import json
 import logging
+import pathlib
+import warnings
+from typing import Dict, List, Optional, Union
+
+import pytest
+
+from phantom.tempspace import TMPFS_DIR, TempSpace, set_temp_space, tmpfs_dir
+
+from . import log
+from .benchmark import BenchmarkResult, BenchmarkSession, run_benchmark
+from .corpus import load_connector_class, run_input
+from .latency import LatencyModel, PlatformLatency, RateLimit
+from .models import InputJSON
+from .platform_calls import PlatformCallRecorder
+from .polling import PollingSimulator
+from .pool import ConnectorPool
+from .profiling import ActionProfiler, ProfilingSession
+from .shared_cache import SharedCache, set_shared_cache
+from .virtual_time import VirtualTime
+
+
+class VaultFileLeakWarning(UserWarning):
+    """A vault file view was not closed by the end of the test."""
+
+
+benchmark_session_key = pytest.StashKey[BenchmarkSession]()
+profiling_session_key = pytest.StashKey[ProfilingSession]()
+temp_space_key = pytest.StashKey[tuple]()
+vault_restore_key = pytest.StashKey[object]()
+shared_cache_key = pytest.StashKey[SharedCache]()
+cache_restore_key = pytest.StashKey[tuple]()
+worker_cache_stats_key = pytest.StashKey[Dict[str, List[int]]]()
+
+# workerinput key passing the shared cache directory of the controller to the pytest-xdist workers
+SHARED_CACHE_DIR = "soar_shared_cache_dir"
+# workeroutput key passing the cache hits and misses of a pytest-xdist worker to the controller
+CACHE_STATS = "soar_cache_stats"
+# workeroutput key passing the benchmark results of a pytest-xdist worker to the controller
+BENCHMARK_RESULTS = "soar_benchmark_results"
+
+
+def pytest_addoption(parser):
+    parser.addini(
+        "soar_corpus_connector",
+        help="Connector class (package.module:ClassName) that InputJSON files matching soar_corpus_pattern are run "
+        "through, one test per file",
+    )
+    parser.addini(
+        "soar_corpus_pattern",
+        default="soar_input_*.json",
+        help="File name pattern of the InputJSON corpus files. Default: soar_input_*.json",
+    )
+    group = parser.getgroup("splunk-soar-connectors")
+    group.addoption(
+        "--soar-log-mode",
+        choices=log.LOG_MODES,
+        default="console",
+        help="How connector logs are handled: rendered synchronously (console), rendered on a background "
+        "thread (queue) or only kept in a bounded in-memory ring buffer (capture). Default: console",
+    )
+    group.addoption(
+        "--soar-log-capacity",
+        type=int,
+        default=log.DEFAULT_CAPTURE_CAPACITY,
+        help="Number of log records kept in capture mode",
+    )
+    group.addoption(
+        "--soar-benchmark-baseline",
+        default=".soar-benchmark.json",
+        help="Baseline file soar_benchmark results are compared with, relative to the rootdir. "
+        "Default: .soar-benchmark.json",
+    )
+    group.addoption(
+        "--soar-benchmark-save",
+        action="store_true",
+        default=False,
+        help="Store the soar_benchmark results in the baseline file instead of comparing with it",
+    )
+    group.addoption(
+        "--soar-benchmark-threshold",
+        type=float,
+        default=0.2,
+        help="Fail a benchmark whose p50 latency exceeds the baseline by more than this fraction. Default: 0.2",
+    )
+    group.addoption(
+        "--soar-profile",
+        action="store_true",
+        default=False,
+        help="Profile connector actions of every test. Without this option only tests marked soar_profile are profiled",
+    )
+    group.addoption(
+        "--soar-profile-dir",
+        default=".soar-profile",
+        help="Directory the .pstats and .collapsed profiles are written to, relative to the rootdir. "
+        "Default: .soar-profile",
+    )
+    group.addoption(
+        "--soar-profile-top",
+        type=int,
+        default=15,
+        help="Number of hot functions listed in the terminal summary. Default: 15",
+    )
+    group.addoption(
+        "--soar-strict-batching",
+        type=int,
+        default=None,
+        metavar="K",
+        help="Fail tests whose connector actions make more than K single item save_artifact/save_container calls "
+        "that could have been batched",
+    )
+    group.addoption(
+        "--soar-cache-clear",
+        action="store_true",
+        default=False,
+        help="Remove the app JSON discovery results and vault file digests cached by previous runs before the run",
+    )
+    group.addoption(
+        "--soar-tmp-dir",
+        default=None,
+        help="Directory the session temp space for connector state files, state directories and vault roots is "
+        "created in. Default: the system temp directory",
+    )
+    group.addoption(
+        "--soar-tmpfs",
+        action="store_true",
+        default=False,
+        help=f"Create the session temp space on tmpfs ({TMPFS_DIR}) when it is available",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "soar_profile: profile the connector actions of this test (see --soar-profile-dir)"
+    )
+    config.addinivalue_line(
+        "markers",
+        "soar_strict_batching(max_single_calls=0): fail the test if a connector action makes more single item "
+        "platform calls that could have been batched",
+    )
+    log.set_default_log_mode(config.getoption("soar_log_mode"), config.getoption("soar_log_capacity"))
+    config.stash[benchmark_session_key] = BenchmarkSession(
+        baseline_path=config.rootpath / config.getoption("soar_benchmark_baseline"),
+        threshold=config.getoption("soar_benchmark_threshold"),
+        save=config.getoption("soar_benchmark_save"),
+    )
+    config.stash[profiling_session_key] = ProfilingSession(
+        directory=config.rootpath / config.getoption("soar_profile_dir"),
+        top=config.getoption("soar_profile_top"),
+    )
+    _configure_temp_space(config)
+    _configure_worker(config)
+    _configure_cache(config)
+
+
+def _worker_id(config) -> str:
+    """ID of the pytest-xdist worker running the session, "main" when the session is not distributed."""
+    workerinput = getattr(config, "workerinput", None)
+    return workerinput["workerid"] if workerinput else "main"
+
+
+def _configure_worker(config):
+    workerinput = getattr(config, "workerinput", None)
+    if not workerinput:
+        return
+    # workers must not write to the same log files
+    log.set_log_file_suffix(workerinput["workerid"])
+
+
+def _configure_cache(config):
+    """Installs the cache used for app JSON discovery and vault file digests. It is kept in the pytest cache
+    directory, so later runs reuse its values, and shared with the pytest-xdist workers."""
+    # pylint: disable=import-outside-toplevel
+    from phantom.vault import set_digest_cache
+
+    workerinput = getattr(config, "workerinput", None)
+    cache_provider = getattr(config, "cache", None)
+    if cache_provider is not None:
+        shared_cache = SharedCache(str(cache_provider.mkdir("soar")))
+        if config.getoption("soar_cache_clear") and not workerinput:
+            shared_cache.clear()
+    elif workerinput and SHARED_CACHE_DIR in workerinput:
+        # without the cache provider the cache only lives for the run, in the temp space of the controller
+        shared_cache = SharedCache(workerinput[SHARED_CACHE_DIR])
+    else:
+        return
+    config.stash[shared_cache_key] = shared_cache
+    config.stash[cache_restore_key] = (set_shared_cache(shared_cache), set_digest_cache(shared_cache))
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """Hands the directory of the cache shared by all workers to a pytest-xdist worker that is about to start. Workers
+    open the cache in the pytest cache directory themselves when the cache provider is enabled."""
+    config = node.config
+    if getattr(config, "cache", None) is not None:
+        return
+    if shared_cache_key not in config.stash:
+        temp_space, _ = config.stash[temp_space_key]
+        config.stash[shared_cache_key] = SharedCache(temp_space.directory("shared").name)
+    node.workerinput[SHARED_CACHE_DIR] = config.stash[shared_cache_key].directory
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):  # pylint: disable=unused-argument
+    """Adds the cache hits and misses and the benchmark results of a finished pytest-xdist worker to the run."""
+    workeroutput = getattr(node, "workeroutput", {})
+    stats = node.config.stash.setdefault(worker_cache_stats_key, {})
+    for kind, (hits, misses) in workeroutput.get(CACHE_STATS, {}).items():
+        counts = stats.setdefault(kind, [0, 0])
+        counts[0] += hits
+        counts[1] += misses
+    benchmark_session = node.config.stash.get(benchmark_session_key, None)
+    if benchmark_session is not None:
+        benchmark_session.add_results([BenchmarkResult.from_raw(raw) for raw in workeroutput.get(BENCHMARK_RESULTS, [])])
+
+
+def _cache_stats(config) -> Dict[str, List[int]]:
+    """Cache hits and misses per key kind of this process and of its pytest-xdist workers."""
+    stats = {kind: list(counts) for kind, counts in config.stash.get(worker_cache_stats_key, {}).items()}
+    shared_cache = config.stash.get(shared_cache_key, None)
+    if shared_cache is not None:
+        for kind, (hits, misses) in shared_cache.stats.items():
+            counts = stats.setdefault(kind, [0, 0])
+            counts[0] += hits
+            counts[1] += misses
+    return stats
+
+
+def _configure_temp_space(config):
+    base_dir = config.getoption("soar_tmp_dir")
+    if config.getoption("soar_tmpfs"):
+        base_dir = tmpfs_dir()
+        if base_dir is None:
+            config.issue_config_time_warning(
+                pytest.PytestConfigWarning("--soar-tmpfs: no tmpfs available, using the regular temp directory"),
+                stacklevel=2,
+            )
+    # one root per xdist worker, all of it is removed when the session ends
+    temp_space = TempSpace(base_dir=base_dir, prefix=f"soar-{_worker_id(config)}-")
+    config.stash[temp_space_key] = (temp_space, set_temp_space(temp_space))
+
+    # pylint: disable=import-outside-toplevel
+    from phantom.vault import Vault, VirtualVault
+
+    # the Vault API gets a vault whose storage is allocated from the session's temp space
+    config.stash[vault_restore_key] = Vault._vault  # pylint: disable=protected-access
+    Vault._vault = VirtualVault()  # pylint: disable=protected-access
+
+
+def _strict_batching_limit(item):
+    marker = item.get_closest_marker("soar_strict_batching")
+    if marker is None:
+        return item.config.getoption("soar_strict_batching")
+    return marker.kwargs.get("max_single_calls", marker.args[0] if marker.args else 0)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    profile = item.config.getoption("soar_profile") or item.get_closest_marker("soar_profile") is not None
+    max_single_calls = _strict_batching_limit(item)
+    if not profile and max_single_calls is None:
+        yield
+        return
+
+    # pylint: disable=import-outside-toplevel
+    from phantom.instrumentation import hook_installed
+
+    profiler = ActionProfiler() if profile else None
+    recorder = PlatformCallRecorder() if max_single_calls is not None else None
+    with contextlib.ExitStack() as hooks:
+        for hook in (profiler, recorder):
+            if hook is not None:
+                hooks.enter_context(hook_installed(hook))
+        outcome = yield
+    if profiler is not None:
+        item.config.stash[profiling_session_key].record(item.nodeid, profiler)
+
+    if recorder is not None and outcome.excinfo is None:
+        violations = recorder.batching_violations(max_single_calls)
+        if violations:
+            pytest.fail("\n".join(violations), pytrace=False)
+
+
+class CorpusInputFailure(Exception):
+    """A corpus input failed to run or produced an action result with an error status."""
+
+
+class CorpusItem(pytest.Item):
+    """Runs one InputJSON file of the corpus through the soar_corpus_connector class."""
+
+    def runtest(self):
+        connector_class = load_connector_class(self.config.getini("soar_corpus_connector"))
+        result = run_input(connector_class, self.path)
+        self.user_properties.append(("soar_latency", result["latency"]))
+        if not result["success"]:
+            raise CorpusInputFailure(result.get("traceback") or f"action result statuses: {result['statuses']}")
+
+    def repr_failure(self, excinfo, style=None):
+        if isinstance(excinfo.value, CorpusInputFailure):
+            return f"{self.path}: {excinfo.value}"
+        return super().repr_failure(excinfo, style)
+
+    def reportinfo(self):
+        return self.path, None, f"soar corpus input {self.path.name}"
+
+
+class CorpusFile(pytest.File):
+    def collect(self):
+        yield CorpusItem.from_parent(self, name=self.path.name)
+
+
+def pytest_collect_file(file_path, parent):
+    if not parent.config.getini("soar_corpus_connector"):
+        return None
+    if file_path.match(parent.config.getini("soar_corpus_pattern")):
+        return CorpusFile.from_parent(parent, path=file_path)
+    return None
+
+
+def pytest_sessionfinish(session):
+    workeroutput = getattr(session.config, "workeroutput", None)
+    benchmark_session = session.config.stash.get(benchmark_session_key, None)
+    if workeroutput is not None:
+        # the controller writes the baseline and the summary of all workers
+        if benchmark_session and benchmark_session.results:
+            workeroutput[BENCHMARK_RESULTS] = [result.to_raw() for result in benchmark_session.results.values()]
+    elif benchmark_session and benchmark_session.save and benchmark_session.results:
+        benchmark_session.save_baseline()
+
+    shared_cache = session.config.stash.get(shared_cache_key, None)
+    if workeroutput is not None and shared_cache is not None:
+        workeroutput[CACHE_STATS] = shared_cache.stats
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    benchmark_session = config.stash.get(benchmark_session_key, None)
+    if benchmark_session and benchmark_session.results:
+        terminalreporter.section("soar benchmark")
+        for line in benchmark_session.summary_lines():
+            terminalreporter.write_line(line)
+
+    profiling_session = config.stash.get(profiling_session_key, None)
+    if profiling_session and profiling_session.api_times:
+        terminalreporter.section("soar profile")
+        for line in profiling_session.summary_lines():
+            terminalreporter.write_line(line)
+
+    cache_stats = _cache_stats(config)
+    if cache_stats:
+        terminalreporter.section("soar cache")
+        for kind, (hits, misses) in sorted(cache_stats.items()):
+            terminalreporter.write_line(f"{kind}: {hits} hits, {misses} misses")
+
+
+def pytest_unconfigure(config):
+    log.shutdown_logging()
+    if getattr(config, "workerinput", None):
+        log.set_log_file_suffix(None)
+    if cache_restore_key in config.stash:
+        # pylint: disable=import-outside-toplevel
+        from phantom.vault import set_digest_cache
+
+        previous_cache, previous_digest_cache = config.stash[cache_restore_key]
+        set_shared_cache(previous_cache)
+        set_digest_cache(previous_digest_cache)
+    if vault_restore_key in config.stash:
+        # pylint: disable=import-outside-toplevel
+        from phantom.vault import Vault
+
+        Vault._vault = config.stash[vault_restore_key]  # pylint: disable=protected-access
+    temp_space, previous = config.stash.get(temp_space_key, (None, None))
+    if temp_space is not None:
+        set_temp_space(previous)
+        temp_space.cleanup()
 
 
 def configure_connector(connector, configuration):
@@ -9,3 +385,191 @@ def configure_connector(connector, configuration):
         conn.logger.setLevel(logging.INFO)
         return conn
     return make_configured_connector
+
+
+@pytest.fixture(scope="session")
+def soar_connector_pool():
+    """Session wide pool of idle connectors, reused across tests after a reset() instead of being created again."""
+    pool = ConnectorPool()
+    yield pool
+    pool.clear()
+
+
+@pytest.fixture()
+def soar_connector(soar_connector_pool):
+    """Returns a function handing out pooled connectors for a connector class and asset configuration. The
+    connectors are in their pristine state and go back to the pool when the test ends."""
+    acquired = []
+
+    def get(connector, configuration: Optional[dict] = None):
+        conn = soar_connector_pool.acquire(connector, configuration)
+        acquired.append(conn)
+        return conn
+
+    yield get
+    for conn in acquired:
+        soar_connector_pool.release(conn)
+
+
+@pytest.fixture(scope="session")
+def soar_event_loop():
+    """Session wide event loop that async connectors run on, so simulated actions don't pay for loop setup."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.run_until_complete(loop.shutdown_asyncgens())
+    loop.close()
+
+
+@pytest.fixture()
+def soar_run_action(soar_event_loop):
+    """Runs a connector action and returns the parsed action results. Async connectors are driven on the session event loop."""
+    # pylint: disable=import-outside-toplevel
+    from phantom.base_connector import AsyncBaseConnector
+
+    def run_action(connector, in_json: Union[InputJSON, str]) -> list:
+        if isinstance(connector, AsyncBaseConnector):
+            connector.event_loop = soar_event_loop
+        if not isinstance(in_json, str):
+            in_json = json.dumps(in_json)
+        return json.loads(connector._handle_action(in_json, None))  # pylint: disable=protected-access
+
+    return run_action
+
+
+@pytest.fixture(scope="session")
+def soar_vault_seed_files() -> list:
+    """Files the session vault is seeded with. Override in conftest.py with a list of dictionaries holding the
+    vault_add arguments (container, file_location and optionally file_name and metadata)."""
+    return []
+
+
+@pytest.fixture(scope="session")
+def soar_base_vault(soar_vault_seed_files):
+    """Session wide VirtualVault, seeded once with soar_vault_seed_files."""
+    # pylint: disable=import-outside-toplevel
+    from phantom.vault import VirtualVault
+
+    vault = VirtualVault()
+    for seed in soar_vault_seed_files:
+        file_location = str(seed["file_location"])
+        vault.add(
+            container=seed["container"],
+            file_location=file_location,
+            file_name=seed.get("file_name") or pathlib.Path(file_location).name,
+            metadata=seed.get("metadata") or {},
+        )
+    yield vault
+    vault.root.cleanup()
+
+
+@pytest.fixture()
+def soar_vault(soar_base_vault):
+    """Per-test copy-on-write overlay on the session vault. It backs the Vault and Rules API for the duration of the
+    test and is discarded on teardown. Vault file views left open by the test are closed and reported as a warning."""
+    # pylint: disable=import-outside-toplevel
+    from phantom.vault import Vault, VaultOverlay
+
+    overlay = VaultOverlay(soar_base_vault)
+    previous_vault = Vault._vault  # pylint: disable=protected-access
+    Vault._vault = overlay  # pylint: disable=protected-access
+    yield overlay
+    Vault._vault = previous_vault  # pylint: disable=protected-access
+    for leak in overlay.open_files.close_all():
+        warnings.warn(VaultFileLeakWarning(leak))
+    overlay.discard()
+
+
+@pytest.fixture()
+def soar_captured_logs():
+    """Switches connector logging to capture mode for the test and returns a function listing the captured records."""
+    with log.capture_logs() as get_records:
+        yield get_records
+
+
+@pytest.fixture()
+def soar_platform_calls():
+    """Records the platform API calls (save_artifact, save_containers, vault_add, ...) connector actions make during
+    the test, with their batch sizes."""
+    # pylint: disable=import-outside-toplevel
+    from phantom.instrumentation import hook_installed
+
+    with hook_installed(PlatformCallRecorder()) as recorder:
+        yield recorder
+
+
+@pytest.fixture()
+def soar_virtual_time(request):
+    """Runs the test on virtual time: time.sleep, time.time, time.monotonic, datetime.datetime.now and asyncio.sleep
+    use a simulated clock, so sleeping returns instantly. The simulated time of every connector run is recorded and
+    the total is added to the test report as the soar_simulated_seconds user property."""
+    with VirtualTime() as virtual_time:
+        yield virtual_time
+    request.node.user_properties.append(("soar_simulated_seconds", round(virtual_time.action_elapsed(), 6)))
+
+
+@pytest.fixture()
+def soar_platform_latency(request):
+    """Emulates platform API response times for the rest of the test. Call it with latency models and rate limits
+    per API (both optional); it returns the PlatformLatency reporting the simulated wall time. When the test also
+    uses soar_virtual_time, both run on the same clock."""
+    # pylint: disable=import-outside-toplevel
+    from phantom.instrumentation import install_hook, uninstall_hook
+
+    clock = None
+    if "soar_virtual_time" in request.fixturenames:
+        clock = request.getfixturevalue("soar_virtual_time").clock
+    installed = []
+
+    def emulate(
+        models: Optional[Dict[str, LatencyModel]] = None,
+        rate_limits: Optional[Dict[str, RateLimit]] = None,
+        virtual: bool = True,
+    ) -> PlatformLatency:
+        latency = PlatformLatency(models, rate_limits, clock=clock, virtual=virtual)
+        install_hook(latency)
+        installed.append(latency)
+        return latency
+
+    yield emulate
+    for latency in installed:
+        uninstall_hook(latency)
+
+
+@pytest.fixture()
+def soar_polling_simulator(request, soar_event_loop):
+    """Creates PollingSimulators running the on_poll action of a connector for several cycles with state carried
+    over. When the test also uses soar_virtual_time, the polling schedule runs on the virtual clock."""
+    clock = None
+    if "soar_virtual_time" in request.fixturenames:
+        clock = request.getfixturevalue("soar_virtual_time").clock
+    simulators = []
+
+    def create(connector_factory, upstream=None, feed=None, interval: float = 3600, **kwargs) -> PollingSimulator:
+        simulator = PollingSimulator(
+            connector_factory, upstream, feed, interval=interval, clock=clock, event_loop=soar_event_loop, **kwargs
+        )
+        simulators.append(simulator)
+        return simulator
+
+    yield create
+    for simulator in simulators:
+        simulator.close()
+
+
+@pytest.fixture()
+def soar_benchmark(request):
+    """Measures the latency of connector runs. Call it with a connector factory (e.g. the connector class or the
+    result of configure_connector) and an InputJSON. The test fails if the p50 latency regressed against the
+    baseline file by more than --soar-benchmark-threshold."""
+    benchmark_session: BenchmarkSession = request.config.stash[benchmark_session_key]
+
+    def benchmark(
+        connector_factory, in_json: Union[InputJSON, str], rounds: int = 20, warmup: int = 3, name: Optional[str] = None
+    ) -> BenchmarkResult:
+        result = run_benchmark(connector_factory, in_json, name or request.node.nodeid, rounds=rounds, warmup=warmup)
+        regression = benchmark_session.record(result)
+        if regression:
+            pytest.fail(regression)
+        return result
+
+    return benchmark
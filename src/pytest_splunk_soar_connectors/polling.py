@@ -0,0 +1,232 @@
+import json
+import os
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+from phantom.tempspace import get_temp_space
+
+from .clock import VirtualClock
+from .stores import ArtifactStore, ContainerStore
+
+
+@dataclass
+class PollCycle:
+    """Measurements of one on_poll run."""
+
+    index: int
+    latency: float
+    simulated: Optional[float]
+    artifacts: int
+    containers: int
+    state_size: int
+
+    @property
+    def duration(self) -> float:
+        """Simulated duration of the cycle if the simulator runs on a virtual clock, its real latency otherwise."""
+        return self.simulated if self.simulated is not None else self.latency
+
+    @property
+    def artifacts_per_second(self) -> float:
+        return self.artifacts / self.duration if self.duration else 0.0
+
+    @property
+    def containers_per_second(self) -> float:
+        return self.containers / self.duration if self.duration else 0.0
+
+
+def _slope(values: List[float]) -> float:
+    """Least squares slope of values over their index."""
+    if len(values) < 2:
+        return 0.0
+    mean_x = (len(values) - 1) / 2
+    mean_y = statistics.mean(values)
+    numerator = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+    denominator = sum((x - mean_x) ** 2 for x in range(len(values)))
+    return numerator / denominator
+
+
+@dataclass
+class PollingReport:
+    """Measurements of all cycles of a polling simulation."""
+
+    cycles: List[PollCycle] = field(default_factory=list)
+
+    @property
+    def artifacts(self) -> int:
+        return sum(cycle.artifacts for cycle in self.cycles)
+
+    @property
+    def containers(self) -> int:
+        return sum(cycle.containers for cycle in self.cycles)
+
+    @property
+    def latency_slope(self) -> float:
+        """Growth of the cycle duration in seconds per cycle. Connectors whose poll cost grows with the ingested
+        history have a positive slope even when every cycle ingests the same amount of data."""
+        return _slope([cycle.duration for cycle in self.cycles])
+
+    @property
+    def state_size_slope(self) -> float:
+        """Growth of the state file in bytes per cycle."""
+        return _slope([cycle.state_size for cycle in self.cycles])
+
+    def summary_lines(self) -> List[str]:
+        lines = [f"{'cycle':>5} {'seconds':>10} {'artifacts':>9} {'artifacts/s':>11} {'containers':>10} {'state bytes':>11}"]
+        for cycle in self.cycles:
+            lines.append(
+                f"{cycle.index:>5} {cycle.duration:>10.4f} {cycle.artifacts:>9} {cycle.artifacts_per_second:>11.1f} "
+                f"{cycle.containers:>10} {cycle.state_size:>11}"
+            )
+        lines.append(
+            f"latency growth: {self.latency_slope * 1000:.3f} ms/cycle, "
+            f"state growth: {self.state_size_slope:.1f} bytes/cycle"
+        )
+        return lines
+
+
+class PollingSimulator:
+    """Runs the on_poll action of a connector for a number of cycles on a schedule.
+
+    Every cycle runs on a fresh connector, like scheduled polling on the platform, but the state file, the state
+    directory and the saved artifacts and containers carry over. Upstream data arrives batch by batch: before every
+    cycle the next batch of the upstream iterable is handed to feed, e.g. to register it with requests-mock.
+
+    Args:
+        connector_factory (Callable[[], Any]): returns a configured connector, e.g. a connector class or the result
+            of configure_connector
+        upstream (Optional[Iterable[Any]], optional): batches of upstream data, one per cycle. Defaults to None.
+        feed (Optional[Callable[[Any, Any], None]], optional): called with the connector and the batch of the cycle
+        interval (float, optional): seconds between the scheduled cycles. Defaults to 3600.
+        clock (Optional[VirtualClock], optional): virtual clock the schedule runs on. Without a clock the cycles run
+            back to back.
+        container_count (int, optional): container_count parameter of on_poll. Defaults to 100.
+        artifact_count (int, optional): artifact_count parameter of on_poll. Defaults to 1000.
+        event_loop (optional): event loop async connectors are run on
+    """
+
+    def __init__(
+        self,
+        connector_factory: Callable[[], Any],
+        upstream: Optional[Iterable[Any]] = None,
+        feed: Optional[Callable[[Any, Any], None]] = None,
+        interval: float = 3600,
+        clock: Optional[VirtualClock] = None,
+        container_count: int = 100,
+        artifact_count: int = 1000,
+        event_loop=None,
+    ):
+        if upstream is not None and feed is None:
+            raise ValueError("feed is required to hand the upstream data to the connector")
+        self.connector_factory = connector_factory
+        self.upstream: Optional[Iterator[Any]] = iter(upstream) if upstream is not None else None
+        self.feed = feed
+        self.interval = interval
+        self.clock = clock
+        self.container_count = container_count
+        self.artifact_count = artifact_count
+        self.event_loop = event_loop
+
+        self.state_dir = get_temp_space().directory("polling")
+        self.state_file_location = os.path.join(self.state_dir.name, "state.json")
+        self.artifact_store = ArtifactStore()
+        self.container_store: Optional[ContainerStore] = None
+        self.starting_artifact_id = 1
+        self.starting_container_id = 2
+        self.report = PollingReport()
+        self._last_poll: Optional[float] = None
+        self._cycle_started = 0.0
+
+    def _poll_input(self, now: float) -> str:
+        start_time = self._last_poll if self._last_poll is not None else now - self.interval
+        return json.dumps(
+            {
+                "action": "on poll",
+                "identifier": "on_poll",
+                "config": {},
+                "parameters": [
+                    {
+                        "start_time": int(start_time * 1000),
+                        "end_time": int(now * 1000),
+                        "container_count": self.container_count,
+                        "artifact_count": self.artifact_count,
+                    }
+                ],
+                "environment_variables": {},
+            }
+        )
+
+    def _prepare(self, connector) -> ContainerStore:
+        """Points the connector at the state and stores shared by all cycles and returns the container store."""
+        # pylint: disable=import-outside-toplevel
+        from phantom.base_connector import AsyncBaseConnector
+
+        connector.poll_now = False
+        connector.state_file_location = self.state_file_location
+        connector.state_dir = self.state_dir
+        connector.cleanup_state_dir = False
+        connector.artifact_store = self.artifact_store
+        if self.container_store is None:
+            self.container_store = connector.container_store
+        connector.container_store = self.container_store
+        connector.starting_artifact_id = self.starting_artifact_id
+        connector.starting_container_id = self.starting_container_id
+        if self.event_loop is not None and isinstance(connector, AsyncBaseConnector):
+            connector.event_loop = self.event_loop
+        return self.container_store
+
+    def run_cycle(self) -> Optional[PollCycle]:
+        """Runs the next cycle. Returns None, without running the connector, once the upstream data is exhausted."""
+        batch = None
+        if self.upstream is not None:
+            batch = next(self.upstream, StopIteration)
+            if batch is StopIteration:
+                return None
+
+        index = len(self.report.cycles)
+        if self.clock is not None and index:
+            self.clock.advance_to(self._cycle_started + self.interval)
+        self._cycle_started = self.clock.now() if self.clock is not None else 0.0
+
+        connector = self.connector_factory()
+        container_store = self._prepare(connector)
+        if batch is not None and self.feed is not None:
+            self.feed(connector, batch)
+        artifacts_before = len(self.artifact_store)
+        containers_before = len(container_store)
+
+        now = time.time()
+        started = time.perf_counter()
+        connector._handle_action(self._poll_input(now), None)  # pylint: disable=protected-access
+        latency = time.perf_counter() - started
+        self._last_poll = now
+
+        self.starting_artifact_id = connector.starting_artifact_id
+        self.starting_container_id = connector.starting_container_id
+        cycle = PollCycle(
+            index=index,
+            latency=latency,
+            simulated=self.clock.now() - self._cycle_started if self.clock is not None else None,
+            artifacts=len(self.artifact_store) - artifacts_before,
+            containers=len(container_store) - containers_before,
+            state_size=os.path.getsize(self.state_file_location) if os.path.exists(self.state_file_location) else 0,
+        )
+        self.report.cycles.append(cycle)
+        return cycle
+
+    def run(self, cycles: int) -> PollingReport:
+        """Runs up to cycles cycles, fewer if the upstream data is exhausted earlier, and returns the report."""
+        for _ in range(cycles):
+            if self.run_cycle() is None:
+                break
+        return self.report
+
+    def close(self):
+        self.state_dir.cleanup()
+
+    def __enter__(self) -> "PollingSimulator":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
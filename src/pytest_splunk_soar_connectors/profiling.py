@@ -0,0 +1,181 @@
+import cProfile
+import os
+import pathlib
+import pstats
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from phantom.instrumentation import PlatformCall, PlatformHook
+
+# pstats function key: (file name, line number, function name)
+FunctionKey = Tuple[str, int, str]
+
+_MAX_STACK_DEPTH = 128
+_MIN_STACK_MICROSECONDS = 1
+
+
+class ActionProfiler(PlatformHook):
+    """Profiles connector code with cProfile while a handle_action call or a platform API call is running, and
+    keeps count and total time per instrumented API. Each thread is profiled separately; the profiles are merged
+    when the statistics are requested."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._profiles: List[cProfile.Profile] = []
+        self.api_times: Dict[str, List[float]] = {}
+
+    def _profile(self) -> cProfile.Profile:
+        profile = getattr(self._local, "profile", None)
+        if profile is None:
+            profile = cProfile.Profile()
+            self._local.profile = profile
+            with self._lock:
+                self._profiles.append(profile)
+        return profile
+
+    def enter(self, call: PlatformCall):
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        if depth == 0:
+            try:
+                self._profile().enable()
+                self._local.enabled = True
+            except ValueError:
+                # another profiler is active in this thread
+                self._local.enabled = False
+
+    def exit(self, call: PlatformCall):
+        self._local.depth -= 1
+        if self._local.depth == 0 and self._local.enabled:
+            self._profile().disable()
+        with self._lock:
+            api_time = self.api_times.setdefault(call.api, [0, 0.0])
+            api_time[0] += 1
+            api_time[1] += call.elapsed
+
+    def stats(self) -> Optional[pstats.Stats]:
+        with self._lock:
+            profiles = [profile for profile in self._profiles if _has_data(profile)]
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+
+def _has_data(profile: cProfile.Profile) -> bool:
+    profile.create_stats()
+    return bool(profile.stats)  # type: ignore[attr-defined]
+
+
+def format_function(function: FunctionKey) -> str:
+    file_name, line, name = function
+    if file_name == "~":
+        return name
+    return f"{name} ({os.path.basename(file_name)}:{line})"
+
+
+def collapsed_stacks(stats: pstats.Stats) -> Dict[str, int]:
+    """Converts profile statistics into collapsed stacks ("root;caller;callee microseconds") for flame graphs.
+
+    cProfile only records caller/callee pairs, so deeper stacks are reconstructed by splitting the time of a
+    function over its callees in proportion to the time spent in each of them.
+    """
+    raw_stats = stats.stats  # type: ignore[attr-defined]
+    children: Dict[FunctionKey, Dict[FunctionKey, float]] = {}
+    for function, (_, _, _, _, callers) in raw_stats.items():
+        for caller, caller_stats in callers.items():
+            children.setdefault(caller, {})[function] = caller_stats[3]
+
+    roots = [
+        function for function, (_, _, _, _, callers) in raw_stats.items() if not any(c in raw_stats for c in callers)
+    ]
+    stacks: Dict[str, int] = {}
+
+    def expand(function: FunctionKey, stack: List[str], budget: float):
+        _, _, own_time, cumulative_time, _ = raw_stats[function]
+        frame = format_function(function).replace(";", ":")
+        path = stack + [frame]
+        scale = budget / cumulative_time if cumulative_time else 0.0
+
+        self_microseconds = int(own_time * scale * 1_000_000)
+        if self_microseconds >= _MIN_STACK_MICROSECONDS:
+            key = ";".join(path)
+            stacks[key] = stacks.get(key, 0) + self_microseconds
+
+        if len(path) >= _MAX_STACK_DEPTH:
+            return
+        for child, edge_time in children.get(function, {}).items():
+            child_budget = edge_time * scale
+            if child in raw_stats and child_budget * 1_000_000 >= _MIN_STACK_MICROSECONDS and frame not in stack:
+                expand(child, path, child_budget)
+
+    for root in roots:
+        expand(root, [], raw_stats[root][3])
+    return stacks
+
+
+def write_profile(stats: pstats.Stats, directory: pathlib.Path, name: str) -> Tuple[pathlib.Path, pathlib.Path]:
+    """Writes the statistics as <name>.pstats and <name>.collapsed into directory.
+
+    Returns:
+        Tuple[pathlib.Path, pathlib.Path]: paths of the pstats and collapsed stacks files
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    base_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_") or "profile"
+    pstats_path = directory / f"{base_name}.pstats"
+    collapsed_path = directory / f"{base_name}.collapsed"
+
+    stats.dump_stats(str(pstats_path))
+    with collapsed_path.open("w", encoding="utf-8") as collapsed_file:
+        for stack, microseconds in sorted(collapsed_stacks(stats).items()):
+            collapsed_file.write(f"{stack} {microseconds}\n")
+    return pstats_path, collapsed_path
+
+
+def hot_functions(stats: pstats.Stats, top: int) -> List[str]:
+    """Formats the top functions by own time as table lines."""
+    raw_stats = stats.stats  # type: ignore[attr-defined]
+    ranked = sorted(raw_stats.items(), key=lambda item: item[1][2], reverse=True)[:top]
+    lines = [f"{'ncalls':>10} {'tottime s':>10} {'cumtime s':>10}  function"]
+    for function, (_, call_count, own_time, cumulative_time, _) in ranked:
+        lines.append(f"{call_count:>10} {own_time:>10.4f} {cumulative_time:>10.4f}  {format_function(function)}")
+    return lines
+
+
+class ProfilingSession:
+    """Collects the profiles of all profiled tests for the terminal summary."""
+
+    def __init__(self, directory: pathlib.Path, top: int):
+        self.directory = directory
+        self.top = top
+        self.stats: Optional[pstats.Stats] = None
+        self.api_times: Dict[str, List[float]] = {}
+        self.files: List[pathlib.Path] = []
+
+    def record(self, name: str, profiler: ActionProfiler):
+        for api, (count, total) in profiler.api_times.items():
+            api_time = self.api_times.setdefault(api, [0, 0.0])
+            api_time[0] += count
+            api_time[1] += total
+
+        stats = profiler.stats()
+        if stats is None:
+            return
+        self.files.extend(write_profile(stats, self.directory, name))
+        if self.stats is None:
+            self.stats = pstats.Stats(str(self.files[-2]))
+        else:
+            self.stats.add(str(self.files[-2]))
+
+    def summary_lines(self) -> List[str]:
+        lines = [f"profiles written to {self.directory}", "", f"{'calls':>10} {'total s':>10}  api"]
+        for api, (count, total) in sorted(self.api_times.items(), key=lambda item: item[1][1], reverse=True):
+            lines.append(f"{count:>10} {total:>10.4f}  {api}")
+        if self.stats is not None:
+            lines.append("")
+            lines.extend(hot_functions(self.stats, self.top))
+        return lines
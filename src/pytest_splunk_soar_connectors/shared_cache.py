@@ -0,0 +1,186 @@
+import contextlib
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore
+
+_MISSING = object()
+
+# Keys are locked in stripes, each with its own lock file, so the number of lock files stays fixed
+LOCK_STRIPES = 64
+
+# Values kept in the cache directory, the oldest ones are evicted beyond this
+DEFAULT_MAX_ENTRIES = 10000
+
+_shared_cache: Optional["SharedCache"] = None
+
+
+class SharedCache:
+    """JSON values shared by the processes of a test run through a directory, e.g. by the pytest-xdist workers, or
+    by consecutive test runs when the directory is kept.
+
+    get_or_compute() holds an exclusive lock on the key while it computes a missing value, so a value is computed by
+    a single process and read from disk by all others, while values of other keys are computed concurrently. Keys
+    share LOCK_STRIPES lock files below locks/. Without fcntl (Windows) values are still shared, but processes missing
+    the same key at the same time compute it concurrently.
+
+    Once more than max_entries values are stored, the oldest ones are removed.
+    """
+
+    def __init__(self, directory: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        # [hits, misses] per key kind, the part of the key before the first ":"
+        self.stats: Dict[str, List[int]] = {}
+        self._stats_lock = threading.Lock()
+        # values stored in the directory as far as this process knows, counted on the first write
+        self._entries: Optional[int] = None
+        # threads of this process share the lock file of a stripe, so they also need a thread lock per stripe
+        self._stripe_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._lock_directory = os.path.join(directory, "locks")
+        os.makedirs(self._lock_directory, exist_ok=True)
+
+    @property
+    def hits(self) -> int:
+        return sum(hits for hits, _ in self.stats.values())
+
+    @property
+    def misses(self) -> int:
+        return sum(misses for _, misses in self.stats.values())
+
+    def _count(self, key: str, hit: bool):
+        with self._stats_lock:
+            counts = self.stats.setdefault(key.split(":", 1)[0], [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def clear(self):
+        """Removes all stored values."""
+        for file_name in os.listdir(self.directory):
+            with contextlib.suppress(OSError):
+                os.unlink(os.path.join(self.directory, file_name))
+
+    def _value_paths(self) -> List[str]:
+        # values are stored under the SHA-256 of their key, other files are locks or partially written values
+        return [
+            os.path.join(self.directory, file_name)
+            for file_name in os.listdir(self.directory)
+            if len(file_name) == 64 and "." not in file_name
+        ]
+
+    def _added(self):
+        """Counts a newly stored value. The directory is only listed to evict values once the count exceeds
+        max_entries, which happens at most every tenth of max_entries additions."""
+        with self._stats_lock:
+            if self._entries is None:
+                self._entries = len(self._value_paths())
+            else:
+                self._entries += 1
+            if self._entries <= self.max_entries:
+                return
+            self._entries = self._evict()
+
+    def _evict(self) -> int:
+        """Removes the oldest values down to 90% of max_entries, once there are more than max_entries. Values added
+        by other processes are included. Returns the number of values left."""
+        paths = self._value_paths()
+        if len(paths) <= self.max_entries:
+            return len(paths)
+        ages = []
+        for path in paths:
+            with contextlib.suppress(OSError):
+                ages.append((os.stat(path).st_mtime_ns, path))
+        ages.sort()
+        keep = self.max_entries * 9 // 10
+        for _, path in ages[: len(ages) - keep]:
+            with contextlib.suppress(OSError):
+                os.unlink(path)
+        return min(len(ages), keep)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest())
+
+    @contextlib.contextmanager
+    def _locked(self, key: str) -> Iterator[str]:
+        path = self._path(key)
+        stripe = int(os.path.basename(path)[:8], 16) % LOCK_STRIPES
+        lock_path = os.path.join(self._lock_directory, f"{stripe}.lock")
+        with self._stripe_locks[stripe], open(lock_path, "a", encoding="utf-8") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield path
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _read(path: str) -> Any:
+        try:
+            with open(path, encoding="utf-8") as value_file:
+                return json.load(value_file)
+        except (OSError, ValueError):
+            return _MISSING
+
+    @staticmethod
+    def _write(path: str, value: Any):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as value_file:
+            json.dump(value, value_file, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._read(self._path(key))
+        self._count(key, value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def set(self, key: str, value: Any):
+        with self._locked(key) as path:
+            added = not os.path.exists(path)
+            self._write(path, value)
+        if added:
+            self._added()
+
+    def get_or_compute(
+        self, key: str, compute: Callable[[], Any], is_fresh: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """Returns the value stored for key, computing and storing it first when it is missing or not fresh.
+
+        Args:
+            key (str): cache key
+            compute (Callable[[], Any]): returns the JSON serializable value
+            is_fresh (Optional[Callable[[Any], bool]]): tells whether a stored value can still be used
+
+        Returns:
+            Any: the stored or computed value
+        """
+        with self._locked(key) as path:
+            stored = self._read(path)
+            if stored is not _MISSING and (is_fresh is None or is_fresh(stored)):
+                self._count(key, True)
+                return stored
+            self._count(key, False)
+            added = stored is _MISSING
+            value = compute()
+            self._write(path, value)
+        if added:
+            self._added()
+        return value
+
+
+def get_shared_cache() -> Optional[SharedCache]:
+    """Returns the cache shared with the other processes of the test run and with later runs, None outside of
+    pytest or when neither the pytest cache provider nor a pytest-xdist controller provides a directory for it."""
+    return _shared_cache
+
+
+def set_shared_cache(shared_cache: Optional[SharedCache]) -> Optional[SharedCache]:
+    """Replaces the shared cache and returns the previous one."""
+    global _shared_cache  # pylint: disable=global-statement
+    previous, _shared_cache = _shared_cache, shared_cache
+    return previous
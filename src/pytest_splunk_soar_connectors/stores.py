@@ -0,0 +1,337 @@
+import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .models import Artifact
+
+# Maps an index key to the IDs of the matching records. Dicts are used as insertion ordered sets.
+Index = Dict[Any, Dict[int, None]]
+
+
+def _add_to_index(index: Index, key: Any, record_id: int):
+    index.setdefault(key, {})[record_id] = None
+
+
+def _intersect(candidate_sets: List[Dict[int, None]]) -> Iterator[int]:
+    """Yields the IDs present in all candidate sets, iterating over the smallest one."""
+    candidate_sets = sorted(candidate_sets, key=len)
+    smallest, others = candidate_sets[0], candidate_sets[1:]
+    for record_id in smallest:
+        if all(record_id in other for other in others):
+            yield record_id
+
+
+def _container_key(container: Any) -> str:
+    return str(container)
+
+
+class ArtifactRecord:
+    """Ingested artifact together with the fields the ArtifactStore indexes."""
+
+    __slots__ = ("id", "container", "source_data_identifier", "label", "severity", "create_time", "artifact")
+
+    def __init__(self, artifact_id: int, container: Any, artifact: Artifact):
+        self.id = artifact_id
+        self.container = container
+        self.source_data_identifier = artifact.get("source_data_identifier")
+        self.label = artifact.get("label")
+        self.severity = artifact.get("severity")
+        # like the platform, artifacts saved without a create_time are stamped with the (possibly virtual) save time
+        self.create_time = artifact.get("create_time") or datetime.datetime.now(datetime.timezone.utc)
+        self.artifact = artifact
+
+    def __repr__(self) -> str:
+        return f"ArtifactRecord(id={self.id}, container={self.container}, label={self.label})"
+
+
+class ArtifactStore:
+    """In-memory store of the artifacts saved by a connector.
+
+    Artifacts are indexed by container, source_data_identifier, label, severity, CEF key and CEF key/value pair, so
+    lookups and duplicate detection cost O(1) per artifact instead of a scan over all ingested artifacts.
+    """
+
+    def __init__(self):
+        self._records: Dict[int, ArtifactRecord] = {}
+        # first artifact per (container, source_data_identifier), used for duplicate detection
+        self._first_by_identifier: Dict[Tuple[str, str], int] = {}
+        self._by_container: Index = {}
+        self._by_source_data_identifier: Index = {}
+        self._by_label: Index = {}
+        self._by_severity: Index = {}
+        self._by_cef_key: Index = {}
+        self._by_cef_value: Index = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[Artifact]:
+        return (record.artifact for record in self._records.values())
+
+    def __contains__(self, artifact_id: int) -> bool:
+        return artifact_id in self._records
+
+    def get(self, artifact_id: int) -> Optional[Artifact]:
+        record = self._records.get(artifact_id)
+        return record.artifact if record else None
+
+    def records(self) -> List[ArtifactRecord]:
+        return list(self._records.values())
+
+    def find_duplicate(self, artifact: Artifact, container: Any) -> Optional[int]:
+        """Returns the ID of an artifact in the same container with the same source_data_identifier, if any."""
+        source_data_identifier = artifact.get("source_data_identifier")
+        if source_data_identifier is None:
+            return None
+        return self._first_by_identifier.get((_container_key(container), str(source_data_identifier)))
+
+    def add(self, artifact_id: int, artifact: Artifact, container: Any) -> ArtifactRecord:
+        record = ArtifactRecord(artifact_id, container, artifact)
+        self._records[artifact_id] = record
+
+        _add_to_index(self._by_container, _container_key(container), artifact_id)
+        if record.source_data_identifier is not None:
+            identifier = str(record.source_data_identifier)
+            self._first_by_identifier.setdefault((_container_key(container), identifier), artifact_id)
+            _add_to_index(self._by_source_data_identifier, identifier, artifact_id)
+        if record.label is not None:
+            _add_to_index(self._by_label, record.label, artifact_id)
+        if record.severity is not None:
+            _add_to_index(self._by_severity, record.severity, artifact_id)
+        for cef_key, cef_value in (artifact.get("cef") or {}).items():
+            _add_to_index(self._by_cef_key, cef_key, artifact_id)
+            try:
+                _add_to_index(self._by_cef_value, (cef_key, cef_value), artifact_id)
+            except TypeError:
+                # unhashable values such as lists can only be found by CEF key
+                pass
+        return record
+
+    def add_many(
+        self, artifacts: Iterable[Artifact], container: Any, first_id: int
+    ) -> Tuple[List[Tuple[int, bool]], int]:
+        """Bulk insertion path. Artifacts that duplicate an already stored artifact (or an earlier artifact of the
+        same batch) are not inserted and resolve to the ID of the stored artifact.
+
+        Args:
+            artifacts (Iterable[Artifact]): artifacts to insert
+            container (Any): container used for artifacts that do not name one
+            first_id (int): ID of the first inserted artifact
+
+        Returns:
+            Tuple[List[Tuple[int, bool]], int]: (artifact ID, whether it was inserted) per artifact and the next free ID
+        """
+        next_id = first_id
+        results = []
+        for artifact in artifacts:
+            artifact_container = artifact_container_of(artifact, container)
+            existing_id = self.find_duplicate(artifact, artifact_container)
+            if existing_id is not None:
+                results.append((existing_id, False))
+                continue
+            self.add(next_id, artifact, artifact_container)
+            results.append((next_id, True))
+            next_id += 1
+        return results, next_id
+
+    def query(
+        self,
+        container: Any = None,
+        source_data_identifier: Optional[str] = None,
+        label: Optional[str] = None,
+        severity: Optional[str] = None,
+        cef_key: Optional[str] = None,
+        cef: Optional[Dict[str, Any]] = None,
+    ) -> List[Artifact]:
+        """Returns the artifacts matching all given filters in insertion order.
+
+        Args:
+            container (Any, optional): container ID
+            source_data_identifier (Optional[str], optional): source data identifier
+            label (Optional[str], optional): artifact label
+            severity (Optional[str], optional): artifact severity
+            cef_key (Optional[str], optional): CEF key the artifact must contain
+            cef (Optional[Dict[str, Any]], optional): CEF key/value pairs the artifact must contain
+
+        Returns:
+            List[Artifact]: matching artifacts
+        """
+        return [self._records[record_id].artifact for record_id in self._query_ids(
+            container, source_data_identifier, label, severity, cef_key, cef
+        )]
+
+    def count(self, **filters) -> int:
+        return sum(1 for _ in self._query_ids(**filters))
+
+    def _query_ids(
+        self,
+        container: Any = None,
+        source_data_identifier: Optional[str] = None,
+        label: Optional[str] = None,
+        severity: Optional[str] = None,
+        cef_key: Optional[str] = None,
+        cef: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[int]:
+        candidate_sets: List[Dict[int, None]] = []
+        if container is not None:
+            candidate_sets.append(self._by_container.get(_container_key(container), {}))
+        if source_data_identifier is not None:
+            candidate_sets.append(self._by_source_data_identifier.get(str(source_data_identifier), {}))
+        if label is not None:
+            candidate_sets.append(self._by_label.get(label, {}))
+        if severity is not None:
+            candidate_sets.append(self._by_severity.get(severity, {}))
+        if cef_key is not None:
+            candidate_sets.append(self._by_cef_key.get(cef_key, {}))
+        for key, value in (cef or {}).items():
+            try:
+                candidate_sets.append(self._by_cef_value.get((key, value), {}))
+            except TypeError:
+                candidate_sets.append({
+                    record_id: None
+                    for record_id in self._by_cef_key.get(key, {})
+                    if self._records[record_id].artifact["cef"][key] == value
+                })
+
+        if not candidate_sets:
+            return iter(list(self._records))
+        return _intersect(candidate_sets)
+
+    def clear(self):
+        self._records.clear()
+        self._first_by_identifier.clear()
+        for index in (
+            self._by_container,
+            self._by_source_data_identifier,
+            self._by_label,
+            self._by_severity,
+            self._by_cef_key,
+            self._by_cef_value,
+        ):
+            index.clear()
+
+
+def artifact_container_of(artifact: Artifact, default: Any) -> Any:
+    """Returns the container an artifact is saved to, falling back to default."""
+    container = artifact.get("container_id", artifact.get("container"))
+    return default if container is None else container
+
+
+class ContainerRecord:
+    """Saved container together with the fields the ContainerStore indexes."""
+
+    __slots__ = ("id", "source_data_identifier", "label", "status", "container")
+
+    def __init__(self, container_id: int, container: dict):
+        self.id = container_id
+        self.source_data_identifier = container.get("source_data_identifier")
+        self.label = container.get("label")
+        self.status = container.get("status")
+        self.container = container
+
+    def __repr__(self) -> str:
+        return f"ContainerRecord(id={self.id}, label={self.label}, status={self.status})"
+
+
+class ContainerStore:
+    """In-memory store of the containers saved by a connector, indexed by ID, source_data_identifier, label and status."""
+
+    def __init__(self):
+        self._records: Dict[int, ContainerRecord] = {}
+        self._by_source_data_identifier: Dict[str, int] = {}
+        self._by_label: Index = {}
+        self._by_status: Index = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[dict]:
+        return (record.container for record in self._records.values())
+
+    def __contains__(self, container_id: Any) -> bool:
+        return self._normalize_id(container_id) in self._records
+
+    @staticmethod
+    def _normalize_id(container_id: Any) -> Any:
+        try:
+            return int(container_id)
+        except (TypeError, ValueError):
+            return container_id
+
+    def get(self, container_id: Any) -> Optional[dict]:
+        record = self._records.get(self._normalize_id(container_id))
+        return record.container if record else None
+
+    def records(self) -> List[ContainerRecord]:
+        return list(self._records.values())
+
+    def find_duplicate(self, container: dict) -> Optional[int]:
+        """Returns the ID of a container with the same source_data_identifier, if any."""
+        source_data_identifier = container.get("source_data_identifier")
+        if source_data_identifier is None:
+            return None
+        return self._by_source_data_identifier.get(str(source_data_identifier))
+
+    def add(self, container_id: int, container: dict) -> ContainerRecord:
+        """Stores the container info, without embedded artifacts, under container_id.
+
+        Args:
+            container_id (int): ID of the container
+            container (dict): container as passed to save_container
+
+        Returns:
+            ContainerRecord: the stored record
+        """
+        info = {key: value for key, value in container.items() if key != "artifacts"}
+        info["id"] = container_id
+        info.setdefault("status", "new")
+        record = ContainerRecord(container_id, info)
+        self._records[container_id] = record
+
+        if record.source_data_identifier is not None:
+            self._by_source_data_identifier.setdefault(str(record.source_data_identifier), container_id)
+        if record.label is not None:
+            _add_to_index(self._by_label, record.label, container_id)
+        _add_to_index(self._by_status, record.status, container_id)
+        return record
+
+    def next_free_id(self, container_id: int) -> int:
+        while container_id in self._records:
+            container_id += 1
+        return container_id
+
+    def query(
+        self,
+        source_data_identifier: Optional[str] = None,
+        label: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> List[dict]:
+        """Returns the containers matching all given filters in insertion order."""
+        return [self._records[record_id].container for record_id in self._query_ids(source_data_identifier, label, status)]
+
+    def count(self, **filters) -> int:
+        return sum(1 for _ in self._query_ids(**filters))
+
+    def _query_ids(
+        self,
+        source_data_identifier: Optional[str] = None,
+        label: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> Iterator[int]:
+        candidate_sets: List[Dict[int, None]] = []
+        if source_data_identifier is not None:
+            container_id = self._by_source_data_identifier.get(str(source_data_identifier))
+            candidate_sets.append({} if container_id is None else {container_id: None})
+        if label is not None:
+            candidate_sets.append(self._by_label.get(label, {}))
+        if status is not None:
+            candidate_sets.append(self._by_status.get(status, {}))
+
+        if not candidate_sets:
+            return iter(list(self._records))
+        return _intersect(candidate_sets)
+
+    def clear(self):
+        self._records.clear()
+        self._by_source_data_identifier.clear()
+        self._by_label.clear()
+        self._by_status.clear()
@@ -0,0 +1,152 @@
+import asyncio
+import asyncio.base_events
+import datetime
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from phantom.instrumentation import ACTION, PlatformCall, PlatformHook, install_hook, uninstall_hook
+
+from .clock import VirtualClock
+
+_real_sleep = time.sleep
+_real_time = time.time
+_real_monotonic = time.monotonic
+_real_asyncio_sleep = asyncio.sleep
+_real_datetime = datetime.datetime
+
+
+class _DatetimeMeta(type):
+    def __instancecheck__(cls, instance):
+        return isinstance(instance, _real_datetime)
+
+    def __subclasscheck__(cls, subclass):
+        return issubclass(subclass, _real_datetime)
+
+
+class ActionTime(NamedTuple):
+    connector: Any
+    action: str
+    elapsed: float
+
+
+class VirtualTime(PlatformHook):
+    """Replaces time.sleep, time.time, time.monotonic, datetime.datetime.now/utcnow and asyncio.sleep with versions
+    running on a VirtualClock while it is installed. Sleeping advances the clock instantly, and the simulated time
+    taken by every connector run is recorded in actions.
+
+    Only module attributes are patched: code that imported the functions directly (from time import sleep) before
+    the virtual time was installed keeps using the real ones.
+
+    Args:
+        start (Optional[datetime.datetime], optional): simulated wall clock time the clock starts at. Defaults to now.
+        clock (Optional[VirtualClock], optional): clock to run on. Defaults to a new clock.
+    """
+
+    def __init__(self, start: Optional[datetime.datetime] = None, clock: Optional[VirtualClock] = None):
+        self.clock = clock or VirtualClock()
+        self.epoch = (start.timestamp() if start is not None else _real_time()) - self.clock.start
+        self.monotonic_offset = _real_monotonic() - self.clock.start
+        self.actions: List[ActionTime] = []
+        self._started: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._patches: List[tuple] = []
+
+    # time functions running on the clock
+
+    def time(self) -> float:
+        return self.epoch + self.clock.now()
+
+    def time_ns(self) -> int:
+        return int(self.time() * 1_000_000_000)
+
+    def monotonic(self) -> float:
+        return self.monotonic_offset + self.clock.now()
+
+    def monotonic_ns(self) -> int:
+        return int(self.monotonic() * 1_000_000_000)
+
+    def sleep(self, seconds: float):
+        if seconds < 0:
+            raise ValueError("sleep length must be non-negative")
+        self.clock.advance(seconds)
+        # still let other threads run, e.g. for polling loops waiting on a worker thread
+        _real_sleep(0)
+
+    async def asyncio_sleep(self, delay: float, result=None):
+        self.clock.advance(max(delay, 0))
+        return await _real_asyncio_sleep(0, result)
+
+    def datetime_class(self) -> type:
+        virtual_time = self
+
+        class VirtualDatetime(_real_datetime, metaclass=_DatetimeMeta):
+            """datetime.datetime with now, utcnow and today running on the virtual clock. They return plain
+            datetime.datetime instances."""
+
+            @classmethod
+            def now(cls, tz=None):
+                return _real_datetime.fromtimestamp(virtual_time.time(), tz)
+
+            @classmethod
+            def utcnow(cls):
+                return _real_datetime.fromtimestamp(virtual_time.time(), datetime.timezone.utc).replace(tzinfo=None)
+
+            @classmethod
+            def today(cls):
+                return cls.now()
+
+        return VirtualDatetime
+
+    @property
+    def elapsed(self) -> float:
+        """Simulated time passed since the virtual time was created."""
+        return self.clock.elapsed()
+
+    def action_elapsed(self, action: Optional[str] = None) -> float:
+        """Returns the simulated time taken by the recorded connector runs, optionally only of one action."""
+        return sum(record.elapsed for record in self.actions if action is None or record.action == action)
+
+    # hook recording the simulated time of every connector run
+
+    def enter(self, call: PlatformCall):
+        if call.api == ACTION:
+            with self._lock:
+                self._started[id(call)] = self.clock.now()
+
+    def exit(self, call: PlatformCall):
+        if call.api == ACTION:
+            with self._lock:
+                started = self._started.pop(id(call))
+            action = getattr(call.connector, "action_identifier", "") or ""
+            self.actions.append(ActionTime(call.connector, action, self.clock.latest() - started))
+
+    def _patch(self, target: Any, name: str, value: Any):
+        self._patches.append((target, name, getattr(target, name)))
+        setattr(target, name, value)
+
+    def install(self):
+        """Patches the time functions and starts recording connector runs."""
+        self._patch(time, "sleep", self.sleep)
+        self._patch(time, "time", self.time)
+        self._patch(time, "time_ns", self.time_ns)
+        self._patch(time, "monotonic", self.monotonic)
+        self._patch(time, "monotonic_ns", self.monotonic_ns)
+        self._patch(asyncio, "sleep", self.asyncio_sleep)
+        self._patch(datetime, "datetime", self.datetime_class())
+        # event loops schedule their callbacks on the real monotonic clock
+        self._patch(asyncio.base_events.BaseEventLoop, "time", lambda loop: _real_monotonic())
+        install_hook(self)
+
+    def uninstall(self):
+        uninstall_hook(self)
+        while self._patches:
+            target, name, original = self._patches.pop()
+            setattr(target, name, original)
+
+    def __enter__(self) -> "VirtualTime":
+        self.install()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.uninstall()
@@ -4,6 +4,8 @@ import pytest
 
 from tests.my_dns_app.my_dns_app_connector import MyDNSConnector
 
+pytest_plugins = ("pytester",)
+
 
 @pytest.fixture()
 def my_dns_connector():
@@ -0,0 +1,97 @@
+import datetime
+import json
+import logging
+
+from phantom.action_result import (
+    ActionResult,
+    StreamingData,
+    iter_action_results_json,
+    json_default,
+)
+
+
+def test_add_data():
+    action_result = ActionResult({"ip": "8.8.8.8"})
+    action_result.add_data({"in_ip": "8.8.8.8"})
+
+    assert action_result.get_data() == [{"in_ip": "8.8.8.8"}]
+    assert action_result.get_data_size() == 1
+
+
+def test_streaming_add_data_spills_to_disk():
+    action_result = ActionResult({})
+    action_result.enable_streaming(spill_threshold=10)
+
+    for i in range(25):
+        action_result.add_data({"row": i})
+
+    data = action_result.get_data()
+    assert isinstance(data, StreamingData)
+    assert data.spilled_count() == 22
+    assert action_result.get_data_size() == 25
+    assert data[0] == {"row": 0}
+    assert data[-1] == {"row": 24}
+    assert data[20:22] == [{"row": 20}, {"row": 21}]
+    assert [row["row"] for row in data] == list(range(25))
+
+
+def test_streaming_get_dict_serializes():
+    action_result = ActionResult({"ip": "8.8.8.8"})
+    action_result.add_data({"row": 0})
+    action_result.enable_streaming(spill_threshold=1)
+    action_result.update_data([{"row": 1}, {"row": 2}])
+
+    result_dict = json.loads(json.dumps(action_result.get_dict(), default=json_default))
+
+    assert result_dict["data"] == [{"row": 0}, {"row": 1}, {"row": 2}]
+
+
+def test_streaming_data_compares_equal_to_rows():
+    action_result = ActionResult({})
+    action_result.enable_streaming(spill_threshold=1)
+    action_result.update_data([{"a": 1}, {"a": 2}])
+
+    assert action_result.get_data() == [{"a": 1}, {"a": 2}]
+    assert action_result.get_data() == ({"a": 1}, {"a": 2})
+    assert action_result.get_data() != [{"a": 1}]
+    assert json.dumps(action_result.get_dict()) == json.dumps(
+        {"context": {}, "data": [{"a": 1}, {"a": 2}], "extra_data": [], "message": "", "parameter": {}, "summary": {}}
+    )
+
+
+def test_streaming_spill_keeps_rows_intact():
+    rows = [{"ts": datetime.datetime(2024, 1, 1), "pair": (1, 2)}, {"pair": (3, 4)}]
+    data = StreamingData(spill_threshold=0)
+    data.extend(rows)
+
+    assert data.spilled_count() == 2
+    assert data[0] == rows[0]
+    assert list(data) == rows
+
+
+def test_streaming_add_data_logs_only_new_item(caplog):
+    action_result = ActionResult({})
+    action_result.enable_streaming()
+    action_result.add_data({"row": 0})
+
+    with caplog.at_level(logging.INFO, logger="phantom.action_result"):
+        action_result.add_data({"row": 1})
+
+    assert "'row': 1" in caplog.text
+    assert "'row': 0" not in caplog.text
+
+
+def test_iter_action_results_json_matches_json_dumps():
+    streaming_result = ActionResult({"ip": "1.1.1.1"})
+    streaming_result.enable_streaming(spill_threshold=5)
+    streaming_result.update_data({"row": i, "tags": ["a", "b"]} for i in range(20))
+    streaming_result.set_status(True, "done")
+    plain_result = ActionResult({"ip": "8.8.8.8"})
+    plain_result.update_summary({"total": 1})
+    results = [streaming_result, plain_result]
+
+    chunks = list(iter_action_results_json(results, chunk_size=64))
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == json.dumps([r.get_dict() for r in results], default=json_default)
+    assert "".join(iter_action_results_json([])) == "[]"
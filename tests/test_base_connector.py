@@ -1,10 +1,16 @@
 # pylint: disable=protected-access
 
+import asyncio
+import io
 import json
 import logging
+import os
+import threading
+import time
 from datetime import datetime
 
 import phantom
+from phantom import base_connector
 from phantom.action_result import ActionResult
 from pytest_splunk_soar_connectors.models import Artifact
 from src.pytest_splunk_soar_connectors.models import InputJSON
@@ -250,8 +256,48 @@ def test_get_container_id(my_dns_connector: MyDNSConnector) -> None:
 
 
 def test_get_container_info(my_dns_connector: MyDNSConnector) -> None:
-    _, info, _ = my_dns_connector.get_container_info(container_id=123)
-    assert info.get("container_info_would_go_here")
+    success, info, _ = my_dns_connector.get_container_info(container_id=123)
+    assert success
+    assert info.get("id") == 123
+
+
+def test_get_container_info_unknown(my_dns_connector: MyDNSConnector) -> None:
+    success, info, status_code = my_dns_connector.get_container_info(container_id=999)
+    assert not success
+    assert info == {}
+    assert status_code == "404"
+
+
+def test_save_container_with_artifacts(my_dns_connector: MyDNSConnector) -> None:
+    container = {
+        "name": "Incident 1",
+        "label": "incident",
+        "source_data_identifier": "incident-1",
+        "artifacts": [{"name": "ip", "cef": {"sourceAddress": "8.8.8.8"}, "source_data_identifier": "a1"}],
+    }
+
+    _, message, container_id = my_dns_connector.save_container(container)
+    _, duplicate_message, duplicate_id = my_dns_connector.save_container(
+        {**container, "artifacts": [{"name": "ip", "source_data_identifier": "a2"}]}
+    )
+
+    assert message == "Container saved"
+    assert duplicate_message == "Duplicate container found"
+    assert duplicate_id == container_id
+    _, info, _ = my_dns_connector.get_container_info(container_id)
+    assert info["label"] == "incident"
+    assert "artifacts" not in info
+    assert my_dns_connector.artifact_store.count(container=container_id) == 2
+
+
+def test_save_containers(my_dns_connector: MyDNSConnector) -> None:
+    containers = [{"name": f"Incident {i}", "label": "incident", "source_data_identifier": f"i{i % 3}"} for i in range(5)]
+
+    status, _, results = my_dns_connector.save_containers(containers)
+
+    assert status
+    assert [r[1] for r in results].count("Duplicate container found") == 2
+    assert my_dns_connector.container_store.count(label="incident") == 3
 
 
 def test_get_current_param(my_dns_connector: MyDNSConnector) -> None:
@@ -348,3 +394,339 @@ def test_get_status_message(my_dns_connector: MyDNSConnector) -> None:
 
     my_dns_connector.set_status(phantom.APP_ERROR, "fail")
     assert my_dns_connector.get_status_message() == "fail"
+
+
+def test_load_app_json_is_cached_across_instances(monkeypatch) -> None:
+    base_connector.clear_app_json_cache()
+    MyDNSConnector()._load_app_json()
+
+    parse_calls = MagicMock(side_effect=AssertionError("app JSON should not be parsed again"))
+    monkeypatch.setattr(base_connector.BaseConnector, "_is_app_json", parse_calls)
+
+    conn = MyDNSConnector()
+    assert conn._load_app_json() == phantom.APP_SUCCESS
+    assert conn.get_app_id() == "876ab991-313e-48e7-bccd-e8c9650c239d"
+
+
+def test_load_app_json_cache_invalidated_on_change() -> None:
+    base_connector.clear_app_json_cache()
+    MyDNSConnector()._load_app_json()
+
+    cache_key = next(iter(base_connector._APP_JSON_CACHE))
+    json_file, _, app_json = base_connector._APP_JSON_CACHE[cache_key]
+    base_connector._APP_JSON_CACHE[cache_key] = (json_file, (0, 0), {"appid": "stale"})
+
+    conn = MyDNSConnector()
+    conn._load_app_json()
+
+    assert conn.get_app_id() == app_json["appid"]
+    assert base_connector._APP_JSON_CACHE[cache_key][2]["appid"] != "stale"
+
+
+def test_scan_main_module(tmp_path) -> None:
+    app_json = tmp_path / "app.json"
+    app_json.write_text(json.dumps({"fixture": "x" * 200000, "main_module": "my_connector.py"}))
+    fixture_json = tmp_path / "fixture.json"
+    fixture_json.write_text(json.dumps([{"value": i} for i in range(1000)]))
+
+    assert base_connector._scan_main_module(str(app_json)) == "my_connector.py"
+    assert base_connector._scan_main_module(str(fixture_json)) is None
+
+
+class SlowLookupConnector(MyDNSConnector):
+    def __init__(self):
+        super().__init__()
+        self.initialize_threads = []
+
+    def initialize(self):
+        self.initialize_threads.append(threading.get_ident())
+
+    def handle_action(self, param):
+        # Later parameters finish first so that completion order differs from parameter order
+        time.sleep(0.01 * (5 - int(param["ip"].split(".")[-1])))
+        self.save_progress(f"looked up {param['ip']}")
+        return super().handle_action(param)
+
+
+def test_handle_action_parallel_parameters_keep_order() -> None:
+    conn = SlowLookupConnector()
+    conn.parameter_workers = 3
+
+    in_json: InputJSON = {
+        "action": "lookup ip",
+        "identifier": "forward_lookup",
+        "config": {},
+        "parameters": [{"ip": f"10.0.0.{i}"} for i in range(5)],
+        "environment_variables": {},
+    }
+
+    action_result = json.loads(conn._handle_action(json.dumps(in_json), None))
+
+    assert [r["data"][0]["in_ip"] for r in action_result] == [f"10.0.0.{i}" for i in range(5)]
+    assert len(conn._BaseConnector__progress) == 5
+    assert len(conn.initialize_threads) == len(set(conn.initialize_threads)) <= 3
+
+
+class MixedOutcomeConnector(MyDNSConnector):
+    def handle_action(self, param):
+        # earlier parameters finish last
+        time.sleep(0.01 * (3 - param["index"]))
+        return param["ok"]
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+@pytest.mark.parametrize("outcomes", [[False, True, True], [True, True, False], [False, False, True]])
+def test_handle_action_status_follows_last_parameter(workers, outcomes) -> None:
+    conn = MixedOutcomeConnector()
+    conn.parameter_workers = workers
+
+    in_json: InputJSON = {
+        "action": "lookup ip",
+        "identifier": "forward_lookup",
+        "config": {},
+        "parameters": [{"index": i, "ok": ok} for i, ok in enumerate(outcomes)],
+        "environment_variables": {},
+    }
+    conn._handle_action(json.dumps(in_json), None)
+
+    assert conn.get_status() is outcomes[-1]
+
+
+def test_handle_action_serial_initializes_per_parameter() -> None:
+    conn = SlowLookupConnector()
+
+    in_json: InputJSON = {
+        "action": "lookup ip",
+        "identifier": "forward_lookup",
+        "config": {},
+        "parameters": [{"ip": "10.0.0.3"}, {"ip": "10.0.0.4"}],
+        "environment_variables": {},
+    }
+
+    conn._handle_action(json.dumps(in_json), None)
+
+    assert len(conn.initialize_threads) == 2
+
+
+class AsyncLookupConnector(base_connector.AsyncBaseConnector):
+    def __init__(self):
+        super().__init__()
+        self.initialize_calls = 0
+        self.running = 0
+        self.max_running = 0
+
+    async def initialize(self):
+        self.initialize_calls += 1
+
+    async def handle_action(self, param):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.001 * (20 - int(param["ip"].split(".")[-1])))
+        self.running -= 1
+
+        action_result = self.add_action_result(ActionResult(dict(param)))
+        action_result.add_data({"in_ip": param["ip"]})
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+
+def _lookup_input(count: int) -> InputJSON:
+    return {
+        "action": "lookup ip",
+        "identifier": "forward_lookup",
+        "config": {},
+        "parameters": [{"ip": f"10.0.0.{i}"} for i in range(count)],
+        "environment_variables": {},
+    }
+
+
+def test_async_connector_handle_action() -> None:
+    conn = AsyncLookupConnector()
+    conn.concurrency_limit = 4
+
+    action_result = json.loads(conn._handle_action(json.dumps(_lookup_input(20)), None))
+
+    assert [r["data"][0]["in_ip"] for r in action_result] == [f"10.0.0.{i}" for i in range(20)]
+    assert conn.initialize_calls == 1
+    assert 1 < conn.max_running <= 4
+    assert conn.get_status()
+
+
+def test_soar_run_action_reuses_event_loop(soar_run_action, soar_event_loop) -> None:
+    conn = AsyncLookupConnector()
+
+    action_result = soar_run_action(conn, _lookup_input(3))
+
+    assert conn.event_loop is soar_event_loop
+    assert not soar_event_loop.is_closed()
+    assert len(action_result) == 3
+
+
+def test_soar_run_action_sync_connector(soar_run_action, my_dns_connector: MyDNSConnector) -> None:
+    action_result = soar_run_action(my_dns_connector, _lookup_input(2))
+
+    assert action_result[1]["data"][0]["in_ip"] == "10.0.0.1"
+
+
+def test_handle_action_to_file(my_dns_connector: MyDNSConnector) -> None:
+    out = io.StringIO()
+
+    ret_val = my_dns_connector._handle_action_to_file(json.dumps(_lookup_input(3)), None, out)
+
+    assert ret_val is None
+    assert [r["data"][0]["in_ip"] for r in json.loads(out.getvalue())] == ["10.0.0.0", "10.0.0.1", "10.0.0.2"]
+
+
+def test_save_state_is_written_back_once(my_dns_connector: MyDNSConnector) -> None:
+    for page in range(20):
+        my_dns_connector.save_state({"page": page})
+
+    assert my_dns_connector.get_state_write_counts()["state_file"] == 0
+    assert my_dns_connector.load_state() == {"page": 19}
+
+    my_dns_connector._handle_action(json.dumps(_lookup_input(1)), None)
+
+    assert my_dns_connector.get_state_write_counts()["state_file"] == 1
+    with open(my_dns_connector.state_file_location, encoding="utf-8") as state_file:
+        assert json.load(state_file) == {"page": 19}
+
+
+class FailingIngestConnector(MyDNSConnector):
+    def handle_action(self, param):
+        self.save_state({"last_page": 7})
+        raise RuntimeError("ingestion failed")
+
+
+def test_save_state_is_flushed_when_handle_action_raises() -> None:
+    conn = FailingIngestConnector()
+
+    with pytest.raises(RuntimeError, match="ingestion failed"):
+        conn._handle_action(json.dumps(_lookup_input(1)), None)
+
+    assert conn.get_state_write_counts()["state_file"] == 1
+    with open(conn.state_file_location, encoding="utf-8") as state_file:
+        assert json.load(state_file) == {"last_page": 7}
+
+
+def test_save_state_without_write_back(my_dns_connector: MyDNSConnector) -> None:
+    my_dns_connector.state_write_back = False
+
+    my_dns_connector.save_state({"first": 1})
+    my_dns_connector.save_state({"second": 2})
+
+    assert my_dns_connector.get_state_write_counts()["state_file"] == 2
+    assert not my_dns_connector.flush_state()
+    assert my_dns_connector.load_state() == {"first": 1, "second": 2}
+
+
+def test_save_state_journal_is_replayed(my_dns_connector: MyDNSConnector) -> None:
+    my_dns_connector.state_journal = True
+    my_dns_connector.save_state({"first": 1})
+    my_dns_connector.flush_state()
+    my_dns_connector.save_state({"second": 2})
+    my_dns_connector.save_state({"first": 3})
+
+    # a new run on the same state file that never saw the unflushed deltas
+    conn = MyDNSConnector()
+    conn.state_file_location = my_dns_connector.state_file_location
+
+    assert conn.load_state() == {"first": 3, "second": 2}
+    assert my_dns_connector.get_state_write_counts() == {"state_file": 1, "journal": 3}
+
+
+def test_save_artifact_detects_duplicates(my_dns_connector: MyDNSConnector) -> None:
+    artifact = {"name": "ip", "label": "event", "cef": {"sourceAddress": "8.8.8.8"}, "source_data_identifier": "1"}
+
+    _, first_message, first_id = my_dns_connector.save_artifact(artifact)
+    _, second_message, second_id = my_dns_connector.save_artifact(dict(artifact))
+    _, _, batch_ids = my_dns_connector.save_artifacts([dict(artifact), {**artifact, "source_data_identifier": "2"}])
+
+    assert first_message == "Artifact saved"
+    assert second_message == "Artifact already exists"
+    assert first_id == second_id == batch_ids[0]
+    assert batch_ids[1] != first_id
+    assert my_dns_connector.artifact_store.count(container=my_dns_connector.get_container_id()) == 2
+
+
+def test_reset_restores_pristine_run_state(my_dns_connector: MyDNSConnector) -> None:
+    in_json: InputJSON = {
+        "action": "lookup ip",
+        "identifier": "forward_lookup",
+        "config": {},
+        "parameters": [{"ip": "8.8.8.8"}],
+        "environment_variables": {},
+    }
+    my_dns_connector._handle_action(json.dumps(in_json), None)
+    my_dns_connector.save_artifacts([{"name": "ip", "cef": {"sourceAddress": "8.8.8.8"}, "source_data_identifier": "1"}])
+    my_dns_connector.save_state({"last": 1})
+    my_dns_connector.flush_state()
+    my_dns_connector.save_progress("working")
+    my_dns_connector.summary["count"] = 1
+    state_file_location = my_dns_connector.state_file_location
+    state_dir = my_dns_connector.get_state_dir()
+    app_json = my_dns_connector._BaseConnector__app_json
+
+    my_dns_connector.reset()
+
+    assert my_dns_connector.get_action_results() == []
+    assert my_dns_connector.get_status() is False
+    assert my_dns_connector.get_status_message() == ""
+    assert my_dns_connector.get_action_identifier() == ""
+    assert my_dns_connector.get_state() is None
+    assert my_dns_connector.summary == {}
+    assert my_dns_connector._BaseConnector__progress == []
+    assert len(my_dns_connector.artifact_store) == 0
+    assert list(my_dns_connector.container_store) == [MyDNSConnector().container_store.get(123)]
+    assert my_dns_connector.get_state_write_counts() == {"state_file": 0, "journal": 0}
+    # temporary paths and the app JSON are reused
+    assert my_dns_connector.state_file_location == state_file_location
+    assert my_dns_connector.get_state_dir() == state_dir
+    assert my_dns_connector._BaseConnector__app_json is app_json
+    assert not os.path.exists(state_file_location)
+    assert os.listdir(state_dir) == []
+
+
+def test_reset_connector_runs_again(my_dns_connector: MyDNSConnector) -> None:
+    in_json: InputJSON = {
+        "action": "lookup ip",
+        "identifier": "forward_lookup",
+        "config": {},
+        "parameters": [{"ip": "8.8.8.8"}],
+        "environment_variables": {},
+    }
+    first = my_dns_connector._handle_action(json.dumps(in_json), None)
+    my_dns_connector.reset()
+    in_json["parameters"] = [{"ip": "1.1.1.1"}]
+    second = json.loads(my_dns_connector._handle_action(json.dumps(in_json), None))
+
+    assert json.loads(first)[0]["data"][0]["in_ip"] == "8.8.8.8"
+    assert len(second) == 1
+    assert second[0]["data"][0]["in_ip"] == "1.1.1.1"
+    assert os.path.isdir(my_dns_connector.get_state_dir()) is False
+
+
+def test_soar_connector_reuses_pooled_connectors(pytester) -> None:
+    pytester.makepyfile(
+        """
+        import pytest
+
+        from tests.my_dns_app.my_dns_app_connector import MyDNSConnector
+
+        CONFIG = {"dns_server": "8.8.8.8", "host_name": "splunk.com"}
+        seen = []
+
+        @pytest.mark.parametrize("ip", ["8.8.8.8", "1.1.1.1", "9.9.9.9"])
+        def test_lookup(soar_connector, soar_connector_pool, ip):
+            conn = soar_connector(MyDNSConnector, CONFIG)
+            assert conn.get_config() == CONFIG
+            assert conn.get_action_results() == []
+            conn.summary["ip"] = ip
+            conn.config["dns_server"] = "changed"
+            seen.append(conn)
+
+        def test_pool_statistics(soar_connector_pool):
+            assert len(set(map(id, seen))) == 1
+            assert (soar_connector_pool.created, soar_connector_pool.reused) == (1, 2)
+        """
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=4)
@@ -0,0 +1,113 @@
+import json
+import os
+import pathlib
+
+import pytest
+
+from pytest_splunk_soar_connectors.benchmark import (
+    BenchmarkResult,
+    BenchmarkSession,
+    percentile,
+    run_benchmark,
+    shorten_name,
+)
+from pytest_splunk_soar_connectors.models import InputJSON
+from tests.conftest import MyDNSConnector
+
+PROJECT_PATH = pathlib.Path(__file__).parent.parent
+
+LOOKUP_INPUT: InputJSON = {
+    "action": "lookup ip",
+    "identifier": "forward_lookup",
+    "config": {},
+    "parameters": [{"ip": "8.8.8.8"}, {"ip": "1.1.1.1"}],
+    "environment_variables": {},
+}
+
+
+def test_percentile():
+    assert percentile([4.0, 1.0, 3.0, 2.0], 50) == 2.5
+    assert percentile([1.0, 2.0, 3.0], 100) == 3.0
+    assert percentile([], 99) == 0.0
+
+
+def test_shorten_name_keeps_test_name():
+    node_id = "tests/integration/connectors/test_my_dns_connector.py::test_lookup_ip[8.8.8.8]"
+
+    assert shorten_name("tests/test_a.py::test_a") == "tests/test_a.py::test_a"
+    assert shorten_name(node_id) == "tests/integration/conn...::test_lookup_ip[8.8.8.8]"
+    assert len(shorten_name(node_id)) == 50
+    assert shorten_name("x" * 30 + "::" + "y" * 60, width=20) == "x" * 9 + "..." + "y" * 8
+
+
+def test_run_benchmark():
+    result = run_benchmark(MyDNSConnector, LOOKUP_INPUT, "lookup", rounds=5, warmup=1)
+
+    assert result.rounds == 5
+    assert len(result.phase_times["handle_action"]) == 5
+    assert result.min <= result.p50 <= result.p99
+    assert result.phase_mean("handle_action") <= result.mean
+    assert result.actions_per_second > 0
+
+
+def test_soar_benchmark_fixture(soar_benchmark):
+    result = soar_benchmark(MyDNSConnector, LOOKUP_INPUT, rounds=3, warmup=0)
+
+    assert result.rounds == 3
+    assert result.name.endswith("test_soar_benchmark_fixture")
+
+
+def test_benchmark_session_detects_regression(tmp_path):
+    baseline_path = tmp_path / "baseline.json"
+    baseline_path.write_text(json.dumps({"slow": {"p50": 0.001}, "fast": {"p50": 1.0}}))
+    session = BenchmarkSession(baseline_path, threshold=0.2, save=False)
+
+    assert session.record(BenchmarkResult("slow", latencies=[0.002])) is not None
+    assert session.record(BenchmarkResult("fast", latencies=[0.5])) is None
+    assert session.record(BenchmarkResult("new", latencies=[0.5])) is None
+
+
+def test_benchmark_session_saves_baseline(tmp_path):
+    baseline_path = tmp_path / "baseline.json"
+    session = BenchmarkSession(baseline_path, threshold=0.2, save=True)
+    session.record(BenchmarkResult("lookup", latencies=[0.1, 0.3]))
+    # written by another run after this session read the baseline
+    baseline_path.write_text(json.dumps({"other": {"p50": 1.0}}))
+
+    session.save_baseline()
+
+    baseline = json.loads(baseline_path.read_text())
+    assert baseline["lookup"]["p50"] == pytest.approx(0.2)
+    assert baseline["other"] == {"p50": 1.0}
+
+
+def test_benchmark_results_of_xdist_workers(pytester, monkeypatch):
+    pytest.importorskip("xdist")
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join([str(PROJECT_PATH), str(PROJECT_PATH / "src")]))
+    pytester.makepyfile(
+        """
+        import pytest
+
+        from tests.my_dns_app.my_dns_app_connector import MyDNSConnector
+
+        LOOKUP_INPUT = {
+            "action": "lookup ip",
+            "identifier": "forward_lookup",
+            "config": {},
+            "parameters": [{"ip": "8.8.8.8"}],
+            "environment_variables": {},
+        }
+
+        @pytest.mark.parametrize("case", range(4))
+        def test_lookup(soar_benchmark, case):
+            soar_benchmark(MyDNSConnector, LOOKUP_INPUT, rounds=2, warmup=0, name=f"lookup {case}")
+        """
+    )
+
+    result = pytester.runpytest_subprocess("-p", "xdist", "-n", "2", "--soar-benchmark-save")
+
+    result.assert_outcomes(passed=4)
+    summary = result.stdout.str().split("soar benchmark", 1)[1]
+    assert all(f"lookup {case} " in summary for case in range(4))
+    baseline = json.loads((pytester.path / ".soar-benchmark.json").read_text())
+    assert sorted(baseline) == ["lookup 0", "lookup 1", "lookup 2", "lookup 3"]
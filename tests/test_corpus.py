@@ -0,0 +1,111 @@
+import io
+import json
+
+import pytest
+
+import phantom.app as phantom
+from phantom.action_result import ActionResult
+from phantom.base_connector import BaseConnector
+from pytest_splunk_soar_connectors.corpus import discover_inputs, load_connector_class, main, run_corpus, run_input
+from pytest_splunk_soar_connectors.models import InputJSON
+
+CONNECTOR = "tests.test_corpus:EchoConnector"
+
+
+class EchoConnector(BaseConnector):
+    def initialize(self):
+        return phantom.APP_SUCCESS
+
+    def handle_action(self, param):
+        if param.get("raise"):
+            raise RuntimeError("upstream unavailable")
+        action_result = self.add_action_result(ActionResult(dict(param)))
+        action_result.add_data({"echo": param["value"], "prefix": self.get_config().get("prefix")})
+        return action_result.set_status(phantom.APP_SUCCESS if param["value"] >= 0 else phantom.APP_ERROR)
+
+
+def echo_input(value: int, **param) -> InputJSON:
+    return {
+        "action": "echo",
+        "identifier": "echo",
+        "config": {"prefix": "corpus"},
+        "parameters": [{"value": value, **param}],
+        "environment_variables": {},
+    }
+
+
+@pytest.fixture()
+def corpus(tmp_path):
+    (tmp_path / "nested").mkdir()
+    for i in range(6):
+        (tmp_path / f"soar_input_{i}.json").write_text(json.dumps(echo_input(i)))
+    (tmp_path / "nested" / "soar_input_error.json").write_text(json.dumps(echo_input(-1)))
+    (tmp_path / "nested" / "soar_input_raise.json").write_text(json.dumps(echo_input(1, **{"raise": True})))
+    (tmp_path / "notes.txt").write_text("not an input")
+    return tmp_path
+
+
+def test_discover_inputs(corpus):
+    names = [path.name for path in discover_inputs(corpus)]
+
+    assert names == [f"soar_input_{i}.json" for i in range(6)] + ["soar_input_error.json", "soar_input_raise.json"]
+
+
+def test_load_connector_class():
+    assert load_connector_class(CONNECTOR) is EchoConnector
+    with pytest.raises(ValueError):
+        load_connector_class("tests.test_corpus")
+
+
+def test_run_input(corpus):
+    result = run_input(EchoConnector, corpus / "soar_input_3.json", include_output=True)
+
+    assert result["success"]
+    assert result["statuses"] == [True]
+    assert result["output"][0]["data"] == [{"echo": 3, "prefix": "corpus"}]
+    assert result["latency"] > 0
+
+    failed = run_input(EchoConnector, corpus / "nested" / "soar_input_raise.json")
+    assert not failed["success"]
+    assert failed["error"] == "RuntimeError: upstream unavailable"
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_run_corpus(corpus, workers):
+    out = io.StringIO()
+
+    stats = run_corpus(CONNECTOR, discover_inputs(corpus), out, workers=workers, max_in_flight=3)
+
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert stats.count == len(results) == 8
+    assert stats.failures == 2
+    assert {result["input"].rsplit("/", 1)[-1] for result in results if not result["success"]} == {
+        "soar_input_error.json",
+        "soar_input_raise.json",
+    }
+    assert "8 inputs, 2 failed" in stats.summary()
+
+
+def test_main(corpus, tmp_path, capsys):
+    output = tmp_path / "results.jsonl"
+
+    exit_code = main(
+        [CONNECTOR, str(corpus), "--workers", "0", "--output", str(output), "--pattern", "soar_input_?.json"]
+    )
+
+    assert exit_code == 0
+    assert len(output.read_text().splitlines()) == 6
+    assert "6 inputs, 0 failed" in capsys.readouterr().err
+
+
+def test_corpus_collector(corpus, pytester):
+    for path in corpus.rglob("soar_input_*.json"):
+        pytester.path.joinpath(path.name).write_text(path.read_text())
+    pytester.makeini(f"[pytest]\nsoar_corpus_connector = {CONNECTOR}\n")
+
+    result = pytester.runpytest()
+
+    result.assert_outcomes(passed=6, failed=2)
+    result.stdout.fnmatch_lines(
+        ["*soar_input_error.json: action result statuses: [[]False[]]", "*RuntimeError: upstream unavailable"]
+    )
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+import phantom.app as phantom
+from phantom.action_result import ActionResult
+from phantom.base_connector import BaseConnector
+from phantom.instrumentation import hook_installed
+from pytest_splunk_soar_connectors.clock import VirtualClock
+from pytest_splunk_soar_connectors.latency import (
+    DistributionLatency,
+    FixedLatency,
+    PerItemLatency,
+    PlatformLatency,
+    RateLimit,
+)
+from pytest_splunk_soar_connectors.models import InputJSON
+
+
+class IngestConnector(BaseConnector):
+    batched = False
+
+    def initialize(self):
+        return phantom.APP_SUCCESS
+
+    def handle_action(self, param):
+        artifacts = [{"name": f"artifact {i}", "container_id": 123} for i in range(10)]
+        if self.batched:
+            self.save_artifacts(artifacts)
+        else:
+            for artifact in artifacts:
+                self.save_artifact(artifact)
+        return self.add_action_result(ActionResult(dict(param))).set_status(phantom.APP_SUCCESS)
+
+
+class SlowIngestConnector(IngestConnector):
+    batched = True
+
+    def handle_action(self, param):
+        # Keeps the worker busy in real time, so that the parameters are spread over the workers
+        time.sleep(0.01)
+        return super().handle_action(param)
+
+
+def ingest_input(parameter_count: int) -> InputJSON:
+    return {
+        "action": "ingest",
+        "identifier": "on_poll",
+        "config": {},
+        "parameters": [{"run": i} for i in range(parameter_count)],
+        "environment_variables": {},
+    }
+
+
+def run_ingest(parameter_count: int = 1, batched: bool = False, workers: int = 1, connector_class=IngestConnector):
+    connector = connector_class()
+    connector.batched = batched
+    connector.parameter_workers = workers
+    connector._handle_action(json.dumps(ingest_input(parameter_count)), None)  # pylint: disable=protected-access
+
+
+def test_virtual_clock_lanes():
+    clock = VirtualClock()
+    clock.advance(1.0)
+
+    def worker(seconds):
+        clock.advance(seconds)
+
+    threads = [threading.Thread(target=worker, args=(seconds,)) for seconds in (2.0, 3.0)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert clock.elapsed() == 4.0
+    assert clock.now() == 4.0
+
+    async def task(seconds):
+        clock.advance(seconds)
+
+    async def tasks():
+        await asyncio.gather(task(1.0), task(1.0))
+
+    asyncio.run(tasks())
+    assert clock.now() == 5.0
+    with pytest.raises(ValueError):
+        clock.advance(-1)
+
+
+def test_latency_models():
+    assert FixedLatency(0.1).latency(50) == 0.1
+    assert PerItemLatency(0.1, 0.01).latency(10) == pytest.approx(0.2)
+
+    first = DistributionLatency.lognormal(0.05, seed=1)
+    second = DistributionLatency.lognormal(0.05, seed=1)
+    assert [first.latency(1) for _ in range(3)] == [second.latency(1) for _ in range(3)]
+    assert DistributionLatency(lambda rng: -1.0, per_item=0.5).latency(2) == 1.0
+
+
+def test_rate_limit():
+    limit = RateLimit(calls_per_second=10, burst=2)
+
+    assert [limit.reserve(0.0) for _ in range(4)] == pytest.approx([0.0, 0.0, 0.1, 0.2])
+    with pytest.raises(ValueError):
+        RateLimit(0)
+
+
+def test_batching_reduces_simulated_time(soar_platform_latency):
+    latency = soar_platform_latency({"save_artifact": FixedLatency(0.05), "save_artifacts": PerItemLatency(0.05, 0.001)})
+
+    run_ingest()
+    unbatched = latency.wall_time
+    run_ingest(batched=True)
+
+    assert unbatched == pytest.approx(0.5)
+    assert latency.wall_time - unbatched == pytest.approx(0.06)
+    assert latency.api_times["save_artifact"][0] == 10
+
+
+def test_parameter_workers_overlap_in_simulated_time(soar_platform_latency):
+    latency = soar_platform_latency({"save_artifacts": FixedLatency(1.0)})
+
+    run_ingest(parameter_count=4, batched=True, workers=2, connector_class=SlowIngestConnector)
+
+    assert latency.wall_time == pytest.approx(2.0)
+
+
+def test_rate_limit_slows_down_calls(soar_platform_latency):
+    latency = soar_platform_latency({"save_artifact": FixedLatency(0.0)}, {"save_artifact": RateLimit(5)})
+
+    run_ingest()
+
+    assert latency.wall_time == pytest.approx(1.8)
+
+
+def test_real_latency():
+    latency = PlatformLatency({"save_artifacts": FixedLatency(0.02)}, virtual=False)
+    with hook_installed(latency):
+        run_ingest(batched=True)
+
+    assert latency.wall_time >= 0.02
+    assert "simulated wall time" in latency.summary_lines()[-1]
@@ -0,0 +1,140 @@
+import logging
+import os
+import pathlib
+import queue
+
+import pytest
+
+from pytest_splunk_soar_connectors import log
+from tests.conftest import MyDNSConnector
+
+PROJECT_PATH = pathlib.Path(__file__).parent.parent
+
+
+def test_handlers_are_installed_once():
+    connectors = [MyDNSConnector() for _ in range(5)]
+
+    handlers = connectors[0].logger.handlers
+    assert len(handlers) == len(set(map(type, handlers)))
+    assert all(conn.logger is connectors[0].logger for conn in connectors)
+
+
+def test_capture_mode(soar_captured_logs, my_dns_connector):
+    my_dns_connector.save_progress("captured progress")
+
+    records = soar_captured_logs()
+    assert records[-1]["message"] == "BaseConnector.save_progress - Progress: captured progress; More: None"
+    assert records[-1]["level"] == "INFO"
+
+
+def test_capture_mode_is_bounded():
+    log.set_default_log_mode("console", capacity=3)
+    try:
+        with log.capture_logs() as get_records:
+            conn = MyDNSConnector()
+            for i in range(10):
+                conn.send_progress(f"progress {i}")
+            assert [r["message"][-10:] for r in get_records()] == ["progress 7", "progress 8", "progress 9"]
+    finally:
+        log.set_default_log_mode("console", capacity=log.DEFAULT_CAPTURE_CAPACITY)
+
+
+def test_capture_mode_formats_records_when_they_are_read():
+    formatted = []
+
+    class Recorder:
+        def __str__(self):
+            formatted.append(self)
+            return "recorded"
+
+    ring_buffer = log.RingBufferHandler()
+    ring_buffer.handle(logging.LogRecord("soar", logging.WARNING, __file__, 1, "value: %s", (Recorder(),), None))
+
+    assert not formatted
+    assert ring_buffer.get_records()[-1]["message"] == "value: recorded"
+    assert ring_buffer.get_records()[-1]["level"] == "WARNING"
+
+
+def test_queue_mode(capsys, tmp_path):
+    log_path = str(tmp_path / "queue.log")
+    try:
+        logger = log.configure_logging(log_path=log_path, log_to_console=False, mode="queue")
+        logger.info("queued message")
+        log.flush_logging()
+        with open(log_path, encoding="utf-8") as log_file:
+            assert "queued message" in log_file.read()
+    finally:
+        log.shutdown_logging()
+
+
+def test_queue_mode_defers_formatting_to_listener():
+    formatted = []
+
+    class Recorder:
+        def __str__(self):
+            formatted.append(self)
+            return "recorded"
+
+    record_queue: "queue.Queue[logging.LogRecord]" = queue.Queue()
+    record = logging.LogRecord("soar", logging.INFO, __file__, 1, "value: %s", (Recorder(),), None)
+
+    log.DeferredQueueHandler(record_queue).handle(record)
+
+    assert record_queue.get_nowait() is record
+    assert not formatted
+    assert record.getMessage() == "value: recorded"
+
+
+def test_parameter_errors_are_logged_by_the_connector_logger(soar_captured_logs, my_dns_connector):
+    my_dns_connector.handle_exception = lambda exception: None
+
+    my_dns_connector._handle_parameter_error(ValueError("lookup failed"))
+
+    assert soar_captured_logs()[-1] == {
+        **soar_captured_logs()[-1],
+        "logger": "phantom.base_connector",
+        "level": "ERROR",
+        "message": "lookup failed",
+    }
+
+
+def test_debug_print_defers_pretty_printing(my_dns_connector):
+    class Unprintable:
+        def __repr__(self):
+            raise AssertionError("must not be formatted")
+
+    my_dns_connector.logger.setLevel(logging.INFO)
+    my_dns_connector.debug_print("tag", [Unprintable()])
+
+
+def test_xdist_workers_keep_explicit_log_paths(pytester, monkeypatch):
+    pytest.importorskip("xdist")
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join([str(PROJECT_PATH), str(PROJECT_PATH / "src")]))
+    pytester.makepyfile(
+        """
+        import os
+
+        import pytest
+
+        from pytest_splunk_soar_connectors import log
+        from tests.my_dns_app.my_dns_app_connector import MyDNSConnector
+
+        @pytest.mark.parametrize("case", range(2))
+        def test_worker(tmp_path, case):
+            worker = os.environ["PYTEST_XDIST_WORKER"]
+            MyDNSConnector().save_progress("progress")
+            log_path = str(tmp_path / "queue.log")
+            try:
+                logger = log.configure_logging(log_path=log_path, log_to_console=False, mode="queue")
+                logger.warning("queued message")
+                log.flush_logging()
+            finally:
+                log.shutdown_logging()
+            assert os.path.exists(log_path)
+            assert os.path.exists(f"debug_log.{worker}.log")
+        """
+    )
+
+    result = pytester.runpytest_subprocess("-p", "xdist", "-n", "2")
+
+    result.assert_outcomes(passed=2)
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+import phantom.app as phantom
+from phantom.action_result import ActionResult
+from phantom.base_connector import BaseConnector
+from phantom.vault import Vault, VirtualVault
+from pytest_splunk_soar_connectors.models import InputJSON
+
+INGEST_INPUT: InputJSON = {
+    "action": "ingest",
+    "identifier": "on_poll",
+    "config": {},
+    "parameters": [{"count": 3}],
+    "environment_variables": {},
+}
+
+
+class IngestConnector(BaseConnector):
+    batched = False
+
+    def initialize(self):
+        return phantom.APP_SUCCESS
+
+    def handle_action(self, param):
+        artifacts = [{"name": f"artifact {i}", "cef": {"i": i}, "container_id": 123} for i in range(param["count"])]
+        if self.batched:
+            self.save_artifacts(artifacts)
+        else:
+            for artifact in artifacts:
+                self.save_artifact(artifact)
+        return self.add_action_result(ActionResult(dict(param))).set_status(phantom.APP_SUCCESS)
+
+
+class BatchedIngestConnector(IngestConnector):
+    batched = True
+
+
+def run_ingest(connector_class):
+    connector_class()._handle_action(json.dumps(INGEST_INPUT), None)  # pylint: disable=protected-access
+
+
+def test_platform_calls_are_counted(soar_platform_calls):
+    run_ingest(IngestConnector)
+    run_ingest(BatchedIngestConnector)
+
+    soar_platform_calls.assert_calls("save_artifact", 3, action="on_poll")
+    assert soar_platform_calls.batch_sizes("save_artifacts") == [3]
+    assert soar_platform_calls.summary()["on_poll"]["save_artifact"] == {"calls": 3, "items": 3}
+    assert soar_platform_calls.count("handle_action") == 0
+
+
+def test_unbatched_calls_are_detected(soar_platform_calls):
+    run_ingest(IngestConnector)
+
+    assert soar_platform_calls.unbatched_calls() == {"on_poll": {"save_artifacts": 3}}
+    soar_platform_calls.assert_batched(max_single_calls=3)
+    with pytest.raises(AssertionError, match="3 single item calls"):
+        soar_platform_calls.assert_batched(max_single_calls=2)
+
+
+def test_single_item_batch_calls_are_unbatched(soar_platform_calls):
+    connector = BatchedIngestConnector()
+    connector.action_identifier = "on_poll"
+    connector.save_artifacts([{"name": "a", "container_id": 123}])
+    connector.save_artifacts([{"name": "b", "container_id": 123}])
+
+    assert soar_platform_calls.batching_violations(max_single_calls=1) == [
+        "action 'on_poll' made 2 single item calls that could be batched with save_artifacts (allowed: 1)"
+    ]
+
+
+def test_vault_calls_are_counted(soar_platform_calls, monkeypatch):
+    monkeypatch.setattr(Vault, "_vault", VirtualVault())
+    Vault.create_attachment("contents", 123, "file.txt", {})
+
+    soar_platform_calls.assert_calls("create_attachment", 1)
+
+
+@pytest.mark.soar_strict_batching(max_single_calls=0)
+def test_strict_batching_passes_batched_connector():
+    run_ingest(BatchedIngestConnector)
@@ -0,0 +1,80 @@
+import datetime
+import time
+
+import pytest
+
+import phantom.app as phantom
+from phantom.action_result import ActionResult
+from phantom.base_connector import BaseConnector
+from pytest_splunk_soar_connectors.polling import PollingSimulator, _slope
+
+
+class TicketConnector(BaseConnector):
+    """Ingests the tickets created since the last poll and remembers the IDs of all ingested tickets in its state."""
+
+    def __init__(self):
+        super().__init__()
+        self.upstream = []
+
+    def initialize(self):
+        self._state = self.load_state()
+        return phantom.APP_SUCCESS
+
+    def handle_action(self, param):
+        seen = self._state.get("seen", [])
+        new_tickets = [ticket for ticket in self.upstream if ticket["id"] not in seen]
+        for ticket in new_tickets:
+            self.save_container(
+                {
+                    "name": ticket["title"],
+                    "source_data_identifier": ticket["id"],
+                    "artifacts": [{"name": "ticket", "cef": ticket, "source_data_identifier": ticket["id"]}],
+                }
+            )
+        self.save_state({"seen": seen + [ticket["id"] for ticket in new_tickets], "last_poll": param["end_time"]})
+        time.sleep(0.5 * len(new_tickets))
+        return self.add_action_result(ActionResult(dict(param))).set_status(phantom.APP_SUCCESS)
+
+
+def ticket_batches(cycles: int, per_cycle: int):
+    for cycle in range(cycles):
+        yield [{"id": f"T-{cycle}-{i}", "title": f"ticket {cycle}/{i}"} for i in range(per_cycle)]
+
+
+def feed(connector: TicketConnector, batch: list):
+    connector.upstream = batch
+
+
+def test_polling_simulator_carries_state_over(soar_virtual_time):
+    with PollingSimulator(TicketConnector, ticket_batches(3, 2), feed) as simulator:
+        report = simulator.run(cycles=5)
+
+        assert len(report.cycles) == 3
+        assert [cycle.containers for cycle in report.cycles] == [2, 2, 2]
+        assert report.artifacts == 6
+        assert len(simulator.artifact_store) == 6
+        assert [cycle.state_size for cycle in report.cycles] == sorted(cycle.state_size for cycle in report.cycles)
+        assert report.state_size_slope > 0
+        assert simulator.container_store.query(source_data_identifier="T-2-1")
+
+
+def test_polling_simulator_on_virtual_schedule(soar_virtual_time, soar_polling_simulator):
+    started = datetime.datetime.now()
+    simulator = soar_polling_simulator(TicketConnector, ticket_batches(4, 3), feed, interval=60)
+
+    report = simulator.run(cycles=4)
+
+    assert [cycle.simulated for cycle in report.cycles] == [1.5] * 4
+    assert report.cycles[0].artifacts_per_second == 2
+    assert datetime.datetime.now() - started == datetime.timedelta(seconds=181.5)
+    assert "latency growth" in report.summary_lines()[-1]
+
+
+def test_polling_simulator_requires_feed():
+    with pytest.raises(ValueError):
+        PollingSimulator(TicketConnector, ticket_batches(1, 1))
+
+
+def test_slope():
+    assert _slope([1.0, 2.0, 3.0]) == 1.0
+    assert _slope([5.0]) == 0.0
@@ -0,0 +1,61 @@
+import json
+
+from phantom.instrumentation import hook_installed
+from pytest_splunk_soar_connectors.models import InputJSON
+from pytest_splunk_soar_connectors.profiling import ActionProfiler, ProfilingSession, collapsed_stacks, write_profile
+from tests.conftest import MyDNSConnector
+
+LOOKUP_INPUT: InputJSON = {
+    "action": "lookup ip",
+    "identifier": "forward_lookup",
+    "config": {},
+    "parameters": [{"ip": "8.8.8.8"}],
+    "environment_variables": {},
+}
+
+
+def run_profiled() -> ActionProfiler:
+    profiler = ActionProfiler()
+    with hook_installed(profiler):
+        MyDNSConnector()._handle_action(json.dumps(LOOKUP_INPUT), None)  # pylint: disable=protected-access
+    return profiler
+
+
+def test_action_profiler_records_platform_apis():
+    profiler = run_profiled()
+
+    assert profiler.api_times["handle_action"][0] == 1
+    assert profiler.api_times["add_data"][0] == 1
+    assert profiler.stats() is not None
+
+
+def test_action_profiler_inactive_without_hook():
+    profiler = ActionProfiler()
+    MyDNSConnector()._handle_action(json.dumps(LOOKUP_INPUT), None)  # pylint: disable=protected-access
+
+    assert not profiler.api_times
+    assert profiler.stats() is None
+
+
+def test_write_profile(tmp_path):
+    stats = run_profiled().stats()
+
+    pstats_path, collapsed_path = write_profile(stats, tmp_path, "tests/test_x.py::test_y[a b]")
+
+    assert pstats_path.name == "tests_test_x.py_test_y_a_b.pstats"
+    lines = collapsed_path.read_text().splitlines()
+    assert any("handle_action" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert sum(collapsed_stacks(stats).values()) > 0
+
+
+def test_profiling_session_summary(tmp_path):
+    session = ProfilingSession(tmp_path, top=5)
+    session.record("first", run_profiled())
+    session.record("second", run_profiled())
+
+    assert session.api_times["handle_action"][0] == 2
+    assert len(session.files) == 4
+    summary = "\n".join(session.summary_lines())
+    assert "handle_action" in summary
+    assert "tottime" in summary
@@ -0,0 +1,204 @@
+import multiprocessing
+import os
+import pathlib
+
+import pytest
+
+from phantom import base_connector
+from pytest_splunk_soar_connectors import shared_cache as shared_cache_module
+from pytest_splunk_soar_connectors.shared_cache import SharedCache
+from tests.conftest import MyDNSConnector
+
+PROJECT_PATH = pathlib.Path(__file__).parent.parent
+
+
+def _compute_once(directory, counter_path, results):
+    def compute():
+        with open(counter_path, "a", encoding="utf-8") as counter:
+            counter.write("x")
+        return {"value": 42}
+
+    results.put(SharedCache(directory).get_or_compute("answer", compute))
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_value_is_computed_once_across_processes(tmp_path):
+    counter_path = tmp_path / "counter"
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    processes = [
+        context.Process(target=_compute_once, args=(str(tmp_path / "cache"), counter_path, results)) for _ in range(4)
+    ]
+    for process in processes:
+        process.start()
+    values = [results.get(timeout=10) for _ in processes]
+    for process in processes:
+        process.join()
+
+    assert values == [{"value": 42}] * 4
+    assert counter_path.read_text() == "x"
+
+
+def test_stale_value_is_recomputed(tmp_path):
+    cache = SharedCache(str(tmp_path))
+    cache.set("key", 1)
+
+    assert cache.get_or_compute("key", lambda: 2, is_fresh=lambda value: value == 1) == 1
+    assert cache.get_or_compute("key", lambda: 3, is_fresh=lambda value: value == 2) == 3
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.get("key") == 3
+    assert cache.get("missing", "default") == "default"
+
+
+def test_stats_per_key_kind(tmp_path):
+    cache = SharedCache(str(tmp_path))
+    cache.set("app_json:a", 1)
+    cache.get("app_json:a")
+    cache.get("file_digests:b")
+    cache.get_or_compute("file_digests:b", lambda: 2)
+    cache.get_or_compute("file_digests:b", lambda: 3)
+
+    assert cache.stats == {"app_json": [1, 0], "file_digests": [1, 2]}
+    cache.clear()
+    assert cache.get("app_json:a") is None
+
+
+def test_oldest_values_are_evicted(tmp_path):
+    cache = SharedCache(str(tmp_path), max_entries=10)
+    for index in range(11):
+        cache.set(f"key:{index}", index)
+        os.utime(cache._path(f"key:{index}"), ns=(index, index))  # pylint: disable=protected-access
+
+    assert cache.get("key:0") is None
+    assert cache.get("key:10") == 10
+    assert len(cache._value_paths()) == 9  # pylint: disable=protected-access
+
+
+def test_directory_is_only_listed_to_evict(tmp_path, monkeypatch):
+    cache = SharedCache(str(tmp_path), max_entries=100)
+    listings = []
+    value_paths = cache._value_paths  # pylint: disable=protected-access
+    monkeypatch.setattr(cache, "_value_paths", lambda: listings.append(1) or value_paths())
+
+    for index in range(150):
+        cache.get_or_compute(f"key:{index}", lambda: 1)
+
+    # the first write counts the values, then every eviction down to 90 values lists them: at 101, 112, ... 145
+    assert len(listings) == 6
+    assert len(value_paths()) == 95
+
+
+def test_lock_files_are_reused(tmp_path):
+    cache = SharedCache(str(tmp_path))
+    for index in range(500):
+        cache.get_or_compute(f"key:{index}", lambda: 1)
+
+    assert len(os.listdir(tmp_path / "locks")) <= shared_cache_module.LOCK_STRIPES
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".lock")]
+
+
+def test_app_json_is_discovered_once(tmp_path):
+    cache = SharedCache(str(tmp_path))
+    previous = shared_cache_module.set_shared_cache(cache)
+    base_connector.clear_app_json_cache()
+    try:
+        first = MyDNSConnector()
+        first._load_app_json()  # pylint: disable=protected-access
+        # another worker process, its process wide cache is empty
+        base_connector.clear_app_json_cache()
+        second = MyDNSConnector()
+        second._load_app_json()  # pylint: disable=protected-access
+    finally:
+        shared_cache_module.set_shared_cache(previous)
+        base_connector.clear_app_json_cache()
+
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second.get_app_json() == first.get_app_json()
+    assert second.get_app_id() == first.get_app_id()
+
+
+def test_xdist_workers(pytester, monkeypatch):
+    pytest.importorskip("xdist")
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join([str(PROJECT_PATH), str(PROJECT_PATH / "src")]))
+    seed_file = pytester.path / "seed.txt"
+    seed_file.write_text("seed contents")
+    pytester.makeconftest(
+        f"""
+        import pytest
+
+        @pytest.fixture(scope="session")
+        def soar_vault_seed_files():
+            return [{{"container": 1, "file_location": {str(seed_file)!r}}}]
+        """
+    )
+    pytester.makepyfile(
+        """
+        import os
+
+        import pytest
+
+        from phantom.vault import vault_info
+        from pytest_splunk_soar_connectors.shared_cache import get_shared_cache
+        from tests.my_dns_app.my_dns_app_connector import MyDNSConnector
+
+        @pytest.mark.parametrize("case", range(4))
+        def test_worker(soar_vault, case):
+            worker = os.environ["PYTEST_XDIST_WORKER"]
+            conn = MyDNSConnector()
+            conn.save_progress("progress")
+            assert f"soar-{worker}-" in conn.get_state_dir()
+            assert f"soar-{worker}-" in soar_vault.root.name
+            assert get_shared_cache() is not None
+            assert vault_info(container_id=1)[2][0]["name"] == "seed.txt"
+            assert os.path.exists(f"debug_log.{worker}.log")
+        """
+    )
+
+    result = pytester.runpytest_subprocess("-p", "xdist", "-n", "2")
+
+    result.assert_outcomes(passed=4)
+    assert not (pytester.path / "debug_log.log").exists()
+
+
+def test_cache_persists_across_runs(pytester):
+    # a fixture kept with the project, files in temporary directories are not cached
+    fixture = PROJECT_PATH / "tests" / "assets" / "sample.txt"
+    pytester.makepyfile(
+        f"""
+        from phantom.vault import VirtualVault
+
+        def test_add():
+            VirtualVault().add(1, {str(fixture)!r}, "sample.txt", {{}})
+        """
+    )
+
+    first = pytester.runpytest()
+    second = pytester.runpytest()
+    cleared = pytester.runpytest("--soar-cache-clear")
+
+    first.stdout.fnmatch_lines(["*soar cache*", "file_digests: 0 hits, 1 misses"])
+    second.stdout.fnmatch_lines(["*soar cache*", "file_digests: 1 hits, 0 misses"])
+    cleared.stdout.fnmatch_lines(["*soar cache*", "file_digests: 0 hits, 1 misses"])
+
+
+def test_cache_stats_of_xdist_workers(pytester, monkeypatch):
+    pytest.importorskip("xdist")
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join([str(PROJECT_PATH), str(PROJECT_PATH / "src")]))
+    # a fixture kept with the project, files in temporary directories are not cached
+    fixture = PROJECT_PATH / "tests" / "assets" / "sample.txt"
+    pytester.makepyfile(
+        f"""
+        import pytest
+
+        from phantom.vault import VirtualVault
+
+        @pytest.mark.parametrize("case", range(4))
+        def test_add(case):
+            VirtualVault().add(1, {str(fixture)!r}, "sample.txt", {{}})
+        """
+    )
+
+    result = pytester.runpytest_subprocess("-p", "xdist", "-n", "2")
+
+    result.assert_outcomes(passed=4)
+    result.stdout.fnmatch_lines(["*soar cache*", "file_digests: 3 hits, 1 misses"])
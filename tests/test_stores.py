@@ -0,0 +1,65 @@
+from pytest_splunk_soar_connectors.stores import ArtifactStore, ContainerStore
+
+
+def _artifact(identifier, label="event", severity="low", **cef):
+    return {"name": f"artifact {identifier}", "label": label, "severity": severity, "cef": cef,
+            "source_data_identifier": identifier}
+
+
+def test_artifact_store_query():
+    store = ArtifactStore()
+    store.add(1, _artifact("a", sourceAddress="10.0.0.1"), container=1)
+    store.add(2, _artifact("b", label="alert", severity="high", sourceAddress="10.0.0.2"), container=1)
+    store.add(3, _artifact("c", severity="high", destinationAddress="10.0.0.1"), container=2)
+
+    assert len(store) == 3
+    assert [a["source_data_identifier"] for a in store.query(severity="high")] == ["b", "c"]
+    assert [a["source_data_identifier"] for a in store.query(container=1, label="event")] == ["a"]
+    assert [a["source_data_identifier"] for a in store.query(cef_key="sourceAddress")] == ["a", "b"]
+    assert store.query(cef={"sourceAddress": "10.0.0.2"})[0]["source_data_identifier"] == "b"
+    assert store.query(source_data_identifier="c", container=1) == []
+    assert store.count(container=2) == 1
+    assert store.get(3)["cef"] == {"destinationAddress": "10.0.0.1"}
+
+
+def test_artifact_store_duplicates_per_container():
+    store = ArtifactStore()
+    store.add(1, _artifact("a"), container=1)
+
+    assert store.find_duplicate(_artifact("a"), container=1) == 1
+    assert store.find_duplicate(_artifact("a"), container=2) is None
+    assert store.find_duplicate({"name": "no identifier"}, container=1) is None
+
+
+def test_artifact_store_add_many():
+    store = ArtifactStore()
+    store.add(1, _artifact("a"), container=5)
+
+    results, next_id = store.add_many(
+        [_artifact("a"), _artifact("b"), _artifact("b"), {**_artifact("a"), "container": 6}], container=5, first_id=2
+    )
+
+    assert results == [(1, False), (2, True), (2, False), (3, True)]
+    assert next_id == 4
+    assert store.count(container=6) == 1
+
+
+def test_artifact_store_unhashable_cef_values():
+    store = ArtifactStore()
+    store.add(1, _artifact("a", hashes=["abc", "def"]), container=1)
+
+    assert store.query(cef={"hashes": ["abc", "def"]})[0]["source_data_identifier"] == "a"
+
+
+def test_container_store():
+    store = ContainerStore()
+    store.add(1, {"name": "first", "label": "events", "source_data_identifier": "s1", "artifacts": [{}]})
+    store.add(2, {"name": "second", "label": "incident", "status": "open", "source_data_identifier": "s2"})
+
+    assert store.get("1")["status"] == "new"
+    assert "artifacts" not in store.get(1)
+    assert store.find_duplicate({"source_data_identifier": "s2"}) == 2
+    assert store.find_duplicate({"source_data_identifier": "s3"}) is None
+    assert [c["name"] for c in store.query(label="incident", status="open")] == ["second"]
+    assert store.count(status="new") == 1
+    assert store.next_free_id(1) == 3
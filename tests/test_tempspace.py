@@ -0,0 +1,109 @@
+import multiprocessing
+import os
+
+import pytest
+
+from phantom import tempspace
+from phantom.tempspace import TempSpace
+from phantom.vault import VaultAPI
+from tests.conftest import MyDNSConnector
+
+
+@pytest.fixture()
+def temp_space(tmp_path):
+    space = TempSpace(base_dir=str(tmp_path), prefix="soar-test-")
+    yield space
+    space.cleanup()
+
+
+def test_allocations_share_one_root(temp_space, tmp_path):
+    state_file = temp_space.state_file()
+    state_dir = temp_space.state_dir()
+    vault_root = temp_space.vault_root()
+
+    assert [p.name for p in tmp_path.iterdir()] == [os.path.basename(temp_space.root)]
+    assert os.path.dirname(state_file) == os.path.join(temp_space.root, tempspace.STATE_FILES)
+    assert os.path.dirname(state_dir.name) == os.path.join(temp_space.root, tempspace.STATE_DIRS)
+    assert os.path.dirname(vault_root.name) == os.path.join(temp_space.root, tempspace.VAULT_ROOTS)
+    assert state_file.endswith(".json")
+    assert not os.path.exists(state_file)
+    assert os.path.isdir(state_dir.name)
+    assert len({state_file, temp_space.state_file()}) == 2
+
+
+def test_cleanup_removes_everything(temp_space, tmp_path):
+    state_dir = temp_space.state_dir()
+    state_dir.cleanup()
+    assert not os.path.exists(state_dir.name)
+    temp_space.vault_root()
+
+    temp_space.cleanup()
+
+    assert not list(tmp_path.iterdir())
+    # a later allocation creates a new root
+    assert os.path.isdir(temp_space.state_dir().name)
+
+
+def _allocate(space, queue):
+    queue.put(space.state_dir().name)
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_forked_process_allocates_below_parent_root(temp_space):
+    parent_dir = temp_space.state_dir().name
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=_allocate, args=(temp_space, queue))
+    process.start()
+    child_dir = queue.get(timeout=10)
+    process.join()
+
+    assert child_dir != parent_dir
+    assert child_dir.startswith(os.path.join(temp_space.root, f"pid-{process.pid}"))
+    assert os.path.isdir(child_dir)
+
+
+def test_connector_allocates_from_temp_space(temp_space):
+    previous = tempspace.set_temp_space(temp_space)
+    try:
+        conn = MyDNSConnector()
+    finally:
+        tempspace.set_temp_space(previous)
+
+    assert conn.state_file_location.startswith(temp_space.root)
+    assert conn.get_state_dir().startswith(temp_space.root)
+
+
+def test_vault_root_is_allocated_on_first_use(temp_space):
+    vault_api = VaultAPI()
+    previous = tempspace.set_temp_space(temp_space)
+    try:
+        vault_tmp_dir = str(vault_api._vault.get_vault_tmp_dir())
+    finally:
+        tempspace.set_temp_space(previous)
+
+    assert vault_tmp_dir.startswith(temp_space.root)
+
+
+def test_soar_tmp_dir_option(pytester, tmp_path):
+    base_dir = tmp_path / "base"
+    base_dir.mkdir()
+    pytester.makepyfile(
+        f"""
+        from phantom.vault import VirtualVault, get_vault_tmp_dir
+        from tests.my_dns_app.my_dns_app_connector import MyDNSConnector
+
+        def test_allocations():
+            conn = MyDNSConnector()
+            vault = VirtualVault()
+            assert conn.get_state_dir().startswith({str(base_dir)!r})
+            assert vault.root.name.startswith({str(base_dir)!r})
+            assert "soar-main-" in vault.root.name
+            assert get_vault_tmp_dir().startswith({str(base_dir)!r})
+        """
+    )
+
+    result = pytester.runpytest("--soar-tmp-dir", str(base_dir))
+
+    result.assert_outcomes(passed=1)
+    assert not list(base_dir.iterdir())
@@ -1,6 +1,13 @@
+import hashlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from phantom.vault import get_vault_tmp_dir, Vault
+import pytest
+
+import phantom.rules as phantom_rules
+from phantom.vault import get_vault_tmp_dir, vault_iter_chunks, vault_open, Vault, VirtualVault
 
 
 def test_get_vault_tmp_dir():
@@ -19,5 +26,251 @@ def test_create_attachment():
     Vault.create_attachment(
         file_contents=file_contents, container_id=container_id, file_name=file_name, metadata=metadata
     )
-    
+
     assert len(Vault._vault.files) == 1
+
+
+@pytest.mark.parametrize("link_mode", ["auto", "hardlink", "copy"])
+def test_add_is_content_addressed(tmp_path, link_mode):
+    vault = VirtualVault(link_mode=link_mode)
+    first = tmp_path / "first.bin"
+    second = tmp_path / "second.bin"
+    first.write_bytes(b"\x00\x01" * 1024 * 1024)
+    second.write_bytes(first.read_bytes())
+
+    _, _, first_id = vault.add(container=1, file_location=str(first), file_name="first.bin", metadata={})
+    _, _, second_id = vault.add(container=2, file_location=str(second), file_name="second.bin", metadata={})
+
+    assert first_id == second_id == hashlib.sha256(first.read_bytes()).hexdigest()
+    assert vault.files[first_id]["metadata"]["md5"] == hashlib.md5(first.read_bytes()).hexdigest()
+    assert vault.files[first_id]["path"].read_bytes() == first.read_bytes()
+    assert len([p for p in (Path(vault.root.name) / "objects").rglob("*") if p.is_file()]) == 1
+
+
+@pytest.mark.parametrize("link_mode", ["auto", "copy"])
+def test_add_does_not_hardlink_by_default(tmp_path, link_mode):
+    vault = VirtualVault(link_mode=link_mode)
+    source = tmp_path / "source.txt"
+    source.write_text("hello")
+
+    _, _, vault_id = vault.add(container=1, file_location=str(source), file_name="source.txt", metadata={})
+    with open(source, "w", encoding="utf-8") as source_file:
+        source_file.write("changed")
+
+    assert not os.path.samefile(vault.files[vault_id]["path"], source)
+    assert vault.files[vault_id]["path"].read_text() == "hello"
+
+
+def test_delete_removes_unreferenced_objects(tmp_path):
+    vault = VirtualVault()
+    source = tmp_path / "source.txt"
+    source.write_text("hello")
+    first = vault.add(container=1, file_location=str(source), file_name="first.txt", metadata={})[2]
+    vault.add(container=2, file_location=str(source), file_name="second.txt", metadata={})
+    object_path = vault.files[first]["path"]
+
+    vault.delete_entry(vault.find(container_id=1)[0]["id"])
+    assert object_path.read_text() == "hello"
+
+    vault.delete(first)
+    assert not object_path.exists()
+
+    vault.add(container=3, file_location=str(source), file_name="third.txt", metadata={})
+    assert vault.files[first]["path"].read_text() == "hello"
+
+
+@pytest.mark.parametrize(
+    "contents",
+    [
+        b"hello vault",
+        "hello vault",
+        io.BytesIO(b"hello vault"),
+        io.StringIO("hello vault"),
+        iter([b"hello", " ", b"vault"]),
+    ],
+    ids=["bytes", "text", "binary file", "text file", "chunks"],
+)
+def test_create_attachment_contents(monkeypatch, contents):
+    monkeypatch.setattr(Vault, "_vault", VirtualVault())
+
+    result = Vault.create_attachment(contents, container_id=1, file_name="hello.txt")
+
+    assert result == {"succeeded": True, "message": "Success", "hash": hashlib.sha256(b"hello vault").hexdigest()}
+    entry = Vault._vault.files[result["hash"]]
+    assert entry["path"].read_bytes() == b"hello vault"
+    assert entry["file_name"] == "hello.txt"
+    assert not list((Path(Vault._vault.root.name) / "incoming").iterdir())
+
+
+def test_create_attachment_concurrently(monkeypatch):
+    monkeypatch.setattr(Vault, "_vault", VirtualVault())
+    payloads = [bytes([i]) * (256 * 1024 + i) for i in range(16)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda payload: Vault.create_attachment(iter([payload]), 1), payloads))
+
+    for payload, result in zip(payloads, results):
+        assert Vault._vault.files[result["hash"]]["path"].read_bytes() == payload
+    assert len(Vault._vault.entries) == 16
+    assert len({entry["id"] for entry in Vault._vault.entries.values()}) == 16
+
+
+SAMPLE_FILE = Path(__file__).parent / Path("assets/sample.txt")
+
+
+@pytest.fixture(scope="session")
+def soar_vault_seed_files():
+    return [{"container": 42, "file_location": SAMPLE_FILE, "file_name": "seeded.txt", "metadata": {"seeded": True}}]
+
+
+def test_soar_vault_sees_seeded_files(soar_vault):
+    success, _, files = phantom_rules.vault_info(container_id=42)
+
+    assert success
+    assert files[0]["file_name"] == "seeded.txt"
+    assert files[0]["metadata"]["seeded"]
+
+
+def test_soar_vault_changes_do_not_leak(soar_vault, soar_base_vault):
+    _, _, files = phantom_rules.vault_info(file_name="seeded.txt")
+    files[0]["metadata"]["changed"] = True
+    phantom_rules.vault_add(container=43, file_location=str(SAMPLE_FILE), file_name="added.txt")
+    result = phantom_rules.vault_delete(file_name="seeded.txt")
+
+    assert result["success"]
+    assert not phantom_rules.vault_info(file_name="seeded.txt")[0]
+    assert phantom_rules.vault_info(file_name="added.txt")[0]
+    assert soar_base_vault.find(file_name="seeded.txt")
+    assert not soar_base_vault.find(file_name="added.txt")
+    assert "changed" not in soar_base_vault.find(file_name="seeded.txt")[0]["metadata"]
+
+
+def test_soar_vault_is_reset_between_tests(soar_vault):
+    assert phantom_rules.vault_info(file_name="seeded.txt")[0]
+    assert not phantom_rules.vault_info(file_name="added.txt")[0]
+
+
+def test_soar_vault_materialize(soar_vault, soar_base_vault):
+    base_entry = soar_base_vault.find(file_name="seeded.txt")[0]
+
+    entry = soar_vault.materialize(base_entry["id"])
+    entry["path"].write_text("changed")
+
+    assert entry["vault_id"] == base_entry["vault_id"]
+    assert len(soar_vault.find(file_name="seeded.txt")) == 1
+    assert base_entry["path"].read_text("utf-8") == SAMPLE_FILE.read_text("utf-8")
+
+
+def test_vault_open_is_memory_mapped(soar_vault):
+    _, _, files = phantom_rules.vault_info(file_name="seeded.txt")
+    expected = SAMPLE_FILE.read_bytes()
+
+    with vault_open(files[0]["vault_id"]) as view:
+        assert len(view) == len(expected)
+        assert view.view.readonly
+        header = view[:5]
+        assert bytes(header) == expected[:5]
+        assert len(soar_vault.open_files) == 1
+        header.release()
+
+    assert view.closed
+    assert not soar_vault.open_files.report()
+
+
+def test_vault_open_close_with_live_slices(soar_vault):
+    _, _, files = phantom_rules.vault_info(file_name="seeded.txt")
+    view = vault_open(files[0]["vault_id"])
+    header = view[:5]
+
+    with pytest.raises(BufferError, match="still in use"):
+        view.close()
+
+    assert not view.closed
+    assert len(soar_vault.open_files) == 1
+    assert bytes(view[:5]) == bytes(header)
+    header.release()
+    view.close()
+    assert view.closed
+    assert len(soar_vault.open_files) == 0
+
+
+def test_vault_iter_chunks(soar_vault):
+    _, _, files = phantom_rules.vault_info(file_name="seeded.txt")
+
+    chunks = [bytes(chunk) for chunk in vault_iter_chunks(files[0]["vault_id"], chunk_size=4)]
+
+    assert b"".join(chunks) == SAMPLE_FILE.read_bytes()
+    assert len(chunks[0]) == 4
+    assert len(soar_vault.open_files) == 0
+
+
+def test_vault_open_reports_leaks(tmp_path):
+    vault = VirtualVault()
+    empty = tmp_path / "empty.bin"
+    empty.write_bytes(b"")
+    _, _, vault_id = vault.add(container=1, file_location=str(empty), file_name="empty.bin", metadata={})
+
+    view = vault.open_file(vault_id)
+    leaks = vault.open_files.close_all()
+
+    assert len(view) == 0
+    assert view.closed
+    assert len(leaks) == 1 and "test_vault.py" in leaks[0]
+    with pytest.raises(FileNotFoundError):
+        vault.open_file("unknown")
+
+
+@pytest.mark.parametrize("link_mode", ["auto", "copy"])
+def test_add_reuses_cached_digests(tmp_path, monkeypatch, link_mode):
+    # pylint: disable=import-outside-toplevel
+    import phantom.vault
+    from pytest_splunk_soar_connectors.shared_cache import SharedCache
+
+    digest_cache = SharedCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(phantom.vault, "_digest_cache", digest_cache)
+    # tmp_path stands in for a fixture directory of the project
+    monkeypatch.setattr(phantom.vault, "_is_cacheable_path", lambda file_location: True)
+    fixture = tmp_path / "capture.pcap"
+    fixture.write_bytes(b"\xd4\xc3\xb2\xa1" * 4096)
+    hashed = []
+    for name in ("_hash_file", "_copy_and_hash"):
+        hash_function = getattr(phantom.vault, name)
+        monkeypatch.setattr(
+            phantom.vault, name, lambda *args, hash_function=hash_function: hashed.append(args) or hash_function(*args)
+        )
+
+    _, _, first_id = VirtualVault(link_mode=link_mode).add(1, str(fixture), "capture.pcap", {})
+    # the miss hashes the file while storing it
+    assert len(hashed) == 1
+    # a later run with a fresh vault
+    vault = VirtualVault(link_mode=link_mode)
+    _, _, second_id = vault.add(1, str(fixture), "capture.pcap", {})
+
+    assert first_id == second_id == hashlib.sha256(fixture.read_bytes()).hexdigest()
+    assert vault.files[second_id]["metadata"]["md5"] == hashlib.md5(fixture.read_bytes()).hexdigest()
+    assert vault.files[second_id]["path"].read_bytes() == fixture.read_bytes()
+    assert digest_cache.stats == {"file_digests": [1, 1]}
+    assert len(hashed) == 1
+
+    fixture.write_bytes(b"changed")
+    _, _, changed_id = vault.add(1, str(fixture), "capture.pcap", {})
+
+    assert changed_id == hashlib.sha256(b"changed").hexdigest()
+    assert digest_cache.stats == {"file_digests": [1, 2]}
+
+
+def test_add_does_not_cache_digests_of_temporary_files(tmp_path, monkeypatch):
+    # pylint: disable=import-outside-toplevel
+    import phantom.vault
+    from pytest_splunk_soar_connectors.shared_cache import SharedCache
+
+    digest_cache = SharedCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(phantom.vault, "_digest_cache", digest_cache)
+    download = tmp_path / "download.bin"
+    download.write_bytes(b"one-off")
+
+    _, _, vault_id = VirtualVault().add(1, str(download), "download.bin", {})
+
+    assert vault_id == hashlib.sha256(b"one-off").hexdigest()
+    assert digest_cache.stats == {}
+    assert not digest_cache._value_paths()  # pylint: disable=protected-access
@@ -1,6 +1,7 @@
 from pathlib import Path
 
 import phantom.rules as phantom_rules
+from phantom.vault import Vault, VirtualVault
 
 
 def test_rules_vault_info():
@@ -36,7 +37,10 @@ def test_rules_vault_add():
 
     assert vault_add_success
     assert vault_add_msg == "Success"
-    assert vault_id == "a1a7ab3d4e6a4dc80809bfe077bb4373"
+    assert vault_id == "72b58b4983bc4f67f7c866874250eb315bd2beebb561d5d97b0923a6ce36da54"
+
+    _, _, info = phantom_rules.vault_info(vault_id=vault_id)
+    assert info[0]["metadata"]["md5"] == "a1a7ab3d4e6a4dc80809bfe077bb4373"
 
 
 def test_rules_vault_delete():
@@ -63,3 +67,44 @@ def test_rules_vault_delete():
 
     assert result.get("success")
     assert result.get("message") == "deleted from vault"
+
+
+def test_rules_vault_info_by_container_and_file_name():
+    file_path = Path(__file__).parent / Path("assets/sample.txt")
+
+    phantom_rules.vault_add(container=9001, file_location=str(file_path), file_name="first.txt")
+    phantom_rules.vault_add(container=9001, file_location=str(file_path), file_name="second.txt")
+    phantom_rules.vault_add(container=9002, file_location=str(file_path), file_name="first.txt")
+
+    success, _, files = phantom_rules.vault_info(container_id=9001)
+    assert success
+    assert [f["file_name"] for f in files] == ["first.txt", "second.txt"]
+
+    success, _, files = phantom_rules.vault_info(file_name="first.txt", container_id=9002)
+    assert success
+    assert len(files) == 1
+    assert files[0]["container"] == 9002
+
+    success, _, files = phantom_rules.vault_info(file_name="missing.txt", container_id=9001)
+    assert not success
+    assert files == []
+
+
+def test_rules_vault_delete_by_file_name_requires_remove_all(monkeypatch):
+    file_path = Path(__file__).parent / Path("assets/sample.txt")
+    monkeypatch.setattr(Vault, "_vault", VirtualVault())
+    # vault_info refuses to look into an empty vault
+    phantom_rules.vault_add(container=9100, file_location=str(file_path), file_name="keep_me.txt")
+
+    phantom_rules.vault_add(container=9101, file_location=str(file_path), file_name="delete_me.txt")
+    phantom_rules.vault_add(container=9102, file_location=str(file_path), file_name="delete_me.txt")
+
+    result = phantom_rules.vault_delete(file_name="delete_me.txt")
+    assert not result.get("success")
+
+    result = phantom_rules.vault_delete(file_name="delete_me.txt", remove_all=True)
+    assert result.get("success")
+    assert len(result.get("deleted_files")) == 2
+
+    success, _, _ = phantom_rules.vault_info(file_name="delete_me.txt")
+    assert not success
@@ -0,0 +1,104 @@
+import asyncio
+import datetime
+import json
+import time
+
+import phantom.app as phantom
+from phantom.action_result import ActionResult
+from phantom.base_connector import AsyncBaseConnector, BaseConnector
+from pytest_splunk_soar_connectors.latency import FixedLatency
+from pytest_splunk_soar_connectors.models import InputJSON
+from pytest_splunk_soar_connectors.virtual_time import VirtualTime
+
+
+def retry_input(parameter_count: int = 1) -> InputJSON:
+    return {
+        "action": "lookup with retries",
+        "identifier": "lookup_retry",
+        "config": {},
+        "parameters": [{"attempts": 4} for _ in range(parameter_count)],
+        "environment_variables": {},
+    }
+
+
+class BackoffConnector(BaseConnector):
+    def initialize(self):
+        return phantom.APP_SUCCESS
+
+    def handle_action(self, param):
+        started = time.monotonic()
+        for attempt in range(param["attempts"]):
+            time.sleep(2**attempt)
+        self.save_artifact(
+            {"name": "lookup", "container_id": 123, "start_time": datetime.datetime.now(datetime.timezone.utc)}
+        )
+        action_result = self.add_action_result(ActionResult(dict(param)))
+        action_result.update_summary({"waited": time.monotonic() - started})
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+
+class AsyncBackoffConnector(AsyncBaseConnector):
+    async def initialize(self):
+        return phantom.APP_SUCCESS
+
+    async def handle_action(self, param):
+        for attempt in range(param["attempts"]):
+            await asyncio.sleep(2**attempt)
+        return self.add_action_result(ActionResult(dict(param))).set_status(phantom.APP_SUCCESS)
+
+
+def test_sleep_advances_virtual_time(soar_virtual_time):
+    wall_started = time.perf_counter()
+    started = time.time()
+    now = datetime.datetime.now()
+
+    connector = BackoffConnector()
+    result = json.loads(connector._handle_action(json.dumps(retry_input()), None))  # pylint: disable=protected-access
+
+    assert time.perf_counter() - wall_started < 5
+    assert result[0]["summary"]["waited"] == 15
+    assert time.time() - started == 15
+    assert datetime.datetime.now() - now == datetime.timedelta(seconds=15)
+    assert isinstance(now, datetime.datetime)
+    assert soar_virtual_time.action_elapsed("lookup_retry") == 15
+
+
+def test_artifact_timestamps_use_virtual_time(soar_virtual_time):
+    connector = BackoffConnector()
+    connector._handle_action(json.dumps(retry_input(2)), None)  # pylint: disable=protected-access
+
+    first, second = connector.artifact_store.records()
+    assert second.artifact["start_time"] - first.artifact["start_time"] == datetime.timedelta(seconds=15)
+    assert first.create_time == first.artifact["start_time"]
+
+
+def test_parallel_parameters_overlap(soar_virtual_time):
+    connector = BackoffConnector()
+    connector.parameter_workers = 4
+    connector._handle_action(json.dumps(retry_input(4)), None)  # pylint: disable=protected-access
+
+    assert 15 <= soar_virtual_time.action_elapsed() < 60
+
+
+def test_async_sleep_is_virtual(soar_virtual_time):
+    AsyncBackoffConnector()._handle_action(json.dumps(retry_input(3)), None)  # pylint: disable=protected-access
+
+    assert soar_virtual_time.action_elapsed() == 15
+
+
+def test_virtual_time_shares_clock_with_latency(soar_virtual_time, soar_platform_latency):
+    latency = soar_platform_latency({"save_artifact": FixedLatency(1.0)})
+
+    BackoffConnector()._handle_action(json.dumps(retry_input()), None)  # pylint: disable=protected-access
+
+    assert latency.clock is soar_virtual_time.clock
+    assert soar_virtual_time.action_elapsed() == 16
+
+
+def test_uninstall_restores_time_functions():
+    with VirtualTime(start=datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)):
+        assert datetime.datetime.now(datetime.timezone.utc).year == 2022
+        time.sleep(3600)
+
+    assert time.sleep.__module__ == "time"
+    assert datetime.datetime.now().year > 2022